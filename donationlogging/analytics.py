@@ -0,0 +1,119 @@
+import logging
+import weakref
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from .ledger import MAX_AMOUNT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+log = logging.getLogger("red.craycogs.donationlogging.analytics")
+
+PERCENTILES = (25, 75, 90, 99)
+
+
+class Stats(NamedTuple):
+    donors: int
+    total: int
+    mean: float
+    median: float
+    percentiles: Dict[int, float]
+    gini: float
+    # (amount, donors at or above it) for every milestone of the bank.
+    milestones: List[Tuple[int, int]]
+    # (low, high, donors with low <= amount < high), one bucket per power of 10.
+    histogram: List[Tuple[int, int, int]]
+
+
+EMPTY = Stats(0, 0, 0.0, 0.0, {p: 0.0 for p in PERCENTILES}, 0.0, [], [])
+
+
+def _edges(lowest: int, highest: int) -> List[int]:
+    # powers of 10 from the one at or below the smallest amount to the one above the biggest.
+    return [10**k for k in range(len(str(lowest)) - 1, len(str(highest)) + 1)]
+
+
+def _percentile(values: Sequence[int], p: float) -> float:
+    # linear interpolation between the closest ranks, same as numpy's default.
+    pos = (len(values) - 1) * p / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def _compute_numpy(amounts: Iterable[int], thresholds: List[int]) -> Stats:
+    values = np.fromiter(amounts, dtype=np.int64)
+    values = values[values > 0]
+    if not (n := len(values)):
+        return EMPTY
+    values.sort()
+    # balances fit in an int64 but their sum might not.
+    total = int(values.sum()) if int(values[-1]) <= MAX_AMOUNT // n else sum(values.tolist())
+    ranks = np.arange(1, n + 1, dtype=np.float64)
+    edges = _edges(int(values[0]), int(values[-1]))
+    # the last edge is past the biggest amount and might not fit in an int64.
+    cuts = [*np.searchsorted(values, edges[:-1]), n]
+    above = n - np.searchsorted(values, thresholds) if thresholds else []
+    return Stats(
+        donors=n,
+        total=total,
+        mean=total / n,
+        median=float(np.median(values)),
+        percentiles=dict(zip(PERCENTILES, map(float, np.percentile(values, PERCENTILES)))),
+        gini=float(2 * np.dot(ranks, values) / (n * total) - (n + 1) / n),
+        milestones=list(zip(thresholds, map(int, above))),
+        histogram=[
+            (edges[i], edges[i + 1], int(cuts[i + 1] - cuts[i])) for i in range(len(edges) - 1)
+        ],
+    )
+
+
+def _compute_python(amounts: Iterable[int], thresholds: List[int]) -> Stats:
+    values = array("q", sorted(amount for amount in amounts if amount > 0))
+    if not (n := len(values)):
+        return EMPTY
+    total = sum(values)
+    edges = _edges(values[0], values[-1])
+    cuts = [bisect_left(values, edge) for edge in edges]
+    return Stats(
+        donors=n,
+        total=total,
+        mean=total / n,
+        median=_percentile(values, 50),
+        percentiles={p: _percentile(values, p) for p in PERCENTILES},
+        gini=2 * sum(i * v for i, v in enumerate(values, 1)) / (n * total) - (n + 1) / n,
+        milestones=[(t, n - bisect_left(values, t)) for t in thresholds],
+        histogram=[(edges[i], edges[i + 1], cuts[i + 1] - cuts[i]) for i in range(len(edges) - 1)],
+    )
+
+
+def compute(amounts: Iterable[int], thresholds: Iterable[int] = ()) -> Stats:
+    """
+    Summary statistics of a set of donation amounts. Amounts of 0 or less are ignored.
+
+    Uses numpy when it's installed and falls back to the stdlib otherwise."""
+    thresholds = sorted(thresholds)
+    if np is not None:
+        return _compute_numpy(amounts, thresholds)
+    return _compute_python(amounts, thresholds)
+
+
+# bank -> ((ranking version, milestone amounts), stats), dropped along with the bank.
+_cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def bank_stats(bank) -> Stats:
+    """
+    The stats of a bank, cached until its balances or milestones change."""
+    thresholds = tuple(t for t, _ in bank.milestones)
+    key = (bank.ranking.version, thresholds)
+    if (cached := _cache.get(bank)) and cached[0] == key:
+        return cached[1]
+
+    stats = compute(bank.ranking.amounts(), thresholds)
+    _cache[bank] = (key, stats)
+    return stats
@@ -0,0 +1,75 @@
+import asyncio
+import contextlib
+import logging
+from typing import Dict, List
+
+import discord
+
+log = logging.getLogger("red.craycogs.donationlogging.digest")
+
+EMBED_LIMIT = 4000
+
+
+class LogDigest:
+    """
+    Collects donation log lines per channel and sends them as one embed after a delay.
+
+    The first line logged to a channel starts its timer, everything logged to the same
+    channel before the timer runs out ends up in the same digest."""
+
+    def __init__(self, color: int = 0x303036):
+        self.color = color
+        self._lines: Dict[int, List[str]] = {}
+        self._channels: Dict[int, discord.TextChannel] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def add(self, channel: discord.TextChannel, line: str, delay: int):
+        self._lines.setdefault(channel.id, []).append(line)
+        self._channels[channel.id] = channel
+        if channel.id not in self._tasks:
+            self._tasks[channel.id] = asyncio.create_task(self._deliver_later(channel.id, delay))
+
+    @staticmethod
+    def _group(lines: List[str]) -> List[str]:
+        pages, current = [], ""
+        for line in lines:
+            if current and len(current) + len(line) + 1 > EMBED_LIMIT:
+                pages.append(current)
+                current = ""
+            current += line[:EMBED_LIMIT] + "\n"
+        if current:
+            pages.append(current)
+        return pages
+
+    async def _deliver(self, channel_id: int):
+        self._tasks.pop(channel_id, None)
+        lines = self._lines.pop(channel_id, [])
+        channel = self._channels.pop(channel_id, None)
+        if not lines or not channel:
+            return
+
+        pages = self._group(lines)
+        for index, page in enumerate(pages, 1):
+            embed = discord.Embed(
+                title=f"Donation log ({len(lines)} entries)", description=page, color=self.color
+            )
+            if len(pages) > 1:
+                embed.set_footer(text=f"Page {index}/{len(pages)}")
+            try:
+                await channel.send(embed=embed)
+            except discord.HTTPException:
+                log.exception(f"Couldn't send a donation log digest to {channel_id}")
+                return
+
+    async def _deliver_later(self, channel_id: int, delay: int):
+        await asyncio.sleep(delay)
+        await self._deliver(channel_id)
+
+    async def close(self):
+        """
+        Send everything that's still waiting right away."""
+        for channel_id, task in list(self._tasks.items()):
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            await self._deliver(channel_id)
@@ -1,20 +1,27 @@
 import asyncio
 import time
-from collections import namedtuple
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import discord
 from discord.ext.commands.converter import Greedy, RoleConverter, TextChannelConverter
 from discord.ext.commands.errors import ChannelNotFound
 from redbot.core import Config, commands
 from redbot.core.bot import Red
-from redbot.core.commands import RedHelpFormatter
-from redbot.core.utils.chat_formatting import humanize_list, humanize_number
-from redbot.core.utils.menus import DEFAULT_CONTROLS, menu, start_adding_reactions
+from redbot.core.utils.chat_formatting import box, humanize_list, humanize_number, pagify
+from redbot.core.utils.menus import start_adding_reactions
 from redbot.core.utils.predicates import MessagePredicate, ReactionPredicate
 
-from donationlogging.models import DonationManager, DonoUser
-
+from donationlogging.models import DonationManager
+
+from . import analytics, snapshot
+from .digest import LogDigest
+from .exceptions import CategoryDoesNotExist
+from .leaderboard import PageCache
+from .notes import NoteStore
+from .reconcile import RoleReconciler
+from .reconcile import apply as apply_roles
+from .reconcile import plan as role_plan
+from .transfer import FORMATS, detect_format, export_rows, iter_lines, iter_row_chunks
 from .utils import *
 
 
@@ -30,6 +37,12 @@ class DonationLogging(commands.Cog):
     def __init__(self, bot: Red):
         self.bot = bot
         self.cache: DonationManager = None
+        self.digest = LogDigest()
+        self.reconciler = RoleReconciler(self)
+        self._lb_pages = PageCache()
+        self._resume_task: Optional[asyncio.Task] = None
+        # guild id -> (log channel, digest delay)
+        self._log_settings: Dict[int, Tuple[Optional[discord.TextChannel], int]] = {}
         self.config = Config.get_conf(None, 123_6969_420, True, "DonationLogging")
 
         default_guild = {
@@ -38,11 +51,14 @@ class DonationLogging(commands.Cog):
             "autoadd": False,
             "autoremove": False,
             "setup": False,
+            "digest": 0,
+            "reconcile": None,
         }
 
         self.config.register_global(migrated=False)
         self.config.register_guild(**default_guild)
         self.config.register_member(notes={})
+        self.notes = NoteStore(self.config)
 
         self.conv = MoniConverter().convert  # api for giveaway cog.
 
@@ -51,6 +67,9 @@ class DonationLogging(commands.Cog):
         s = cls(bot)
 
         s.cache = await DonationManager.initialize(bot)
+        await s.notes.load()
+        s.cache.register_flushable(s.notes)
+        s._resume_task = asyncio.create_task(s.reconciler.resume_all())
 
         return s
 
@@ -65,7 +84,58 @@ class DonationLogging(commands.Cog):
         return "\n".join(text)
 
     def cog_unload(self):
-        asyncio.create_task(self.cache._back_to_config())
+        asyncio.create_task(self.cache.close())
+        asyncio.create_task(self.digest.close())
+        if self._resume_task:
+            self._resume_task.cancel()
+        self.reconciler.stop()
+
+    async def get_log_settings(
+        self, guild: discord.Guild
+    ) -> Tuple[Optional[discord.TextChannel], int]:
+        """
+        The guild's log channel and digest delay, resolved once and cached until changed."""
+        if (settings := self._log_settings.get(guild.id)) is not None:
+            return settings
+
+        data = await self.config.guild(guild).all()
+        channel = None
+        if (chanid := data["logchannel"]) and chanid != "none":
+            if not (channel := guild.get_channel(int(chanid))):
+                try:
+                    channel = await self.bot.fetch_channel(int(chanid))
+                except (discord.NotFound, discord.HTTPException):
+                    channel = None
+
+        self._log_settings[guild.id] = settings = (channel, data["digest"])
+        return settings
+
+    def invalidate_log_settings(self, guild_id: int):
+        self._log_settings.pop(guild_id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        if (settings := self._log_settings.get(channel.guild.id)) and settings[0] == channel:
+            self.invalidate_log_settings(channel.guild.id)
+
+    async def send_log(self, ctx, embed: discord.Embed, line: str, role: str = None):
+        """
+        Send a donation log to the guild's log channel, or add it to the digest if enabled."""
+        role = role or ""
+        channel, digest = await self.get_log_settings(ctx.guild)
+        if channel and digest:
+            self.digest.add(channel, line + (f"\n> {role}" if role else ""), digest)
+            await ctx.tick()
+
+        elif channel:
+            await channel.send(role, embed=embed)
+            await ctx.tick()
+
+        elif (await self.config.guild(ctx.guild).logchannel()) not in (None, "none"):
+            await ctx.send(role + "\n Couldn't find the logging channel.", embed=embed)
+
+        else:
+            await ctx.send(role, embed=embed)
 
     async def get_old_data(self, guild: discord.Guild):
         all_members = await self.config.all_members(guild)
@@ -78,7 +148,8 @@ class DonationLogging(commands.Cog):
     async def red_delete_data_for_user(self, *, requester, user_id: int):
         if requester not in ("discord_deleted_user", "user"):
             return
-        self.cache.delete_all_user_data(user_id)
+        self.notes.remove_user(user_id)
+        await self.cache.delete_all_user_data(user_id)
 
     async def GetMessage(self, ctx: commands.Context, contentOne, contentTwo, timeout=100):
         embed = discord.Embed(
@@ -117,7 +188,8 @@ class DonationLogging(commands.Cog):
 
         This is a one time command per guild.
 
-        Alternatively you can use the `[p]donoset managers` and `[p]donoset logchannel` commands."""
+        Alternatively you can use the `[p]donoset managers` and `[p]donoset logchannel` commands.
+        """
         if await self.config.guild(ctx.guild).setup():
             return await ctx.send("This setup is a one time process only.")
         await ctx.send(
@@ -246,10 +318,11 @@ class DonationLogging(commands.Cog):
             return await ctx.send("Request timed out.")
 
         if not pred.result:
-            await self.category_remove(ctx, bank.name)
+            await self.category_remove(ctx, bank)
             return await ctx.send("Aight, retry the command and do it correctly this time.")
 
         await self.config.guild(ctx.guild).logchannel.set(channel.id if channel else None)
+        self.invalidate_log_settings(ctx.guild.id)
         await self.config.guild(ctx.guild).managers.set([role.id for role in roles])
         await self.config.guild(ctx.guild).setup.set(True)
         if pairs:
@@ -274,7 +347,7 @@ class DonationLogging(commands.Cog):
                 )  # nah we wont actually do it :P
 
             else:
-                bank._data.update(old_data)
+                bank.update_users(old_data, donation=False)  # not new donations.
                 await ctx.send(
                     "Updated new category with old data :D You can now continue logging donations normally."
                 )
@@ -350,12 +423,14 @@ class DonationLogging(commands.Cog):
 
         For admins, if you want to check other's donations, use `[p]dono check`"""
         if category:
-            donos = category.get_user(ctx.author.id).donations
+            donos = category.get_donations(ctx.author.id)
             emoji = category.emoji
+            rank = category.get_rank(ctx.author.id)
 
             embed = discord.Embed(
                 title=f"Your donations in **__{ctx.guild.name}__** for **__{category.name}__**",
-                description=f"Donated: {emoji} *{humanize_number(donos)}*",
+                description=f"Donated: {emoji} *{humanize_number(donos)}*"
+                + (f"\nRank: **#{humanize_number(rank)}**" if rank else ""),
                 color=await ctx.embed_color(),
             )
 
@@ -363,11 +438,11 @@ class DonationLogging(commands.Cog):
             banks = await self.cache.get_all_dono_banks(ctx.guild.id)
             embed = discord.Embed(
                 title=f"All your donations in **__{ctx.guild.name}__**",
-                description=f"Total amount donated overall: {humanize_number(sum([bank.get_user(ctx.author.id).donations for bank in banks]))}",
+                description=f"Total amount donated overall: {humanize_number(self.cache.get_user_total(ctx.guild.id, ctx.author.id))}",
                 color=await ctx.embed_color(),
             )
             for bank in banks:
-                donations = bank.get_user(ctx.author.id).donations
+                donations = bank.get_donations(ctx.author.id)
                 embed.add_field(
                     name=f"*{bank.name.title()}*",
                     value=f"Donated: {bank.emoji} {humanize_number(donations)}",
@@ -401,46 +476,133 @@ class DonationLogging(commands.Cog):
             text=f"Command executed by: {ctx.author.display_name}", icon_url=ctx.guild.icon_url
         )
 
-        chanid = await self.config.guild(ctx.guild).logchannel()
-
-        if chanid and chanid != "none":
-            try:
-                log = await self.bot.fetch_channel(int(chanid))
-            except (discord.NotFound, discord.HTTPException):
-                log = None
-            if log:
-                await log.send(role, embed=embed)
-            else:
-                await ctx.send(role + "\n Couldn't find the logging channel.", embed=embed)
-            await ctx.tick()
-
-        elif not chanid:
-            await ctx.send(role, embed=embed)
+        line = (
+            f"{'+' if action.lower() == 'add' else '-'} {emoji} {humanize_number(amount)} "
+            f"{user.mention} in **{bank.name}** (total {emoji} {humanize_number(donos)}) "
+            f"by {ctx.author.mention} [jump]({ctx.message.jump_url})"
+            + (f"\n> Note: {note}" if note else "")
+        )
+        await self.send_log(ctx, embed, line, role)
 
     async def add_note(self, member, message, flag={}, category: DonoBank = None):
         if note := flag.get("note"):
             data = {
                 "content": note,
+                "guild_id": message.guild.id,
                 "message_id": message.id,
                 "channel_id": message.channel.id,
                 "author": message.author.id,
                 "at": int(time.time()),
                 "category": category.name,
             }
-            async with self.config.member(member).notes() as notes:
-                if not notes:
-                    notes[1] = data
-
-                else:
-                    notes[len(notes) + 1] = data
+            self.notes.add(member.guild.id, member.id, data)
 
             return data["content"]
 
         return
 
+    async def default_category(self, ctx) -> Optional[DonoBank]:
+        """
+        The guild's default category, for commands where the category is optional.
+
+        Lets the user know and returns None if the guild doesn't have one."""
+        try:
+            return await self.cache.get_default_category(ctx.guild.id)
+        except CategoryDoesNotExist:
+            await ctx.send(
+                "There's no default category set for this server. Pass a category or set a "
+                f"default with `{ctx.prefix}donoset category default <category>`."
+            )
+
     async def get_member_notes(self, member: discord.Member):
-        async with self.config.member(member).notes() as notes:
-            return notes
+        return self.notes.get_all(member.guild.id, member.id)
+
+    async def apply_batch(
+        self,
+        entries: Iterable[Tuple[int, Optional[str], int, int, Optional[str]]],
+        *,
+        actor: Optional[int] = None,
+        reason: str = "Batch donation update",
+    ) -> Dict[Tuple[int, str, int], int]:
+        """
+        Apply many donation changes at once, for other cogs.
+
+        Each entry is `(guild_id, category, user_id, delta, note)`. `category` can be None to
+        use the guild's default category and `note` can be None. Positive deltas are added and
+        negative ones removed, a balance never goes below 0.
+
+        Every category is checked before anything is changed, so an unknown category, or a None
+        one in a guild without a default, raises `CategoryDoesNotExist` without applying any
+        of the batch. Roles are synced once per user and each guild gets a single summary
+        in its log channel.
+
+        Returns the new balance for every `(guild_id, category name, user_id)` touched."""
+        actor = actor or self.bot.user.id
+        batches: Dict[DonoBank, List[Tuple[int, int, Optional[str]]]] = {}
+        for guild_id, category, user_id, delta, note in entries:
+            bank = (
+                await self.cache.get_existing_dono_bank(category, guild_id)
+                if category
+                else await self.cache.get_default_category(guild_id)
+            )
+            batches.setdefault(bank, []).append((int(user_id), int(delta), note))
+
+        balances: Dict[Tuple[int, str, int], int] = {}
+        summaries: Dict[int, List[str]] = {}
+        for bank, changes in batches.items():
+            guild = self.bot.get_guild(bank.guild_id)
+            added = removed = 0
+            async with bank.lock:
+                for user_id, delta, note in changes:
+                    user = bank.get_user(user_id)
+                    before = user.donations
+                    after = user.add(delta, actor) if delta >= 0 else user.remove(-delta, actor)
+                    balances[(bank.guild_id, bank.name, user_id)] = after
+                    added += max(after - before, 0)
+                    removed += max(before - after, 0)
+                    if note:
+                        self.notes.add(
+                            bank.guild_id,
+                            user_id,
+                            {
+                                "content": note,
+                                "guild_id": bank.guild_id,
+                                "message_id": None,
+                                "channel_id": None,
+                                "author": actor,
+                                "at": int(time.time()),
+                                "category": bank.name,
+                            },
+                        )
+
+                if guild:
+                    await self.sync_roles(
+                        guild, bank, {user_id for user_id, _, _ in changes}, reason
+                    )
+
+            summaries.setdefault(bank.guild_id, []).append(
+                f"{bank.emoji} **{bank.name}**: {humanize_number(len({c[0] for c in changes}))} "
+                f"members, +{humanize_number(added)} / -{humanize_number(removed)}"
+            )
+
+        for guild_id, lines in summaries.items():
+            if not (guild := self.bot.get_guild(guild_id)):
+                continue
+            channel, digest = await self.get_log_settings(guild)
+            if not channel:
+                continue
+            line = f"{reason} by <@{actor}>\n" + "\n".join(lines)
+            if digest:
+                self.digest.add(channel, line, digest)
+                continue
+            embed = discord.Embed(title=reason, description="\n".join(lines), color=0x303036)
+            embed.set_footer(text=f"Applied by {guild.get_member(actor) or actor}")
+            try:
+                await channel.send(embed=embed)
+            except discord.HTTPException:
+                pass
+
+        return balances
 
     @dono.command(name="add", usage="[category] <amount> [user] [--note]")
     @is_dmgr()
@@ -468,17 +630,17 @@ class DonationLogging(commands.Cog):
         if not amount:
             return await ctx.send_help()
 
-        category: DonoBank = category or await self.cache.get_default_category(ctx.guild.id)
+        if not (category := category or await self.default_category(ctx)):
+            return
 
-        u = category.get_user(user.id)
+        async with category.lock:
+            donos = category.get_user(user.id).add(amount, ctx.author.id)
 
-        donos = u.add(amount)
+            if not await self.config.guild(ctx.guild).autoadd():
+                role = f"Auto role adding is disabled for this server. Enable with `{ctx.prefix}donoset autorole add true`."
+            else:
+                role = await category.addroles(ctx, user)
         note = await self.add_note(user, ctx.message, flag if flag else {}, category)
-
-        if not await self.config.guild(ctx.guild).autoadd():
-            role = f"Auto role adding is disabled for this server. Enable with `{ctx.prefix}donoset autorole add true`."
-        else:
-            role = await category.addroles(ctx, user)
         await self.dono_log(ctx, "add", user, amount, donos, category, role, note)
 
     @dono.command(name="remove", usage="[category] <amount> [user] [--note]")
@@ -504,15 +666,16 @@ class DonationLogging(commands.Cog):
         if not amount:
             return await ctx.send_help()
 
-        category: DonoBank = category or await self.cache.get_default_category(ctx.guild.id)
+        if not (category := category or await self.default_category(ctx)):
+            return
 
-        u = category.get_user(user.id)
-        donation = u.remove(amount)
+        async with category.lock:
+            donation = category.get_user(user.id).remove(amount, ctx.author.id)
 
-        if not await self.config.guild(ctx.guild).autoremove():
-            role = f"Auto role removing is disabled for this server. Enable with `{ctx.prefix}donoset autorole remove true`."
-        else:
-            role = await category.removeroles(ctx, user)
+            if not await self.config.guild(ctx.guild).autoremove():
+                role = f"Auto role removing is disabled for this server. Enable with `{ctx.prefix}donoset autorole remove true`."
+            else:
+                role = await category.removeroles(ctx, user)
         note = await self.add_note(user, ctx.message, flag if flag else {}, category)
 
         await self.dono_log(ctx, "remove", user, amount, donation, category, role, note)
@@ -548,13 +711,15 @@ class DonationLogging(commands.Cog):
                 return await ctx.send("No response, aborting.")
 
             if pred.result:
-                await self.cache.delete_all_user_data(user.id, ctx.guild.id)
+                await self.cache.delete_all_user_data(user.id, ctx.guild.id, ctx.author.id)
                 return await ctx.send(f"{user.mention}'s donations have been reset.")
 
             else:
                 return await ctx.send("Alright!")
 
-        category.remove_user(user.id)
+        async with category.lock:
+            category.remove_user(user.id, ctx.author.id)
+            role = await category.removeroles(ctx, user)
         emoji = category.emoji
 
         embed = discord.Embed(
@@ -570,16 +735,11 @@ class DonationLogging(commands.Cog):
             text=f"Command executed by: {ctx.author.display_name}", icon_url=ctx.guild.icon_url
         )
 
-        chanid = await self.config.guild(ctx.guild).logchannel()
-
-        role = await category.removeroles(ctx, user)
-
-        if chanid and chanid != "none":
-            channel = await self.bot.fetch_channel(chanid)
-            await ctx.tick()
-            await channel.send(role, embed=embed)
-        else:
-            await ctx.send(role, embed=embed)
+        line = (
+            f"{emoji} Reset {user.mention}'s donations in **{category.name}** "
+            f"by {ctx.author.mention} [jump]({ctx.message.jump_url})"
+        )
+        await self.send_log(ctx, embed, line, role)
 
     @dono.command(name="notes", aliases=["note"])
     @commands.guild_only()
@@ -591,14 +751,26 @@ class DonationLogging(commands.Cog):
 
         Theses are set with the `--note` flag in either
         `[p]dono add` or `[p]dono remove` commands."""
-        EmbedField = namedtuple("EmbedField", "name value inline")
         member = member or ctx.author
         notes = await self.get_member_notes(member)
         if not notes:
             return await ctx.send(f"*{member}* has no notes!")
+
+        def link(note, text):
+            # notes added through `apply_batch` don't have a message to jump to.
+            if not note.get("message_id"):
+                return text
+            url = jump_url(
+                note.get("guild_id", ctx.guild.id), note["channel_id"], note["message_id"]
+            )
+            return f"[{text}]({url})"
+
         if number != None:
-            note = notes.get(str(number))
-            print(number)
+            note = (
+                self.notes.get(ctx.guild.id, member.id, int(number))
+                if str(number).isdigit()
+                else None
+            )
             if not note:
                 return await ctx.send(
                     f"That doesn't seem to a valid note! **{member}** only has *{len(notes)}* notes."
@@ -611,7 +783,7 @@ class DonationLogging(commands.Cog):
             )
             embed.add_field(
                 name=f"**Note Number {number}**",
-                value=f"*[{note['content']}]({(await (self.bot.get_channel(note['channel_id'])).fetch_message(int(note['message_id']))).jump_url})*",
+                value=f"*{link(note, note['content'])}*",
                 inline=False,
             )
             if cat := note.get("category"):
@@ -623,40 +795,56 @@ class DonationLogging(commands.Cog):
 
         # Thanks to epic guy for this suggestion :D
 
-        fields = []
-        embeds = []
-        emb = {
-            "embed": {"title": f"{member.name.capitalize()}'s Notes!", "description": ""},
-            "footer": {"text": "", "icon_url": ctx.author.avatar_url},
-            "fields": [],
-        }
-        for key, value in notes.items():
-            field = EmbedField(
-                f"**Note Number {key}.**",
-                f"*[{value['content'][:20] if len(value['content']) > 20 else value['content']}]({(await(self.bot.get_channel(value['channel_id'])).fetch_message(int(value['message_id']))).jump_url})*",
-                False,
+        keys = sorted(notes)
+        per_page = 10
+        page_count = -(-len(keys) // per_page)
+
+        def render(page: int) -> discord.Embed:
+            embed = discord.Embed(title=f"{member.name.capitalize()}'s Notes!", color=0x303036)
+            for key in keys[page * per_page : (page + 1) * per_page]:
+                note = notes[key]
+                content = note["content"][:20] if len(note["content"]) > 20 else note["content"]
+                embed.add_field(
+                    name=f"**Note Number {key}.**",
+                    value=f"*{link(note, content)}*",
+                    inline=False,
+                )
+            embed.set_footer(
+                text=f"Use `{ctx.prefix}notes {member} [number]` to look at a specific note.\nPage {page + 1}/{page_count}.",
+                icon_url=ctx.author.avatar_url,
             )
-            fields.append(field)
+            return embed
 
-        fieldgroups = RedHelpFormatter.group_embed_fields(fields, 200)
-        page_len = len(fieldgroups)
+        return await lazy_menu(ctx, render, page_count)
 
-        for i, group in enumerate(fieldgroups, 1):
-            embed = discord.Embed(color=0x303036, **emb["embed"])
-            emb["footer"][
-                "text"
-            ] = f"Use `{ctx.prefix}notes {member} [number]` to look at a specific note.\nPage {i}/{page_len}."
-            embed.set_footer(**emb["footer"])
+    @dono.command(name="categorynotes", aliases=["catnotes"])
+    @commands.guild_only()
+    @is_dmgr()
+    @setup_done()
+    async def category_notes(self, ctx, category: CategoryConverter):
+        """
+        See every donation note taken in a category.
 
-            for field in group:
-                embed.add_field(**field._asdict())
+        Use `[p]dono notes <member> <number>` to look at one of them in full."""
+        notes = self.notes.for_category(ctx.guild.id, category.name)
+        if not notes:
+            return await ctx.send(f"No notes were taken in **{category.name}**!")
 
-            embeds.append(embed)
+        per_page = 10
+        page_count = -(-len(notes) // per_page)
 
-        if len(embeds) > 1:
-            return await menu(ctx, embeds, DEFAULT_CONTROLS)
-        else:
-            return await ctx.send(embed=embeds[0])
+        def render(page: int) -> discord.Embed:
+            embed = discord.Embed(title=f"Notes taken in {category.name.title()}", color=0x303036)
+            for member_id, number, note in notes[page * per_page : (page + 1) * per_page]:
+                member = ctx.guild.get_member(member_id) or member_id
+                content = note["content"][:20] if len(note["content"]) > 20 else note["content"]
+                embed.add_field(
+                    name=f"**{member}, Note Number {number}.**", value=f"*{content}*", inline=False
+                )
+            embed.set_footer(text=f"Page {page + 1}/{page_count}.", icon_url=ctx.author.avatar_url)
+            return embed
+
+        return await lazy_menu(ctx, render, page_count)
 
     @dono.command(name="check")
     @commands.guild_only()
@@ -676,11 +864,11 @@ class DonationLogging(commands.Cog):
             banks = await self.cache.get_all_dono_banks(ctx.guild.id)
             embed = discord.Embed(
                 title=f"All of {user}'s donations in **__{ctx.guild.name}__**",
-                description=f"Total amount donated overall: {humanize_number(sum([bank.get_user(user.id).donations for bank in banks]))}",
+                description=f"Total amount donated overall: {humanize_number(self.cache.get_user_total(ctx.guild.id, user.id))}",
                 color=await ctx.embed_color(),
             )
             for bank in banks:
-                donations = bank.get_user(user.id).donations
+                donations = bank.get_donations(user.id)
                 embed.add_field(
                     name=f"*{bank.name.title()}*",
                     value=f"Donated: {bank.emoji} {humanize_number(donations)}",
@@ -689,9 +877,9 @@ class DonationLogging(commands.Cog):
 
             return await ctx.send(embed=embed)
 
-        donos = category.get_user(user.id).donations
+        donos = category.get_donations(user.id)
         emoji = category.emoji
-        notes = len(await self.get_member_notes(user))
+        notes = self.notes.count(ctx.guild.id, user.id)
 
         embed = discord.Embed(
             title=f"{user}'s donations in **__{ctx.guild.name}__**",
@@ -703,53 +891,478 @@ class DonationLogging(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    def leaderboard_pages(
+        self,
+        ctx,
+        key: tuple,
+        version: int,
+        count: int,
+        fetch: Callable[[int, int], List[Tuple[int, int]]],
+        title: str,
+        emoji: str,
+        empty: str,
+        footer: str,
+    ) -> Tuple[Callable[[int], discord.Embed], int]:
+        """
+        Build a page renderer for a leaderboard of `count` donors for `lazy_menu`.
+
+        `fetch(start, limit)` should return `(user_id, amount)` pairs for one page.
+        Rendered pages are cached under `key` until the ranking's `version` changes."""
+        per_page = 10
+        page_count = max(-(-count // per_page), 1)
+
+        def build(page: int) -> discord.Embed:
+            embed = discord.Embed(title=title, color=discord.Color.random())
+            start = page * per_page
+            rows = fetch(start, min(per_page, count - start))
+            for index, (user_id, amount) in enumerate(rows, start + 1):
+                embed.add_field(
+                    name=(
+                        f"{index}. **{u.display_name}**"
+                        if (u := ctx.guild.get_member(user_id))
+                        else f"{index}. **{user_id} (User not found in server)**"
+                    ),
+                    value=f"{emoji} {humanize_number(amount)}".strip(),
+                    inline=False,
+                )
+            if not rows:
+                embed.description = empty
+
+            embed.set_thumbnail(url=ctx.guild.icon_url)
+            embed.set_author(name=ctx.guild.name)
+            embed.set_footer(text=f"{footer}\nPage {page + 1}/{page_count}")
+            return embed
+
+        def render(page: int) -> discord.Embed:
+            return self._lb_pages.get(key + (ctx.prefix, page), version, lambda: build(page))
+
+        return render, page_count
+
     @dono.command(
         name="leaderboard",
         aliases=["lb", "topdonators"],
     )
     @commands.guild_only()
     @setup_done()
-    async def leaderboard(self, ctx, category: CategoryConverter, topnumber=5):
+    async def leaderboard(
+        self,
+        ctx,
+        category: CategoryConverter,
+        topnumber: Optional[int] = 5,
+        window: WindowConverter = None,
+    ):
         """
         See the top donators in the server.
 
         The category must be the name of a registered category. These can be seen with `[p]donoset category list`
-        Use the <topnumber> parameter to see the top `x` donators."""
-        data: List[DonoUser] = category.get_leaderboard()
+        Use the <topnumber> parameter to see the top `x` donators, 10 per page.
+        Use the [window] parameter to only count donations from a recent period,
+        like `7d`, `2w` or `month`."""
+        topnumber = max(topnumber or 5, 1)
+        ranking = category.ranking
+        if window:
+            # summing the windowed totals is the expensive part, so that gets cached too.
+            top = self._lb_pages.get(
+                ("window", ctx.guild.id, category.name, window, topnumber),
+                ranking.version,
+                lambda: self.cache.ledger.top(ctx.guild.id, category.name, window, topnumber),
+            )
+            fetch = lambda start, limit: top[start : start + limit]
+            count = len(top)
+        else:
+            fetch = lambda start, limit: list(ranking.top(limit, start))
+            count = min(topnumber, len(ranking))
+
+        render, page_count = self.leaderboard_pages(
+            ctx,
+            ("bank", ctx.guild.id, category.name, window, topnumber),
+            ranking.version,
+            count,
+            fetch,
+            f"Top {topnumber} donators for **__{category.name.title()}__**"
+            + (f" in the last {window} days" if window else ""),
+            category.emoji,
+            f"No donations have been made yet for **{category}**.",
+            f"For a higher top number, do `{ctx.prefix}dono lb {category.name} [amount]`",
+        )
+        await lazy_menu(ctx, render, page_count)
 
-        embed = discord.Embed(
-            title=f"Top {topnumber} donators for **__{category.name.title()}__**",
-            color=discord.Color.random(),
+    @dono.command(name="overall", aliases=["overalllb", "totallb"])
+    @commands.guild_only()
+    @setup_done()
+    async def overall_leaderboard(self, ctx, topnumber: int = 5):
+        """
+        See the top donators in the server across every category combined.
+
+        Use the <topnumber> parameter to see the top `x` donators, 10 per page."""
+        topnumber = max(topnumber, 1)
+        ranking = self.cache.get_totals(ctx.guild.id)
+        render, page_count = self.leaderboard_pages(
+            ctx,
+            ("overall", ctx.guild.id, topnumber),
+            ranking.version,
+            min(topnumber, len(ranking)),
+            lambda start, limit: list(ranking.top(limit, start)),
+            f"Top {topnumber} donators across all categories",
+            "",
+            "No donations have been made yet.",
+            f"For a higher top number, do `{ctx.prefix}dono overall [amount]`",
         )
-        emoji = category.emoji
+        await lazy_menu(ctx, render, page_count)
 
-        if data:
-            for index, user in enumerate(data, 1):
-                if user.donations != 0:
-                    embed.add_field(
-                        name=(
-                            f"{index}. **{u.display_name}**"
-                            if (u := user.user)
-                            else f"{index}. **{user.user_id} (User not found in server)**"
-                        ),
-                        value=f"{emoji} {humanize_number(user.donations)}",
-                        inline=False,
-                    )
+    @dono.command(name="stats")
+    @commands.guild_only()
+    @setup_done()
+    async def dono_stats(self, ctx, category: CategoryConverter = None):
+        """
+        See donation statistics for a category.
 
-                if (index) == topnumber:
-                    break
+        Shows the total, mean, median and percentiles of everyone's donations,
+        how evenly they're spread (the gini coefficient, 0 is perfectly even)
+        and how many donors reached each milestone.
+        If the category isn't provided, the default category is used."""
+        if not (category := category or await self.default_category(ctx)):
+            return
+        stats = analytics.bank_stats(category)
+        emoji = category.emoji
 
-        else:
+        embed = discord.Embed(
+            title=f"Donation stats for **__{category.name.title()}__**",
+            color=await ctx.embed_color(),
+        )
+        if not stats.donors:
             embed.description = f"No donations have been made yet for **{category}**."
+            return await ctx.send(embed=embed)
 
-        embed.set_thumbnail(url=ctx.guild.icon_url)
-        embed.set_author(name=ctx.guild.name)
-        embed.set_footer(
-            text=f"For a higher top number, do `{ctx.prefix}dono lb {category.name} [amount]`"
+        embed.add_field(name="Donors", value=humanize_number(stats.donors))
+        embed.add_field(name="Total", value=f"{emoji} {humanize_number(stats.total)}")
+        embed.add_field(name="Mean", value=f"{emoji} {humanize_number(round(stats.mean))}")
+        embed.add_field(name="Median", value=f"{emoji} {humanize_number(round(stats.median))}")
+        embed.add_field(
+            name="Percentiles",
+            value="\n".join(
+                f"{p}th: {emoji} {humanize_number(round(v))}" for p, v in stats.percentiles.items()
+            ),
         )
+        embed.add_field(name="Gini coefficient", value=f"{stats.gini:.3f}")
+        if stats.milestones:
+            embed.add_field(
+                name="Milestones reached",
+                value="\n".join(
+                    f"{emoji} {humanize_number(amount)}: {humanize_number(count)} donors"
+                    for amount, count in stats.milestones
+                ),
+                inline=False,
+            )
+
+        widest = max(count for _, _, count in stats.histogram)
+        histogram = "\n".join(
+            f"{humanize_number(low):>15} - {humanize_number(high - 1):<15} "
+            f"{'#' * round(20 * count / widest):<20} {humanize_number(count)}"
+            for low, high, count in stats.histogram
+        )
+        embed.add_field(name="Distribution", value=box(histogram), inline=False)
+        embed.set_footer(text=f"{ctx.guild.name}", icon_url=ctx.guild.icon_url)
 
         await ctx.send(embed=embed)
 
+    async def sync_roles(self, guild: discord.Guild, bank: DonoBank, user_ids, reason: str) -> int:
+        """
+        Bring the milestone roles of the given users in line with their balances.
+
+        Respects the guild's auto add/remove settings. Returns the number of members updated."""
+        if not bank.milestones:
+            return 0
+
+        settings = await self.config.guild(guild).all()
+        if not settings["autoadd"] and not settings["autoremove"]:
+            return 0
+
+        updated = 0
+        async for member, to_add, to_remove in role_plan(
+            guild, bank, user_ids, add=settings["autoadd"], remove=settings["autoremove"]
+        ):
+            try:
+                await apply_roles(member, to_add, to_remove, reason)
+            except discord.HTTPException:
+                continue
+            updated += 1
+
+        return updated
+
+    @dono.command(name="import")
+    @commands.guild_only()
+    @commands.has_guild_permissions(administrator=True)
+    @setup_done()
+    async def dono_import(self, ctx, category: CategoryConverter, mode: str = "set"):
+        """
+        Import donation balances for a category from an attached file.
+
+        The file can either be a csv file with `user_id,amount` rows
+        or a json lines file with `{"user_id": ..., "amount": ...}` objects.
+
+        <mode> is either `set` to overwrite balances or `add` to add to them."""
+        if mode.lower() not in ("set", "add"):
+            return await ctx.send("The mode needs to be either `set` or `add`.")
+
+        if not ctx.message.attachments:
+            return await ctx.send("You need to attach a csv or json lines file.")
+
+        attachment = ctx.message.attachments[0]
+        try:
+            fmt = detect_format(attachment.filename)
+        except ValueError as e:
+            return await ctx.send(str(e))
+
+        add = mode.lower() == "add"
+        applied = 0
+        bad = []
+        user_ids = set()
+        start = time.perf_counter()
+        async with ctx.typing():
+            try:
+                async for rows, errors in iter_row_chunks(iter_lines(attachment.url), fmt):
+                    # only the category is locked and only while a chunk is applied, so neither
+                    # the download nor the parsing hold up other commands or the flusher.
+                    async with category.lock:
+                        # a set import overwrites balances, only an add import is new donations.
+                        applied += category.bulk_update(
+                            rows, add=add, actor=ctx.author.id, donation=add
+                        )
+                    user_ids.update(user_id for user_id, _ in rows)
+                    bad.extend(errors)
+                    await asyncio.sleep(0)
+            except Exception as e:
+                await ctx.send(
+                    f"Reading the file failed after {humanize_number(applied)} rows: {e}"
+                )
+
+            await self.cache.flush()
+            elapsed = time.perf_counter() - start
+            synced = await self.sync_roles(
+                ctx.guild,
+                category,
+                user_ids,
+                f"Donation role sync for {category.name}, requested by {ctx.author}",
+            )
+
+        message = (
+            f"Imported {humanize_number(applied)} rows into **{category.name}** "
+            f"in {elapsed:.2f} seconds ({humanize_number(int(applied / max(elapsed, 1e-6)))} rows/s).\n"
+            f"Updated the roles of {humanize_number(synced)} members."
+        )
+        if bad:
+            message += (
+                f"\nSkipped {humanize_number(len(bad))} invalid rows, on lines: "
+                f"{humanize_list([str(i) for i in bad[:10]])}{'...' if len(bad) > 10 else ''}"
+            )
+        await ctx.send(message)
+
+    @dono.command(name="export")
+    @commands.guild_only()
+    @is_dmgr()
+    @setup_done()
+    async def dono_export(self, ctx, category: CategoryConverter, fmt: str = "csv"):
+        """
+        Export the donation balances of a category to a file.
+
+        <fmt> can either be `csv` or `jsonl`."""
+        if (fmt := fmt.lower()) not in FORMATS:
+            return await ctx.send(f"The format needs to be one of {humanize_list(FORMATS)}.")
+
+        rows = [(user_id, amount) for user_id, amount in category._data.items() if amount]
+        async with ctx.typing():
+            fp = await export_rows(rows, fmt)
+
+        if fp.getbuffer().nbytes > ctx.guild.filesize_limit:
+            return await ctx.send("The export is too big to be uploaded here.")
+
+        await ctx.send(
+            f"Exported {humanize_number(len(rows))} donors from **{category.name}**.",
+            file=discord.File(fp, filename=f"{category.name}-donations.{fmt}"),
+        )
+
+    @dono.group(name="snapshot")
+    @commands.guild_only()
+    @commands.has_guild_permissions(administrator=True)
+    @setup_done()
+    async def dono_snapshot(self, ctx):
+        """
+        Back up and roll back this server's donation data.
+
+        Snapshots hold every category's settings and balances and everyone's notes,
+        take one before bulk changes like removing categories or resetting balances."""
+
+    @dono_snapshot.command(name="create")
+    async def snapshot_create(self, ctx, all_servers: bool = False):
+        """
+        Take a snapshot of this server's donation data.
+
+        Pass `True` to snapshot every server instead, this can only be done by the bot owner."""
+        if all_servers and not await ctx.bot.is_owner(ctx.author):
+            return await ctx.send("Only the bot owner can snapshot every server.")
+
+        name = f"{'all' if all_servers else ctx.guild.id}-{time.strftime('%Y%m%d-%H%M%S')}"
+        guild_ids = list(await self.cache.config.all_guilds()) if all_servers else [ctx.guild.id]
+        path = snapshot.snapshot_file(name)
+        async with ctx.typing():
+            count = await snapshot.create(self.cache, self.notes, path, guild_ids)
+
+        await ctx.send(
+            f"Saved snapshot `{name}` with {humanize_number(count)} records "
+            f"({humanize_number(path.stat().st_size // 1024)} KiB).\n"
+            f"Restore it with `{ctx.prefix}dono snapshot restore {name}`."
+        )
+
+    async def _get_snapshot(self, ctx, name: str):
+        try:
+            path = snapshot.snapshot_file(name)
+        except ValueError as e:
+            await ctx.send(str(e))
+            return None
+
+        if not name.startswith(f"{ctx.guild.id}-") and not (
+            name.startswith("all-") and await ctx.bot.is_owner(ctx.author)
+        ):
+            await ctx.send("That snapshot doesn't belong to this server.")
+            return None
+
+        if not path.exists():
+            await ctx.send(f"There's no snapshot named `{name}`.")
+            return None
+
+        return path
+
+    @dono_snapshot.command(name="list")
+    async def snapshot_list(self, ctx):
+        """
+        List the snapshots of this server."""
+        prefixes = [f"{ctx.guild.id}-"] + (["all-"] if await ctx.bot.is_owner(ctx.author) else [])
+        files = sorted(
+            (
+                file
+                for file in snapshot.snapshot_dir().glob("*.jsonl.gz")
+                if file.name.startswith(tuple(prefixes))
+            ),
+            key=lambda f: f.stat().st_mtime,
+            reverse=True,
+        )
+        if not files:
+            return await ctx.send(
+                f"There are no snapshots yet. Take one with `{ctx.prefix}dono snapshot create`."
+            )
+
+        text = "\n".join(
+            f"{file.name[: -len('.jsonl.gz')]}  {humanize_number(file.stat().st_size // 1024)} KiB"
+            for file in files
+        )
+        for page in pagify(text):
+            await ctx.send(box(page))
+
+    @dono_snapshot.command(name="restore")
+    async def snapshot_restore(self, ctx, name: str):
+        """
+        Restore this server's donation data from a snapshot.
+
+        Every category in the snapshot gets its settings and balances replaced with the
+        snapshot's, categories added after it are left alone.
+        Members' roles aren't changed, use `[p]donoset reconcile` afterwards for that."""
+        if not (path := await self._get_snapshot(ctx, name)):
+            return
+
+        await ctx.send(
+            f"This will overwrite the donations of every category in `{name}`. "
+            "Are you sure? Reply with `yes`/`no`."
+        )
+        pred = MessagePredicate.yes_or_no(ctx)
+        try:
+            await ctx.bot.wait_for("message", check=pred, timeout=30)
+        except asyncio.TimeoutError:
+            return await ctx.send("No response, aborting.")
+        if not pred.result:
+            return await ctx.send("Alright!")
+
+        async with ctx.typing():
+            try:
+                restored = await snapshot.restore(
+                    self.cache, self.notes, path, ctx.guild.id, ctx.author.id
+                )
+            except ValueError as e:
+                return await ctx.send(str(e))
+
+        await ctx.send(
+            f"Restored {humanize_number(restored['categories'])} categories, "
+            f"{humanize_number(restored['balances'])} balances and the notes of "
+            f"{humanize_number(restored['notes'])} members from `{name}`."
+        )
+
+    @dono_snapshot.command(name="diff")
+    async def snapshot_diff(self, ctx, old: str, new: str):
+        """
+        See how balances changed between two snapshots."""
+        if not (old_path := await self._get_snapshot(ctx, old)) or not (
+            new_path := await self._get_snapshot(ctx, new)
+        ):
+            return
+
+        async with ctx.typing():
+            try:
+                changes = await snapshot.diff(old_path, new_path)
+            except ValueError as e:
+                return await ctx.send(str(e))
+
+        if not changes:
+            return await ctx.send("No balances changed between these snapshots.")
+
+        text = "\n".join(
+            f"{'' if guild_id == ctx.guild.id else f'[{guild_id}] '}{category}: "
+            f"+{c['added']} new, -{c['removed']} gone, {c['changed']} changed, "
+            f"net {'+' if c['delta'] >= 0 else ''}{humanize_number(c['delta'])}"
+            for (guild_id, category), c in sorted(changes.items())
+        )
+        for page in pagify(text):
+            await ctx.send(box(page))
+
+    @dono.command(name="persistence", hidden=True)
+    @commands.is_owner()
+    async def persistence(self, ctx, flush_interval: int = None):
+        """
+        See how far behind donation saving is or change how often it happens.
+
+        <flush_interval> is the number of seconds between saves."""
+        if flush_interval is not None:
+            if flush_interval < 1:
+                return await ctx.send("The flush interval needs to be at least 1 second.")
+            await self.cache.config.flush_interval.set(flush_interval)
+            self.cache.flush_interval = flush_interval
+            # restart the wait so the new interval kicks in right away.
+            self.cache._flush_needed.set()
+            return await ctx.send(f"Donations will now be saved every {flush_interval} seconds.")
+
+        stats = self.cache.stats
+        oldest = self.cache.oldest_pending
+        embed = discord.Embed(title="Donation persistence", color=await ctx.embed_color())
+        embed.add_field(name="Flush interval:", value=f"{self.cache.flush_interval} seconds")
+        embed.add_field(name="Pending writes:", value=humanize_number(self.cache.pending_writes))
+        embed.add_field(
+            name="Pending ledger records:", value=humanize_number(self.cache.ledger.pending)
+        )
+        embed.add_field(
+            name="Members with unsaved notes:", value=humanize_number(self.notes.pending)
+        )
+        embed.add_field(name="Dirty banks:", value=humanize_number(len(self.cache._dirty)))
+        embed.add_field(
+            name="Oldest pending change:",
+            value=f"{oldest:.1f} seconds ago" if oldest is not None else "None",
+        )
+        embed.add_field(name="Flushes:", value=humanize_number(stats["flushes"]))
+        embed.add_field(name="Failed bank writes:", value=humanize_number(stats["failures"]))
+        embed.add_field(
+            name="Last flush:",
+            value=f"<t:{int(stats['last_flush'])}:R>" if stats["last_flush"] else "Never",
+        )
+        await ctx.send(embed=embed)
+
     @commands.group(name="donoset", invoke_without_command=True)
     @commands.mod_or_permissions(administrator=True)
     @setup_done()
@@ -859,12 +1472,7 @@ class DonationLogging(commands.Cog):
         if not categories:
             return await ctx.send("You need to specify at least one category.")
         for category in categories:
-            self.cache._CACHE.remove(category)
-            await self.cache.config.custom("guild_category", ctx.guild.id, category.name).clear()
-
-        async with self.cache.config.guild(ctx.guild).categories() as cats:
-            for category in categories:
-                del cats[category.name]
+            await self.cache.delete_bank(category)
 
         await ctx.send("Given categories have been deleted!")
 
@@ -877,12 +1485,12 @@ class DonationLogging(commands.Cog):
         guild = ctx.guild
         categories = await self.cache.config.guild(guild).categories()
         categories = {category: data["emoji"] for category, data in categories.items()}
+        default = await self.cache.get_default_category_name(ctx.guild.id)
         embed = discord.Embed(
             title=f"Registered currency categories in **__{ctx.guild.name}__**",
             description="\n".join(
                 [
-                    f"{index}: {emoji} {category} "
-                    f"{'(default)' if category == await self.cache.get_default_category(ctx.guild.id) else ''}"
+                    f"{index}: {emoji} {category} " f"{'(default)' if category == default else ''}"
                     for index, (category, emoji) in enumerate(categories.items(), 1)
                 ]
             ),
@@ -904,7 +1512,7 @@ class DonationLogging(commands.Cog):
         """
         if not category:
             return await ctx.send(
-                f"The current default category is: {await self.cache.get_default_category(ctx.guild.id)}"
+                f"The current default category is: {await self.cache.get_default_category_name(ctx.guild.id) or 'not set'}"
             )
         await self.cache.set_default_category(ctx.guild.id, category.name)
         await ctx.send(f"Default category for this server has been set to {category.name}")
@@ -920,37 +1528,70 @@ class DonationLogging(commands.Cog):
         `amount` `,` `multiple roles separated with a colon(:)`
         For example:
             `10000,someroleid:onemoreroleid 15k,@rolemention 20e4,arolename`"""
-        data = await self.cache.config.guild(ctx.guild).categories()
-        cop = data.copy()
-        cat_roles = cop.get(category.name)
-        cat_roles.pop("emoji")
-
-        _pairs = {amount: [role.id for role in roles] for amount, roles in pairs.items()}
-        for k, v in _pairs.items():
-            k = str(k)
-            r = cat_roles.get(k)
-            if not r:
-                cat_roles.update({k: v})
-
-            else:
-                for rid in v:
-                    if rid in r:
-                        continue
-                    r.append(rid)
-
-        async with self.cache.config.guild(ctx.guild).categories() as cats:
-            cats[category.name].update(cat_roles)
+        await category.setroles(pairs, merge=True)
 
         embed = discord.Embed(
             title=f"Updated autoroles for {category.name.title()}!", color=await ctx.embed_color()
         )
         rolelist = ""
-        for key, value in cat_roles.items():
-            rolelist += f"{humanize_list([ctx.guild.get_role(role).name for role in value])} for {humanize_number(key)} donations\n"
+        for key, value in category.milestones:
+            rolelist += f"{humanize_list([r.name for role in value if (r := ctx.guild.get_role(role))])} for {humanize_number(key)} donations\n"
         embed.description = f"`{rolelist}`"
 
         await ctx.send(embed=embed)
 
+    @donoset.group(name="reconcile", aliases=["syncroles"], invoke_without_command=True)
+    @commands.mod_or_permissions(administrator=True)
+    @setup_done()
+    async def reconcile(self, ctx, category: CategoryConverter):
+        """
+        Re-check everyone's donation roles for a category against their balance.
+
+        Useful after changing the milestones with `[p]donoset addroles`.
+        This runs in the background and can take a while on big servers,
+        check on it with `[p]donoset reconcile status`.
+        Roles are only added/removed if auto adding/removing is enabled."""
+        if self.reconciler.running(ctx.guild.id):
+            return await ctx.send(
+                f"A role sync is already running here. See `{ctx.prefix}donoset reconcile status`."
+            )
+
+        if not category.milestones:
+            return await ctx.send(f"**{category.name}** doesn't have any autoroles set up.")
+
+        await self.reconciler.start(ctx.guild, category, ctx.channel.id)
+        await ctx.send(
+            f"Started syncing donation roles for **{category.name}**. "
+            "I'll send a message here once it's done."
+        )
+
+    @reconcile.command(name="status")
+    async def reconcile_status(self, ctx):
+        """
+        See how far along the running role sync is."""
+        if not (state := self.reconciler.progress.get(ctx.guild.id)):
+            return await ctx.send("There's no role sync running right now.")
+
+        total = state["total"]
+        await ctx.send(
+            f"Syncing roles for **{state['category']}**: "
+            + (
+                f"{humanize_number(state['done'])}/{humanize_number(total)} members checked, "
+                if total is not None
+                else "still working out what needs changing, "
+            )
+            + f"{humanize_number(state['changed'])} updated, {humanize_number(state['failed'])} failed. "
+            f"Started <t:{int(state['started'])}:R>."
+        )
+
+    @reconcile.command(name="cancel", aliases=["stop"])
+    async def reconcile_cancel(self, ctx):
+        """
+        Stop the running role sync."""
+        if await self.reconciler.cancel(ctx.guild):
+            return await ctx.send("Stopped the role sync.")
+        await ctx.send("There's no role sync running right now.")
+
     @donoset.command(name="managers")
     @commands.mod_or_permissions(administrator=True)
     @setup_done()
@@ -990,12 +1631,33 @@ class DonationLogging(commands.Cog):
         """
 
         await self.config.guild(ctx.guild).logchannel.set(None if not channel else channel.id)
+        self.invalidate_log_settings(ctx.guild.id)
         return await ctx.send(
             f"Successfully set {channel.mention} as the donation logging channel."
             if channel
             else "Successfully reset the log channel."
         )
 
+    @donoset.command(name="digest")
+    @commands.mod_or_permissions(administrator=True)
+    @setup_done()
+    async def set_digest(self, ctx, seconds: int):
+        """
+        Combine donation logs into a single message every few seconds.
+
+        Useful during events where a lot of donations get logged at once.
+        <seconds> is how long to collect logs for before sending them, 0 disables it."""
+        if not 0 <= seconds <= 300:
+            return await ctx.send("The digest delay needs to be between 0 and 300 seconds.")
+
+        await self.config.guild(ctx.guild).digest.set(seconds)
+        self.invalidate_log_settings(ctx.guild.id)
+        await ctx.send(
+            f"Donation logs will now be combined every {seconds} seconds."
+            if seconds
+            else "Donation logs will now be sent one by one."
+        )
+
     @donoset.command(name="showsettings", aliases=["showset", "ss"])
     @setup_done()
     async def showsettings(self, ctx):
@@ -1027,6 +1689,11 @@ class DonationLogging(commands.Cog):
         )
         embed.add_field(name="Auto Add Roles: ", value=data["autoadd"], inline=False)
         embed.add_field(name="Auto Remove Roles: ", value=data["autoremove"])
+        embed.add_field(
+            name="Log Digest: ",
+            value=f"Every {data['digest']} seconds" if data["digest"] else "Disabled",
+            inline=False,
+        )
         embed.add_field(
             name="Categories: ",
             value=f"{len(categories)} categories: `{humanize_list(list(categories.keys()))}`",
@@ -0,0 +1,168 @@
+import itertools
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+Entry = Tuple[int, int]  # (-amount, user_id) so the biggest donor sorts first.
+T = TypeVar("T")
+
+# shared between rankings so a rebuilt ranking never reuses an old one's version.
+_versions = itertools.count()
+
+
+class Ranking:
+    """
+    An incrementally updated ranking of donors, biggest donation first.
+
+    Entries live in a list of small sorted buckets (the same idea as sortedcontainers'
+    SortedList), so an update only shifts one bucket instead of the whole ranking and
+    top N/rank queries only walk bucket lengths before slicing.
+    Users with 0 donations aren't ranked."""
+
+    LOAD = 1000
+
+    def __init__(self, data: Optional[Dict[int, int]] = None):
+        self._amounts: Dict[int, int] = {}
+        self._buckets: List[List[Entry]] = []
+        self._maxes: List[Entry] = []
+        # bumped on every change, anything derived from the ranking can compare it to go stale.
+        self.version = next(_versions)
+        if data:
+            self._amounts = {int(k): v for k, v in data.items() if v}
+            entries = sorted((-v, k) for k, v in self._amounts.items())
+            self._buckets = [entries[i : i + self.LOAD] for i in range(0, len(entries), self.LOAD)]
+            self._maxes = [bucket[-1] for bucket in self._buckets]
+
+    def __len__(self):
+        return len(self._amounts)
+
+    def __contains__(self, user_id: int):
+        return user_id in self._amounts
+
+    def get(self, user_id: int) -> int:
+        return self._amounts.get(user_id, 0)
+
+    def amounts(self) -> Iterable[int]:
+        return self._amounts.values()
+
+    def _insert(self, entry: Entry):
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            return
+
+        pos = bisect_left(self._maxes, entry)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._buckets[pos].append(entry)
+            self._maxes[pos] = entry
+        else:
+            insort(self._buckets[pos], entry)
+
+        if len(bucket := self._buckets[pos]) > self.LOAD * 2:
+            # split it in half so inserts stay cheap.
+            half = bucket[self.LOAD :]
+            del bucket[self.LOAD :]
+            self._buckets.insert(pos + 1, half)
+            self._maxes[pos] = bucket[-1]
+            self._maxes.insert(pos + 1, half[-1])
+
+    def _delete(self, entry: Entry):
+        pos = bisect_left(self._maxes, entry)
+        bucket = self._buckets[pos]
+        del bucket[bisect_left(bucket, entry)]
+        if not bucket:
+            del self._buckets[pos]
+            del self._maxes[pos]
+        else:
+            self._maxes[pos] = bucket[-1]
+
+    def update(self, user_id: int, amount: int):
+        """
+        Set a user's amount, re-ranking them if it changed."""
+        old = self._amounts.get(user_id)
+        if old == amount or (old is None and not amount):
+            return
+
+        self.version = next(_versions)
+        if old is not None:
+            self._delete((-old, user_id))
+
+        if amount:
+            self._amounts[user_id] = amount
+            self._insert((-amount, user_id))
+        else:
+            del self._amounts[user_id]
+
+    def discard(self, user_id: int):
+        self.update(user_id, 0)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """
+        The 1 indexed position of the user or None if they aren't ranked."""
+        if (amount := self._amounts.get(user_id)) is None:
+            return None
+
+        entry = (-amount, user_id)
+        pos = bisect_left(self._maxes, entry)
+        bucket = self._buckets[pos]
+        return sum(map(len, self._buckets[:pos])) + bisect_left(bucket, entry) + 1
+
+    def top(self, limit: Optional[int] = None, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+        Yield `(user_id, amount)` pairs from the `start`th place onwards, at most `limit` of them.
+        """
+        remaining = len(self._amounts) - start if limit is None else limit
+        for bucket in self._buckets:
+            if remaining <= 0:
+                return
+
+            if start >= len(bucket):
+                start -= len(bucket)
+                continue
+
+            for amount, user_id in bucket[start : start + remaining]:
+                yield user_id, -amount
+                remaining -= 1
+            start = 0
+
+
+class PageCache:
+    """
+    Rendered leaderboard pages, kept for `ttl` seconds or until the ranking they were
+    rendered from changes version, whichever comes first.
+
+    Holds at most `maxsize` pages, the least recently used one is dropped first."""
+
+    def __init__(self, ttl: float = 60, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._pages: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, version: int, render: Callable[[], T]) -> T:
+        now = time.monotonic()
+        if (cached := self._pages.get(key)) and cached[0] > now and cached[1] == version:
+            self._pages.move_to_end(key)
+            return cached[2]
+
+        page = render()
+        self._pages[key] = (now + self.ttl, version, page)
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.maxsize:
+            self._pages.popitem(last=False)
+        return page
+
+    def clear(self):
+        self._pages.clear()
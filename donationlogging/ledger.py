@@ -0,0 +1,272 @@
+import asyncio
+import contextlib
+import functools
+import heapq
+import json
+import logging
+import struct
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+log = logging.getLogger("red.craycogs.donationlogging.ledger")
+
+# timestamp, user id, delta, actor id. 28 bytes per donation.
+RECORD = struct.Struct("<IQqQ")
+# set on the actor id of changes that aren't donations (restores, resets, migrations...),
+# snowflakes never use the top bit.
+ADJUSTMENT = 1 << 63
+DAY = 86400
+# the biggest a balance can be, so the delta between any two balances fits in a record.
+MAX_AMOUNT = 2**63 - 1
+# how often the rollups are saved to disk so loading doesn't have to read every record.
+SAVE_INTERVAL = 3600
+ROLLUPS_FILE = "rollups.json"
+
+Key = Tuple[int, str]  # (guild id, category name)
+
+
+def day_of(timestamp: float) -> int:
+    return int(timestamp // DAY)
+
+
+class Ledger:
+    """
+    An append only history of every donation change.
+
+    Each category of each guild gets its own file of fixed size binary records under `path`.
+    Alongside the files, per day totals for every user are kept in memory for the last
+    `retention` days so windowed leaderboards never have to read the raw records.
+    Changes that aren't donations are kept in the files but left out of the totals.
+
+    New records are buffered and only written when `flush` is called. Every so often
+    the totals are saved along with how much of each file they cover, so `load` only
+    has to read the records written after that."""
+
+    def __init__(self, path: Path, retention: int = 400):
+        self.path = path
+        self.retention = retention
+        self._pending: Dict[Key, bytearray] = defaultdict(bytearray)
+        # (guild id, category) -> day -> user id -> delta
+        self._rollups: Dict[Key, Dict[int, Dict[int, int]]] = defaultdict(dict)
+        # bytes of each file on disk, these are what the saved rollups cover.
+        self._sizes: Dict[Key, int] = {}
+        self._saved = time.time()
+        self._lock = asyncio.Lock()
+
+    def _file(self, guild_id: int, category: str) -> Path:
+        return self.path / str(guild_id) / f"{quote(category, safe='')}.bin"
+
+    @staticmethod
+    def _name(key: Key) -> str:
+        # same as the file's path relative to the ledger directory, minus the suffix.
+        return f"{key[0]}/{quote(key[1], safe='')}"
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(func, *args)
+        )
+
+    def _rollup(self, key: Key, timestamp: float, user_id: int, delta: int):
+        day = self._rollups[key].setdefault(day_of(timestamp), {})
+        day[user_id] = day.get(user_id, 0) + delta
+
+    def _read(self) -> Tuple[dict, List[Tuple[Key, int, int, bytes]]]:
+        # the saved rollups, and every file's records that they don't cover yet.
+        if not self.path.exists():
+            return {}, []
+        saved = {}
+        with contextlib.suppress(FileNotFoundError):
+            try:
+                saved = json.loads((self.path / ROLLUPS_FILE).read_text())
+            except ValueError:
+                log.warning("The saved ledger rollups are corrupt, reading every record instead.")
+
+        offsets = saved.get("offsets", {})
+        files = []
+        for file in self.path.glob("*/*.bin"):
+            key = (int(file.parent.name), unquote(file.stem))
+            size = file.stat().st_size
+            offset = offsets.get(self._name(key), 0)
+            if offset > size:  # the file was replaced since, start over.
+                offset = 0
+            with file.open("rb") as fp:
+                fp.seek(offset)
+                files.append((key, offset, size, fp.read()))
+        return saved.get("rollups", {}), files
+
+    async def load(self):
+        """
+        Load the saved daily rollups and add the records written since onto them."""
+        cutoff = time.time() - self.retention * DAY
+        records = 0
+        saved, files = await self._run(self._read)
+        for key, offset, size, raw in files:
+            self._sizes[key] = size
+            if offset:
+                for day, users in saved.get(self._name(key), {}).items():
+                    if int(day) >= day_of(cutoff):
+                        self._rollups[key][int(day)] = {int(u): d for u, d in users.items()}
+
+            # a torn write would leave a partial record at the end.
+            usable = len(raw) - len(raw) % RECORD.size
+            for timestamp, user_id, delta, actor in RECORD.iter_unpack(raw[:usable]):
+                records += 1
+                if timestamp >= cutoff and not actor & ADJUSTMENT:
+                    self._rollup(key, timestamp, user_id, delta)
+            await asyncio.sleep(0)
+
+        if records:
+            self._saved = 0  # so the next flush saves them with these records included.
+        log.debug(f"Loaded {records} donation ledger records on top of the saved rollups.")
+
+    def record(
+        self,
+        guild_id: int,
+        category: str,
+        user_id: int,
+        delta: int,
+        actor: Optional[int] = None,
+        at: Optional[float] = None,
+        donation: bool = True,
+    ):
+        """
+        Record a balance change. `donation` is False for changes that shouldn't
+        count towards windowed leaderboards, like restores and resets.
+
+        Raises ValueError if the delta doesn't fit in a record."""
+        if not delta:
+            return
+        if not -MAX_AMOUNT <= delta <= MAX_AMOUNT:
+            raise ValueError(f"{delta} is too big to be recorded.")
+
+        at = at or time.time()
+        key = (guild_id, category)
+        flags = 0 if donation else ADJUSTMENT
+        self._pending[key] += RECORD.pack(int(at), user_id, delta, (actor or 0) | flags)
+        if donation:
+            self._rollup(key, at, user_id, delta)
+
+    @property
+    def pending(self) -> int:
+        return sum(len(buffer) for buffer in self._pending.values()) // RECORD.size
+
+    def _write(self, pending: Dict[Key, bytearray], sizes: Dict[Key, int], rollups: dict):
+        for key, buffer in pending.items():
+            file = self._file(*key)
+            file.parent.mkdir(parents=True, exist_ok=True)
+            with file.open("ab") as fp:
+                fp.write(buffer)
+                sizes[key] = fp.tell()
+
+        if rollups is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            offsets = {self._name(key): size for key, size in sizes.items()}
+            tmp = self.path / f"{ROLLUPS_FILE}.tmp"
+            tmp.write_text(json.dumps({"offsets": offsets, "rollups": rollups}))
+            tmp.replace(self.path / ROLLUPS_FILE)
+        return sizes
+
+    def _dump_rollups(self) -> dict:
+        return {
+            self._name(key): {day: dict(users) for day, users in days.items()}
+            for key, days in self._rollups.items()
+        }
+
+    async def flush(self, save: bool = False):
+        """
+        Write the buffered records, and the rollups too if `save` is True
+        or they haven't been saved in `SAVE_INTERVAL` seconds."""
+        async with self._lock:
+            save = save or time.time() - self._saved >= SAVE_INTERVAL
+            if not self._pending and not (save and self._rollups):
+                return
+            pending, self._pending = self._pending, defaultdict(bytearray)
+            # copied right as the records are taken so they cover exactly what gets written.
+            rollups = self._dump_rollups() if save else None
+            try:
+                self._sizes = await self._run(self._write, pending, self._sizes.copy(), rollups)
+            except Exception:
+                # put them back in front of anything recorded meanwhile.
+                for key, buffer in pending.items():
+                    self._pending[key] = buffer + self._pending[key]
+                raise
+
+            if save:
+                self._saved = time.time()
+
+    def totals(self, guild_id: int, category: str, days: int) -> Dict[int, int]:
+        """
+        Every user's net donations in the last `days` days, today included."""
+        rollups = self._rollups.get((guild_id, category), {})
+        today = day_of(time.time())
+        for day in [d for d in rollups if d <= today - self.retention]:
+            del rollups[day]
+
+        totals: Dict[int, int] = defaultdict(int)
+        for day in range(today - days + 1, today + 1):
+            for user_id, delta in rollups.get(day, {}).items():
+                totals[user_id] += delta
+        return totals
+
+    def top(
+        self, guild_id: int, category: str, days: int, limit: Optional[int] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        The biggest donors of the last `days` days as `(user_id, amount)` pairs."""
+        totals = [(u, a) for u, a in self.totals(guild_id, category, days).items() if a > 0]
+        if limit is None:
+            return sorted(totals, key=lambda x: x[1], reverse=True)
+        return heapq.nlargest(limit, totals, key=lambda x: x[1])
+
+    def _rewrite_without(self, user_id: int):
+        for file in self.path.glob("*/*.bin"):
+            raw = file.read_bytes()
+            usable = len(raw) - len(raw) % RECORD.size
+            kept = b"".join(
+                RECORD.pack(*rec) for rec in RECORD.iter_unpack(raw[:usable]) if rec[1] != user_id
+            )
+            if len(kept) != usable:
+                tmp = file.with_suffix(".tmp")
+                tmp.write_bytes(kept)
+                tmp.replace(file)
+
+    async def purge_user(self, user_id: int):
+        """
+        Remove every record of a user, for data deletion requests."""
+        async with self._lock:
+            for key, buffer in list(self._pending.items()):
+                self._pending[key] = bytearray(
+                    b"".join(
+                        RECORD.pack(*rec)
+                        for rec in RECORD.iter_unpack(bytes(buffer))
+                        if rec[1] != user_id
+                    )
+                )
+            for days in self._rollups.values():
+                for day in days.values():
+                    day.pop(user_id, None)
+            if self.path.exists():
+                await self._run(self._rewrite_without, user_id)
+                self._sizes = await self._run(self._forget_saved)
+                self._saved = 0  # save them again on the next flush.
+
+    def _forget_saved(self) -> Dict[Key, int]:
+        # the files changed under the saved rollups, so they're no good anymore.
+        (self.path / ROLLUPS_FILE).unlink(missing_ok=True)
+        return {
+            (int(file.parent.name), unquote(file.stem)): file.stat().st_size
+            for file in self.path.glob("*/*.bin")
+        }
+
+    async def drop(self, guild_id: int, category: str):
+        async with self._lock:
+            self._pending.pop((guild_id, category), None)
+            self._rollups.pop((guild_id, category), None)
+            file = self._file(guild_id, category)
+            await self._run(lambda: file.unlink() if file.exists() else None)
+            if self.path.exists():
+                self._sizes = await self._run(self._forget_saved)
+                self._saved = 0
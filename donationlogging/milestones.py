@@ -0,0 +1,56 @@
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+
+class Milestones:
+    """
+    A category's donation milestones, sorted by amount.
+
+    Alongside every threshold it keeps the set of all roles earned up to and including it,
+    so the roles a donor should have is just one bisect away."""
+
+    __slots__ = ("_thresholds", "_roles", "_earned", "all_roles")
+
+    def __init__(self, pairs: Iterable[Tuple[int, Iterable[int]]] = ()):
+        merged: Dict[int, List[int]] = {}
+        for amount, roles in pairs:
+            bucket = merged.setdefault(int(amount), [])
+            bucket.extend(int(r) for r in roles if int(r) not in bucket)
+
+        self._thresholds: List[int] = sorted(merged)
+        self._roles: List[Tuple[int, ...]] = [tuple(merged[k]) for k in self._thresholds]
+        self._earned: List[FrozenSet[int]] = []
+        earned = frozenset()
+        for roles in self._roles:
+            earned = earned.union(roles)
+            self._earned.append(earned)
+
+        self.all_roles: FrozenSet[int] = earned
+
+    @classmethod
+    def from_config(cls, data: dict) -> "Milestones":
+        """
+        Build it from a category's config dict, which is `{"emoji": ..., "amount": [role ids]}`."""
+        return cls((k, v) for k, v in data.items() if k != "emoji")
+
+    def __bool__(self):
+        return bool(self._thresholds)
+
+    def __iter__(self):
+        return zip(self._thresholds, self._roles)
+
+    def roles_for(self, amount: int) -> FrozenSet[int]:
+        """
+        Every role a donor with `amount` donations has earned."""
+        if not (index := bisect_right(self._thresholds, amount)):
+            return frozenset()
+        return self._earned[index - 1]
+
+    def diff(self, amount: int, current: Iterable[int]) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        """
+        The role ids to add and to remove so a member with `current` roles matches `amount`.
+
+        Roles that aren't part of any milestone are never touched."""
+        current = frozenset(current)
+        target = self.roles_for(amount)
+        return target - current, (self.all_roles - target) & current
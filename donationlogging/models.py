@@ -1,18 +1,28 @@
+import asyncio
 import contextlib
 import logging
-from typing import Dict, List, Tuple, Union
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 import discord
-from fuzzywuzzy import process
+from fuzzywuzzy import fuzz, process, utils
 from redbot.core import Config
 from redbot.core.bot import Red
+from redbot.core.data_manager import cog_data_path
 from redbot.core.utils.chat_formatting import humanize_list
 
 from .exceptions import CategoryAlreadyExists, CategoryDoesNotExist, SimilarCategoryExists
+from .leaderboard import Ranking
+from .ledger import MAX_AMOUNT, Ledger
+from .milestones import Milestones
 
 log = logging.getLogger("red.craycogs.donationlogging.models")
 
 
+def normalise_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
 class DonoUser:
     def __init__(self, bot: Red, dono_bank, guild_id: int, user_id: int, data: int = 0):
         self.bot = bot
@@ -29,31 +39,43 @@ class DonoUser:
     def user(self) -> discord.Member:
         return self.guild.get_member(self.user_id)
 
-    def add(self, amount: int):
-        self.donations += amount
-        self.dono_bank._data[str(self.user_id)] = self.donations
+    def add(self, amount: int, actor: int = None):
+        self.donations = self.dono_bank._set_donations(
+            self.user_id, self.donations + amount, actor
+        )
         return self.donations
 
-    def remove(self, amount: int):
-        self.donations -= amount if self.donations - amount >= 0 else self.donations
-        self.dono_bank._data[str(self.user_id)] = self.donations
+    def remove(self, amount: int, actor: int = None):
+        self.donations = self.dono_bank._set_donations(
+            self.user_id, max(self.donations - amount, 0), actor
+        )
         return self.donations
 
-    def clear(self):
-        self.remove(self.donations)
+    def clear(self, actor: int = None):
+        self.remove(self.donations, actor)
         return self.donations
 
 
 class DonoBank:
     def __init__(
-        self, bot: Red, manager, name: str, emoji: str, guild_id: int, data: Dict[int, int] = {}
+        self, bot: Red, manager, name: str, emoji: str, guild_id: int, data: Dict[str, int] = None
     ):
         self.bot = bot
         self.manager = manager
         self.name = name
         self.emoji = emoji
         self.guild_id = guild_id
-        self._data = data
+        # config keys are strings, they're only converted back when the bank is written.
+        # balances saved before they were capped get capped here.
+        self._data: Dict[int, int] = (
+            {int(k): min(v, MAX_AMOUNT) for k, v in data.items()} if data else {}
+        )
+        self._ranking = Ranking(self._data)
+        self._dirty_users: Set[int] = set()
+        self.milestones = Milestones()
+        # held by commands while they change a balance and sync roles for it,
+        # so overlapping adds/removes in this category apply one after another.
+        self.lock = asyncio.Lock()
 
     def __str__(self):
         return self.name
@@ -62,104 +84,190 @@ class DonoBank:
         return hash((self.name, self.guild_id))
 
     def get_user(self, user_id: int) -> DonoUser:
-        return DonoUser(
-            self.bot, self, self.guild_id, user_id, self._data.setdefault(str(user_id), 0)
-        )
+        return DonoUser(self.bot, self, self.guild_id, user_id, self.get_donations(user_id))
+
+    def get_donations(self, user_id: int) -> int:
+        return self._data.get(int(user_id), 0)
+
+    def _changed(
+        self,
+        user_id: int,
+        delta: int,
+        actor: int = None,
+        at: float = None,
+        donation: bool = True,
+    ):
+        # keeps everything derived from balances outside of this bank up to date.
+        # this is called before the balance changes, the ledger raises if it can't record it.
+        self.manager.ledger.record(self.guild_id, self.name, user_id, delta, actor, at, donation)
+        self.manager._adjust_total(self.guild_id, user_id, delta)
+
+    def _set_donations(
+        self, user_id: int, amount: int, actor: int = None, donation: bool = True
+    ) -> int:
+        # every balance change goes through here so the ranking never goes stale.
+        # returns the new balance, which never goes over `MAX_AMOUNT`.
+        user_id = int(user_id)
+        amount = min(amount, MAX_AMOUNT)
+        self._changed(user_id, amount - self._data.get(user_id, 0), actor, donation=donation)
+        if user_id not in self._data:
+            self.manager._index_user(user_id, self)
+        self._data[user_id] = amount
+        self._ranking.update(user_id, amount)
+        self._mark_dirty(user_id)
+        return amount
+
+    def _mark_dirty(self, user_id: int):
+        self._dirty_users.add(user_id)
+        self.manager._mark_dirty(self)
+
+    def update_users(self, data: Dict[str, int], donation: bool = True):
+        for user_id, amount in data.items():
+            self._set_donations(user_id, amount, donation=donation)
+
+    def bulk_update(
+        self,
+        rows: Iterable[Tuple[int, int]],
+        add: bool = False,
+        actor: int = None,
+        donation: bool = True,
+    ) -> int:
+        """
+        Set (or add to, if `add` is True) the balances of many users at once.
+
+        The bank is only marked dirty once for the whole batch. `donation` is False
+        when the rows aren't new donations, like restores, so they're kept out of
+        windowed leaderboards. Returns the number of rows applied."""
+        count = 0
+        now = time.time()
+        for user_id, amount in rows:
+            user_id = int(user_id)
+            old = self._data.get(user_id, 0)
+            amount = min(amount + old if add else amount, MAX_AMOUNT)
+            self._changed(user_id, amount - old, actor, now, donation)
+            if user_id not in self._data:
+                self.manager._index_user(user_id, self)
+            self._data[user_id] = amount
+            self._ranking.update(user_id, amount)
+            self._dirty_users.add(user_id)
+            count += 1
+
+        if count:
+            self.manager._mark_dirty(self)
+        return count
+
+    def remove_user(self, user_id: int, actor: int = None):
+        # a reset, not a donation, so it doesn't count towards windowed leaderboards.
+        user_id = int(user_id)
+        if user_id in self._data:
+            self._changed(user_id, -self._data[user_id], actor, donation=False)
+            del self._data[user_id]
+            self._mark_dirty(user_id)
+        self._ranking.discard(user_id)
+        self.manager._unindex_user(user_id, self)
 
-    def remove_user(self, user_id: int):
-        with contextlib.suppress(KeyError):
-            del self._data[str(user_id)]
+    @property
+    def ranking(self) -> Ranking:
+        return self._ranking
+
+    def get_leaderboard(self, limit: Optional[int] = None, start: int = 0) -> List[DonoUser]:
+        """
+        The donors of this bank sorted by their donations, biggest first.
 
-    def get_leaderboard(self):
-        lb = [
+        Users that haven't donated anything are left out."""
+        return [
             DonoUser(self.bot, self, self.guild_id, user_id, amount)
-            for user_id, amount in self._data.items()
+            for user_id, amount in self._ranking.top(limit, start)
         ]
-        lb.sort(key=lambda x: x.donations, reverse=True)
-        return lb
-
-    async def setroles(self, amountrolepairs: Dict[int, List[discord.Role]]):
-        pairs = {}
-        for k, v in amountrolepairs.items():
-            pairs[k] = [role.id for role in v]
-        async with self.manager.config.guild_from_id(self.guild_id).categories() as categories:
-            categories.setdefault(
-                self.name, {"emoji": self.emoji}
-            )  # edge case that the category doesnt exist there.
-            categories[self.name].update(pairs)
+
+    def get_rank(self, user_id: int) -> Optional[int]:
+        return self._ranking.rank(int(user_id))
+
+    async def setroles(
+        self, amountrolepairs: Dict[int, List[Union[discord.Role, int]]], *, merge: bool = False
+    ):
+        """
+        Set the roles given out at each amount.
+
+        With `merge`, the roles are added to the ones already set for that amount instead of
+        replacing them. That's done under the guild lock so concurrent calls don't drop roles."""
+        async with self.manager.guild_lock(self.guild_id):
+            pairs = {}
+            current = dict(self.milestones) if merge else {}
+            for k, v in amountrolepairs.items():
+                roles = list(current.get(k, ()))
+                roles.extend(r for role in v if (r := getattr(role, "id", role)) not in roles)
+                pairs[str(k)] = roles
+            async with self.manager.config.guild_from_id(self.guild_id).categories() as categories:
+                categories.setdefault(
+                    self.name, {"emoji": self.emoji}
+                )  # edge case that the category doesnt exist there.
+                categories[self.name].update(pairs)
+                self.milestones = Milestones.from_config(categories[self.name])
+        self.manager._index_category(self.guild_id, self.name)
 
     async def getroles(self, ctx):
-        roles = await getattr(
-            self.manager.config.guild_from_id(self.guild_id).categories, self.name
-        )()
-        roles.pop("emoji")
-        return {amount: [ctx.guild.get_role(r) for r in role] for amount, role in roles.items()}
+        return {
+            amount: [ctx.guild.get_role(r) for r in roles] for amount, roles in self.milestones
+        }
+
+    def _role_diff(self, guild: discord.Guild, user: discord.Member):
+        to_add, to_remove = self.milestones.diff(
+            self.get_donations(user.id), (role.id for role in user.roles)
+        )
+        return (
+            [role for r in to_add if (role := guild.get_role(r))],
+            [role for r in to_remove if (role := guild.get_role(r))],
+        )
 
     async def addroles(self, ctx, user: discord.Member):
         # if not await self.config.guild(ctx.guild).autoadd():
         #     return f"Auto role adding is disabled for this server. Enable with `{ctx.prefix}donoset autorole add true`."
-        try:
-            data: dict = await (
-                getattr(self.manager.config.guild(ctx.guild).categories, self.name)
-            )()
-            data.pop("emoji")
-            if not data:
-                return
-            amount = self.get_user(user.id).donations
-            added_roles = set()
-            for key, value in data.items():
-                if amount >= int(key):
-                    roles = [ctx.guild.get_role(int(val)) for val in value]
-                    added_roles.update({role for role in roles if not role in user.roles})
-            added_roles = list(added_roles)
-            await user.add_roles(
-                *added_roles,
-                reason=f"Automatic role adding based on donation logging, requested by {ctx.author}",
-            )
-            roleadded = (
-                f"The following roles were added to `{user.name}`: {humanize_list([f'**{role.name}**' for role in added_roles])}"
-                if added_roles
-                else ""
-            )
-            return roleadded
+        if not self.milestones:
+            return ""
+
+        added_roles, _ = self._role_diff(ctx.guild, user)
+        if not added_roles:
+            return ""
 
-        except Exception as e:
-            raise e
+        await user.add_roles(
+            *added_roles,
+            reason=f"Automatic role adding based on donation logging, requested by {ctx.author}",
+        )
+        return f"The following roles were added to `{user.name}`: {humanize_list([f'**{role.name}**' for role in added_roles])}"
 
     async def removeroles(self, ctx, user: discord.Member):
-        try:
-            data: dict = await getattr(
-                self.manager.config.guild(ctx.guild).categories, self.name
-            )()
-            data.pop("emoji")
-            if not data:
-                return
-            amount = self.get_user(user.id).donations
-            removed_roles: set = {}
-            for key, value in data.items():
-                if amount < int(key):
-                    roles = [ctx.guild.get_role(int(val)) for val in value]
-                    removed_roles.update({role.name for role in roles if role in user.roles})
-            await user.remove_roles(
-                *removed_roles,
-                reason=f"Automatic role removal based on donation logging, requested by {ctx.author}",
-            )
-            roleadded = (
-                f"The following roles were added to `{user.name}`: {humanize_list(removed_roles)}"
-                if removed_roles
-                else ""
-            )
-            return roleadded
+        if not self.milestones:
+            return ""
+
+        _, removed_roles = self._role_diff(ctx.guild, user)
+        if not removed_roles:
+            return ""
 
-        except:
-            pass
+        await user.remove_roles(
+            *removed_roles,
+            reason=f"Automatic role removal based on donation logging, requested by {ctx.author}",
+        )
+        return f"The following roles were removed from `{user.name}`: {humanize_list([f'**{role.name}**' for role in removed_roles])}"
 
 
 class DonationManager:
-    _CACHE: List[DonoBank] = []
-
     def __init__(self, bot) -> None:
         self.bot = bot
+        # guild_id -> category name -> bank
+        self._CACHE: Dict[int, Dict[str, DonoBank]] = {}
+        # guild_id -> normalised name -> category name, mirrors the categories in config.
+        self._category_names: Dict[int, Dict[str, str]] = {}
+        # guild_id -> category name -> the name already run through fuzzywuzzy's processor.
+        self._fuzzy_choices: Dict[int, Dict[str, str]] = {}
+        self._default_categories: Dict[int, Optional[str]] = {}
+        # guild_id -> every user's donations summed across all categories.
+        self._totals: Dict[int, Ranking] = {}
+        # user_id -> every bank that has an entry for them, so deleting a user's data
+        # doesn't have to go through every bank.
+        self._user_banks: Dict[int, Set[DonoBank]] = {}
+        # guild_id -> lock around read-modify-writes of the guild's `categories` config.
+        self._guild_locks: Dict[int, asyncio.Lock] = {}
         self.config = Config.get_conf(self, identifier=111)
         # config structure would be something like:
         # {
@@ -177,21 +285,59 @@ class DonationManager:
         #      }
         #  }
 
+        self.config.register_global(flush_interval=30)
         self.config.register_guild(categories={}, default_category=None)
         self.config.init_custom("guild_category", 2)
         self.config.register_custom("guild_category", donations={})
 
+        # banks with changes that haven't been written to config yet.
+        self._dirty: Dict[DonoBank, float] = {}
+        self._flush_needed = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+        self.flush_interval = 30
+        self.max_pending = 500
+        self.stats = {"flushes": 0, "banks_written": 0, "failures": 0, "last_flush": None}
+
+        self.ledger = Ledger(cog_data_path(raw_name="DonationLogging") / "ledger")
+        # anything else with a `flush` coroutine that should be saved along with the banks.
+        self._flushables: list = [self.ledger]
+
+    def guild_lock(self, guild_id: int) -> asyncio.Lock:
+        return self._guild_locks.setdefault(guild_id, asyncio.Lock())
+
+    def _index_category(self, guild_id: int, name: str):
+        self._category_names.setdefault(guild_id, {})[normalise_name(name)] = name
+        self._fuzzy_choices.setdefault(guild_id, {})[name] = utils.full_process(name)
+
+    def _unindex_category(self, guild_id: int, name: str):
+        self._category_names.get(guild_id, {}).pop(normalise_name(name), None)
+        self._fuzzy_choices.get(guild_id, {}).pop(name, None)
+
+    def _resolve_category(self, guild_id: int, category: str) -> Optional[str]:
+        return self._category_names.get(guild_id, {}).get(normalise_name(category))
+
     async def _verify_guild_category(
         self, guild_id: int, category: str
-    ) -> Tuple[bool, Union[Tuple[str, int], None]]:
-        categories = await self.config.guild_from_id(guild_id).categories()
-        org = category.lower() in categories.keys()
-        match = process.extractOne(
-            category, categories.keys(), score_cutoff=80
-        )  # Just to keep up with typos
+    ) -> Tuple[bool, Union[str, None]]:
+        if name := self._resolve_category(guild_id, category):
+            return True, name
+
+        # only fall back to fuzzy matching when there's no exact match. Just to keep up with typos
+        choices = self._fuzzy_choices.get(guild_id)
+        if not choices or not (query := utils.full_process(category)):
+            return False, None
 
-        return (org and match), match[0] if match else None
-        # if first value is true, the second one will almost always be the actual name
+        match = process.extractOne(
+            query,
+            choices,
+            processor=None,
+            scorer=lambda a, b: fuzz.WRatio(a, b, full_process=False),
+            score_cutoff=80,
+        )
+        return False, match[2] if match else None
+        # if first value is true, the second one will be the actual name
         # if first value is false, the second one will be a comparable match or None if not found at all.
 
     async def _create_category(
@@ -209,99 +355,303 @@ class DonationManager:
 
         async with self.config.guild_from_id(guild_id).categories() as categories:
             categories.setdefault(category.lower(), {"emoji": emoji})
+        self._index_category(guild_id, category.lower())
 
         return category.lower()
 
     async def _populate_cache(self):
         for guild, data in (await self.config.all_guilds()).items():
+            self._default_categories[guild] = data["default_category"]
             if not data["categories"]:
                 continue
             for category_name, d in data["categories"].items():
+                self._index_category(guild, category_name)
+                if category_name in self._CACHE.get(guild, {}):
+                    continue
                 donos = await self.config.custom(
                     "guild_category", guild, category_name
                 ).donations()
-                self._CACHE.append(
-                    DonoBank(self.bot, self, category_name, d["emoji"], guild, donos)
-                )
+                bank = DonoBank(self.bot, self, category_name, d["emoji"], guild, donos)
+                bank.milestones = Milestones.from_config(d)
+                self._add_bank(bank, index_totals=False)
 
-        log.debug(f"DonationLogging cache populated with {len(self._CACHE)} entries.")
+            self._rebuild_totals(guild)
 
-    async def _back_to_config(self):
-        copy = self._CACHE.copy()
-        if not copy:
-            log.debug("DonationLogging cache is empty, not backing to config.")
+        log.debug(
+            f"DonationLogging cache populated with {sum(map(len, self._CACHE.values()))} entries."
+        )
+
+    def _add_bank(self, bank: DonoBank, index_totals: bool = True):
+        self._CACHE.setdefault(bank.guild_id, {})[bank.name] = bank
+        for user_id in bank._data:
+            self._index_user(user_id, bank)
+        if index_totals:
+            for user_id, amount in bank._data.items():
+                self._adjust_total(bank.guild_id, user_id, amount)
+
+    def _index_user(self, user_id: int, bank: DonoBank):
+        self._user_banks.setdefault(user_id, set()).add(bank)
+
+    def _unindex_user(self, user_id: int, bank: DonoBank):
+        if (banks := self._user_banks.get(user_id)) is not None:
+            banks.discard(bank)
+            if not banks:
+                del self._user_banks[user_id]
+
+    def get_user_banks(self, user_id: int, guild_id: int = None) -> List[DonoBank]:
+        """
+        The banks that have an entry for a user, optionally only the ones of one guild."""
+        return [
+            bank
+            for bank in self._user_banks.get(user_id, ())
+            if guild_id is None or bank.guild_id == guild_id
+        ]
+
+    def _rebuild_totals(self, guild_id: int):
+        totals: Dict[int, int] = {}
+        for bank in self._CACHE.get(guild_id, {}).values():
+            for user_id, amount in bank._data.items():
+                totals[user_id] = totals.get(user_id, 0) + amount
+        self._totals[guild_id] = Ranking(totals)
+
+    def _adjust_total(self, guild_id: int, user_id: int, delta: int):
+        if not delta:
             return
+        totals = self._totals.setdefault(guild_id, Ranking())
+        totals.update(user_id, totals.get(user_id) + delta)
+
+    def get_user_total(self, guild_id: int, user_id: int) -> int:
+        """
+        A user's donations across every category of a guild."""
+        if not (totals := self._totals.get(guild_id)):
+            return 0
+        return totals.get(int(user_id))
+
+    def get_totals(self, guild_id: int) -> Ranking:
+        """
+        The ranking of a guild's donors by their donations across every category."""
+        return self._totals.get(guild_id) or Ranking()
+
+    def get_overall_leaderboard(
+        self, guild_id: int, limit: Optional[int] = None, start: int = 0
+    ) -> List[Tuple[int, int]]:
+        """
+        The biggest donors of a guild across every category as `(user_id, total)` pairs."""
+        if not (totals := self._totals.get(guild_id)):
+            return []
+        return list(totals.top(limit, start))
+
+    def _get_cached_bank(self, name: str, guild_id: int) -> Optional[DonoBank]:
+        return self._CACHE.get(guild_id, {}).get(name)
+
+    def _mark_dirty(self, bank: DonoBank):
+        self._dirty.setdefault(bank, time.monotonic())
+        if self.pending_writes >= self.max_pending:
+            self._flush_needed.set()
+
+    @property
+    def pending_writes(self) -> int:
+        return sum(len(bank._dirty_users) for bank in self._dirty)
 
-        for i in copy:
-            await self.config.custom("guild_category", i.guild_id, i.name).donations.set(i._data)
-        log.debug("Cache backed up to config.")
+    @property
+    def oldest_pending(self) -> Optional[float]:
+        """
+        How many seconds the oldest unwritten change has been waiting for."""
+        if not self._dirty:
+            return None
+        return time.monotonic() - min(self._dirty.values())
+
+    async def flush(self):
+        """
+        Write every bank with unsaved changes to config.
+
+        Banks that fail to save stay dirty and are retried on the next flush,
+        so do the ones that weren't written yet if the flush gets cancelled."""
+        async with self._flush_lock:
+            self._flush_needed.clear()
+            dirty, self._dirty = self._dirty, {}
+            unwritten = dict(dirty)
+            try:
+                for bank in dirty:
+                    if self._get_cached_bank(bank.name, bank.guild_id) is not bank:
+                        # deleted since it was marked dirty, writing it would bring it back.
+                        del unwritten[bank]
+                        continue
+                    users, bank._dirty_users = bank._dirty_users, set()
+                    written = False
+                    try:
+                        await self.config.custom(
+                            "guild_category", bank.guild_id, bank.name
+                        ).donations.set({str(k): v for k, v in bank._data.items()})
+                        written = True
+
+                    except Exception:
+                        log.exception(
+                            f"Failed to save donations for {bank.name} in {bank.guild_id}"
+                        )
+                        self.stats["failures"] += 1
+
+                    finally:
+                        if written:
+                            del unwritten[bank]
+                            self.stats["banks_written"] += 1
+                        else:
+                            bank._dirty_users |= users
+
+            finally:
+                for bank, since in unwritten.items():
+                    if self._get_cached_bank(bank.name, bank.guild_id) is bank:
+                        self._dirty[bank] = min(since, self._dirty.get(bank, since))
+
+            for flushable in self._flushables:
+                try:
+                    await flushable.flush()
+                except Exception:
+                    log.exception(f"Failed to flush {type(flushable).__name__}")
+                    self.stats["failures"] += 1
+
+            self.stats["flushes"] += 1
+            self.stats["last_flush"] = time.time()
+
+        if dirty:
+            log.debug(f"Flushed {len(dirty)} donation banks to config.")
+
+    async def _flusher(self):
+        while not self._closing:
+            # flush every `flush_interval` seconds or early if too many writes pile up.
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._flush_needed.wait(), timeout=self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("Donation flusher errored")
+
+    def start_flusher(self, interval: int = None):
+        if interval:
+            self.flush_interval = interval
+        if not self._flush_task or self._flush_task.done():
+            self._closing = False
+            self._flush_task = asyncio.create_task(self._flusher())
+
+    def register_flushable(self, flushable):
+        self._flushables.append(flushable)
+
+    async def close(self):
+        # wake the flusher up and let it stop on its own, cancelling it could cut a flush short.
+        self._closing = True
+        self._flush_needed.set()
+        if self._flush_task:
+            await self._flush_task
+        await self.flush()
+        await self.ledger.flush(save=True)
+
+    async def delete_bank(self, bank: DonoBank):
+        guild_banks = self._CACHE.get(bank.guild_id, {})
+        guild_banks.pop(bank.name, None)
+        if not guild_banks:
+            self._CACHE.pop(bank.guild_id, None)
+        self._dirty.pop(bank, None)
+        for user_id, amount in bank._data.items():
+            self._adjust_total(bank.guild_id, user_id, -amount)
+            self._unindex_user(user_id, bank)
+        self._unindex_category(bank.guild_id, bank.name)
+        if self._default_categories.get(bank.guild_id) == bank.name:
+            self._default_categories[bank.guild_id] = None
+        async with self.guild_lock(bank.guild_id):
+            async with self.config.guild_from_id(bank.guild_id).categories() as categories:
+                categories.pop(bank.name, None)
+        # a flush that already picked this bank up has to finish before the data is cleared.
+        async with self._flush_lock:
+            await self.config.custom("guild_category", bank.guild_id, bank.name).clear()
+        await self.ledger.drop(bank.guild_id, bank.name)
 
     async def get_dono_bank(
         self, name: str, guild_id: int, *, emoji=None, force=False
     ) -> DonoBank:
-        try:
-            name = await self._create_category(guild_id, name, emoji=emoji, force=force)
-
-        except CategoryAlreadyExists as e:
-            name = e.name
-
-        for i in self._CACHE:
-            if i.name == name and i.guild_id == guild_id:
-                return i
-
-        bank = DonoBank(
-            self.bot,
-            self,
-            name,
-            emoji,
-            guild_id,
-            await self.config.custom("guild_category", guild_id, name).donations(),
-        )
-        self._CACHE.append(bank)
-        return bank
+        if (existing := self._resolve_category(guild_id, name)) and (
+            bank := self._get_cached_bank(existing, guild_id)
+        ):
+            return bank
+
+        # two commands creating the same category at once should end up with one bank.
+        async with self.guild_lock(guild_id):
+            try:
+                name = await self._create_category(guild_id, name, emoji=emoji, force=force)
+
+            except CategoryAlreadyExists as e:
+                name = e.name
+
+            if bank := self._get_cached_bank(name, guild_id):
+                return bank
+
+            bank = DonoBank(
+                self.bot,
+                self,
+                name,
+                emoji,
+                guild_id,
+                await self.config.custom("guild_category", guild_id, name).donations(),
+            )
+            self._add_bank(bank)
+            return bank
 
     async def get_existing_dono_bank(self, name: str, guild_id: int) -> DonoBank:
-        for i in self._CACHE:
-            if i.name == name and i.guild_id == guild_id:
-                return i
+        if bank := self._get_cached_bank(self._resolve_category(guild_id, name) or name, guild_id):
+            return bank
 
         raise CategoryDoesNotExist(f"Category with that name does not exist.", name)
 
-    async def delete_all_user_data(self, user_id: int, guild_id: int = None):
-        if not guild_id:
-            for bank in self._CACHE:
-                bank.remove_user(user_id)
-                async with self.config.custom(
-                    "guild_category", bank.guild_id, bank.name
-                ).donations() as data:
-                    with contextlib.suppress(KeyError):
-                        del data[user_id]
+    async def delete_all_user_data(
+        self, user_id: int, guild_id: int = None, actor: Optional[int] = None
+    ) -> int:
+        """
+        Remove a user from every bank they're in, or only the banks of one guild.
 
-        else:
-            banks = await self.get_all_dono_banks(guild_id)
-            for bank in banks:
-                bank.remove_user(user_id)
+        Only the banks that actually have the user are touched and they're all saved in a
+        single flush. Without a guild their ledger history is purged too.
+        Returns the number of banks the user was removed from."""
+        banks = self.get_user_banks(user_id, guild_id)
+        for bank in banks:
+            bank.remove_user(user_id, actor)
+
+        if not guild_id:
+            await self.ledger.purge_user(user_id)
+        await self.flush()
+        return len(banks)
 
     async def get_all_dono_banks(self, guild_id=None) -> List[DonoBank]:
         if not self._CACHE:
             await self._populate_cache()
         if not guild_id:
-            return self._CACHE
+            return [bank for banks in self._CACHE.values() for bank in banks.values()]
 
         else:
-            return list(filter(lambda x: x.guild_id == guild_id, self._CACHE))
+            return list(self._CACHE.get(guild_id, {}).values())
+
+    async def get_default_category_name(self, guild_id: int) -> Optional[str]:
+        if guild_id not in self._default_categories:
+            self._default_categories[guild_id] = await self.config.guild_from_id(
+                guild_id
+            ).default_category()
+        return self._default_categories[guild_id]
 
     async def get_default_category(self, guild_id: int) -> DonoBank:
-        cat = await self.config.guild_from_id(guild_id).default_category()
-        return await self.get_dono_bank(cat, guild_id)
+        """
+        The guild's default category, raises CategoryDoesNotExist if it doesn't have one."""
+        if not (name := await self.get_default_category_name(guild_id)):
+            raise CategoryDoesNotExist("There's no default category set.", None)
+        return await self.get_dono_bank(name, guild_id)
 
     async def set_default_category(self, guild_id: int, category: str):
-        if not (await self._verify_guild_category(guild_id, category))[0]:
+        if not (name := self._resolve_category(guild_id, category)):
             raise CategoryDoesNotExist(f"The category {category} does not exist.", category)
-        await self.config.guild_from_id(guild_id).default_category.set(category)
+        await self.config.guild_from_id(guild_id).default_category.set(name)
+        self._default_categories[guild_id] = name
 
     @classmethod
     async def initialize(cls, bot):
         s = cls(bot)
         await s._populate_cache()
+        await s.ledger.load()
+        s.start_flusher(await s.config.flush_interval())
         return s
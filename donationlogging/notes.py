@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from redbot.core import Config
+
+log = logging.getLogger("red.craycogs.donationlogging.notes")
+
+Key = Tuple[int, int]  # (guild id, member id)
+
+
+class NoteStore:
+    """
+    Donation notes of every member, held in memory.
+
+    Notes are numbered per member starting at 1 and indexed by category.
+    Changes are written back to the member's config in batches whenever `flush` is called."""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._notes: Dict[Key, Dict[int, dict]] = {}
+        self._next: Dict[Key, int] = {}
+        # (guild id, category) -> {(member id, note number)}
+        self._by_category: Dict[Tuple[int, str], Set[Tuple[int, int]]] = {}
+        self._dirty: Set[Key] = set()
+        self._lock = asyncio.Lock()
+
+    def _index(self, key: Key, number: int, note: dict):
+        if category := note.get("category"):
+            self._by_category.setdefault((key[0], category), set()).add((key[1], number))
+
+    def _unindex(self, key: Key, number: int, note: dict):
+        if (category := note.get("category")) and (
+            index := self._by_category.get((key[0], category))
+        ):
+            index.discard((key[1], number))
+
+    async def load(self):
+        for guild_id, members in (await self.config.all_members()).items():
+            for member_id, data in members.items():
+                if not (notes := data.get("notes")):
+                    continue
+                key = (int(guild_id), int(member_id))
+                # older notes were saved with a mix of int and str keys.
+                self._notes[key] = {int(k): v for k, v in notes.items()}
+                self._next[key] = max(self._notes[key]) + 1
+                for number, note in self._notes[key].items():
+                    self._index(key, number, note)
+            await asyncio.sleep(0)
+
+    def add(self, guild_id: int, member_id: int, note: dict) -> int:
+        """
+        Store a new note and return its number."""
+        key = (guild_id, member_id)
+        number = self._next.get(key, 1)
+        self._next[key] = number + 1
+        self._notes.setdefault(key, {})[number] = note
+        self._index(key, number, note)
+        self._dirty.add(key)
+        return number
+
+    def get_all(self, guild_id: int, member_id: int) -> Dict[int, dict]:
+        return self._notes.get((guild_id, member_id), {})
+
+    def get(self, guild_id: int, member_id: int, number: int) -> Optional[dict]:
+        return self._notes.get((guild_id, member_id), {}).get(number)
+
+    def count(self, guild_id: int, member_id: int) -> int:
+        return len(self._notes.get((guild_id, member_id), {}))
+
+    def for_category(self, guild_id: int, category: str) -> List[Tuple[int, int, dict]]:
+        """
+        Every note logged for a category as `(member_id, number, note)`."""
+        return [
+            (member_id, number, self._notes[(guild_id, member_id)][number])
+            for member_id, number in sorted(self._by_category.get((guild_id, category), ()))
+        ]
+
+    def remove_member(self, guild_id: int, member_id: int):
+        key = (guild_id, member_id)
+        for number, note in self._notes.pop(key, {}).items():
+            self._unindex(key, number, note)
+        self._next.pop(key, None)
+        self._dirty.add(key)
+
+    def set_member(self, guild_id: int, member_id: int, notes: Dict[int, dict]):
+        """
+        Replace all of a member's notes, used when restoring a snapshot."""
+        self.remove_member(guild_id, member_id)
+        if not notes:
+            return
+        key = (guild_id, member_id)
+        self._notes[key] = dict(notes)
+        self._next[key] = max(notes) + 1
+        for number, note in notes.items():
+            self._index(key, number, note)
+
+    def remove_user(self, member_id: int):
+        """
+        Remove a user's notes in every guild."""
+        for guild_id, user_id in [key for key in self._notes if key[1] == member_id]:
+            self.remove_member(guild_id, user_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    async def flush(self):
+        async with self._lock:
+            dirty, self._dirty = list(self._dirty), set()
+            written = 0
+            try:
+                for key in dirty:
+                    group = self.config.member_from_ids(*key).notes
+                    if notes := self._notes.get(key):
+                        await group.set({str(k): v for k, v in notes.items()})
+                    else:
+                        await group.clear()
+                    written += 1
+            finally:
+                # whatever wasn't written, because of an error or a cancel, is retried next time.
+                self._dirty.update(dirty[written:])
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import discord
+from redbot.core.utils.chat_formatting import humanize_number
+
+from .models import DonoBank
+
+log = logging.getLogger("red.craycogs.donationlogging.reconcile")
+
+Change = Tuple[discord.Member, List[discord.Role], List[discord.Role]]
+
+PLAN_CHUNK = 500  # members checked between yields to the event loop.
+
+
+async def plan(
+    guild: discord.Guild,
+    bank: DonoBank,
+    user_ids: Optional[Iterable[int]] = None,
+    *,
+    add: bool = True,
+    remove: bool = True,
+    after: int = 0,
+) -> AsyncIterator[Change]:
+    """
+    Work out which milestone roles every member needs added or removed, in one pass.
+
+    If `user_ids` isn't given, everyone with a balance in the bank and everyone holding
+    one of its milestone roles is checked. Changes are yielded sorted by member id,
+    only for members with an id bigger than `after`."""
+    if not bank.milestones:
+        return
+
+    roles = _milestone_roles(guild, bank)
+    if user_ids is None:
+        user_ids = {u for u, amount in bank._data.items() if amount}
+        for role in roles.values():
+            user_ids.update(member.id for member in role.members)
+
+    for index, user_id in enumerate(sorted(u for u in user_ids if u > after), 1):
+        if not index % PLAN_CHUNK:
+            await asyncio.sleep(0)
+        if not (member := guild.get_member(user_id)):
+            continue
+        to_add, to_remove = changes_for(member, bank, roles, add=add, remove=remove)
+        if to_add or to_remove:
+            yield member, to_add, to_remove
+
+
+def _milestone_roles(guild: discord.Guild, bank: DonoBank) -> Dict[int, discord.Role]:
+    return {r: role for r in bank.milestones.all_roles if (role := guild.get_role(r))}
+
+
+def changes_for(
+    member: discord.Member,
+    bank: DonoBank,
+    roles: Dict[int, discord.Role],
+    *,
+    add: bool = True,
+    remove: bool = True,
+) -> Tuple[List[discord.Role], List[discord.Role]]:
+    """
+    The milestone roles to add to and remove from a member, going by their balance
+    and roles right now. `roles` maps the bank's milestone role ids to the guild's roles."""
+    to_add, to_remove = bank.milestones.diff(
+        bank.get_donations(member.id), (role.id for role in member.roles)
+    )
+    return (
+        [roles[r] for r in to_add if add and r in roles],
+        [roles[r] for r in to_remove if remove and r in roles],
+    )
+
+
+async def apply(member: discord.Member, to_add, to_remove, reason: str):
+    if to_add:
+        await member.add_roles(*to_add, reason=reason)
+    if to_remove:
+        await member.remove_roles(*to_remove, reason=reason)
+
+
+class RoleReconciler:
+    """
+    Runs role reconciliation jobs in the background, one per guild at most.
+
+    Progress is saved to the guild's config as the job goes so an interrupted job
+    (cog reload, restart) picks up where it left off instead of starting over."""
+
+    save_every = 25
+
+    def __init__(self, cog, delay: float = 1.0):
+        self.cog = cog
+        self.delay = delay  # seconds between members whose roles get edited.
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.progress: Dict[int, dict] = {}
+
+    def running(self, guild_id: int) -> bool:
+        return guild_id in self._tasks and not self._tasks[guild_id].done()
+
+    async def start(self, guild: discord.Guild, bank: DonoBank, channel_id: int = None):
+        state = {
+            "category": bank.name,
+            "cursor": 0,
+            "done": 0,
+            "changed": 0,
+            "failed": 0,
+            "total": None,
+            "channel": channel_id,
+            "started": time.time(),
+        }
+        await self.cog.config.guild(guild).reconcile.set(state)
+        self._spawn(guild, bank, state)
+
+    def _spawn(self, guild: discord.Guild, bank: DonoBank, state: dict):
+        self.progress[guild.id] = state
+        self._tasks[guild.id] = asyncio.create_task(self._run(guild, bank, state))
+
+    async def resume_all(self):
+        await self.cog.bot.wait_until_red_ready()
+        for guild_id, data in (await self.cog.config.all_guilds()).items():
+            if not (state := data.get("reconcile")) or not (
+                guild := self.cog.bot.get_guild(guild_id)
+            ):
+                continue
+            try:
+                bank = await self.cog.cache.get_existing_dono_bank(state["category"], guild_id)
+            except Exception:
+                await self.cog.config.guild(guild).reconcile.clear()
+                continue
+            log.debug(f"Resuming role reconciliation for {guild_id} from {state['cursor']}")
+            self._spawn(guild, bank, state)
+
+    async def cancel(self, guild: discord.Guild) -> bool:
+        task = self._tasks.pop(guild.id, None)
+        self.progress.pop(guild.id, None)
+        await self.cog.config.guild(guild).reconcile.clear()
+        if task and not task.done():
+            task.cancel()
+            return True
+        return False
+
+    def stop(self):
+        # unloading, leave the saved state alone so the job resumes next time.
+        for task in self._tasks.values():
+            task.cancel()
+
+    async def _run(self, guild: discord.Guild, bank: DonoBank, state: dict):
+        settings = await self.cog.config.guild(guild).all()
+        # the plan only picks who to look at, it can be minutes old by the time a member's
+        # turn comes so their changes are worked out again right before they're applied.
+        user_ids = [
+            member.id
+            async for member, *_ in plan(
+                guild,
+                bank,
+                add=settings["autoadd"],
+                remove=settings["autoremove"],
+                after=state["cursor"],
+            )
+        ]
+        state["total"] = state["done"] + len(user_ids)
+        reason = f"Donation role reconciliation for {bank.name}"
+
+        try:
+            for index, user_id in enumerate(user_ids, 1):
+                async with bank.lock:
+                    if member := guild.get_member(user_id):
+                        to_add, to_remove = changes_for(
+                            member,
+                            bank,
+                            _milestone_roles(guild, bank),
+                            add=settings["autoadd"],
+                            remove=settings["autoremove"],
+                        )
+                    else:
+                        to_add = to_remove = None
+                    if to_add or to_remove:
+                        try:
+                            await apply(member, to_add, to_remove, reason)
+                            state["changed"] += 1
+                        except discord.HTTPException:
+                            state["failed"] += 1
+
+                state["cursor"] = user_id
+                state["done"] += 1
+                if not index % self.save_every:
+                    await self.cog.config.guild(guild).reconcile.set(state)
+                if to_add or to_remove:
+                    await asyncio.sleep(self.delay)
+
+        except asyncio.CancelledError:
+            if self.progress.get(guild.id) is state:
+                await self.cog.config.guild(guild).reconcile.set(state)
+            raise
+
+        await self.cog.config.guild(guild).reconcile.clear()
+        self._tasks.pop(guild.id, None)
+        self.progress.pop(guild.id, None)
+
+        if channel := guild.get_channel(state["channel"] or 0):
+            try:
+                await channel.send(
+                    f"Finished syncing donation roles for **{bank.name}**. "
+                    f"Updated {humanize_number(state['changed'])} members"
+                    + (f", {humanize_number(state['failed'])} failed." if state["failed"] else ".")
+                )
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,229 @@
+import asyncio
+import functools
+import gzip
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from redbot.core.data_manager import cog_data_path
+
+from .milestones import Milestones
+
+log = logging.getLogger("red.craycogs.donationlogging.snapshot")
+
+VERSION = 1
+CHUNK = 1000  # balance rows per record and lines per write.
+
+Row = Tuple[int, str, int, int]  # (guild id, category, user id, amount)
+
+# `<guild id or "all">-<YYYYmmdd-HHMMSS>`, the file itself gets `.jsonl.gz` on top.
+name_regex = re.compile(r"(all|\d+)-\d{8}-\d{6}")
+
+
+def snapshot_dir() -> Path:
+    return cog_data_path(raw_name="DonationLogging") / "snapshots"
+
+
+def snapshot_file(name: str) -> Path:
+    if not name_regex.fullmatch(name):
+        raise ValueError(f"`{name}` isn't a valid snapshot name.")
+    return snapshot_dir() / f"{name}.jsonl.gz"
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+
+def _dump(record: dict) -> str:
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+async def _records(manager, notes, guild_ids: List[int]):
+    # everything is yielded sorted by guild, category and user so two snapshots
+    # can be diffed by walking them side by side.
+    guilds = await manager.config.all_guilds()
+    for guild_id in sorted(guild_ids):
+        data = guilds.get(guild_id, {})
+        yield {"type": "guild", "guild": guild_id, "default": data.get("default_category")}
+
+        categories = data.get("categories", {})
+        for name in sorted(categories):
+            yield {
+                "type": "category",
+                "guild": guild_id,
+                "name": name,
+                "settings": categories[name],
+            }
+
+        for bank in sorted(await manager.get_all_dono_banks(guild_id), key=lambda b: b.name):
+            rows = sorted([u, a] for u, a in bank._data.items() if a)
+            for i in range(0, len(rows), CHUNK):
+                yield {
+                    "type": "balances",
+                    "guild": guild_id,
+                    "category": bank.name,
+                    "rows": rows[i : i + CHUNK],
+                }
+                await asyncio.sleep(0)
+
+        for (g, member_id), member_notes in sorted(notes._notes.items()):
+            if g == guild_id and member_notes:
+                yield {
+                    "type": "notes",
+                    "guild": guild_id,
+                    "member": member_id,
+                    "notes": {str(k): v for k, v in member_notes.items()},
+                }
+
+
+async def create(manager, notes, path: Path, guild_ids: List[int]) -> int:
+    """
+    Write a snapshot of the given guilds' banks, category settings and notes to `path`.
+
+    The file is gzip compressed json lines, written in chunks off the event loop.
+    Returns the number of records written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    fp = await _run(gzip.open, tmp, "wt", 6, "utf-8")
+    count = 0
+    try:
+        header = {
+            "type": "header",
+            "version": VERSION,
+            "created": time.time(),
+            "guilds": guild_ids,
+        }
+        lines = [_dump(header)]
+        async for record in _records(manager, notes, guild_ids):
+            lines.append(_dump(record))
+            count += 1
+            if len(lines) >= CHUNK:
+                await _run(fp.write, "".join(lines))
+                lines = []
+        await _run(fp.write, "".join(lines))
+    finally:
+        await _run(fp.close)
+
+    await _run(tmp.replace, path)
+    return count
+
+
+async def iter_records(path: Path) -> AsyncIterator[dict]:
+    """
+    Read a snapshot's records back a chunk at a time."""
+    fp = await _run(gzip.open, path, "rt", 6, "utf-8")
+    try:
+        header = json.loads(await _run(fp.readline) or "{}")
+        if header.get("type") != "header":
+            raise ValueError(f"{path.name} isn't a donation snapshot.")
+        if header.get("version") != VERSION:
+            raise ValueError(f"{path.name} is a version {header.get('version')} snapshot.")
+        yield header
+
+        while lines := await _run(fp.readlines, 1 << 16):
+            for line in lines:
+                yield json.loads(line)
+    finally:
+        await _run(fp.close)
+
+
+async def restore(manager, notes, path: Path, guild_id: int, actor: int = None) -> Dict[str, int]:
+    """
+    Put a guild's categories, balances and notes back the way they are in a snapshot.
+
+    Only categories and members that are in the snapshot are touched, a category's
+    balances are replaced as a whole. Changes go through the usual bank methods so the
+    ledger and totals stay in sync. Returns counts of what was restored."""
+    restored = {"categories": 0, "balances": 0, "notes": 0}
+    rows: Dict[str, List[Tuple[int, int]]] = {}
+    default = None
+    async for record in iter_records(path):
+        if record.get("guild") != guild_id:
+            continue
+
+        if record["type"] == "guild":
+            default = record["default"]
+
+        elif record["type"] == "category":
+            settings = record["settings"]
+            bank = await manager.get_dono_bank(
+                record["name"], guild_id, emoji=settings.get("emoji"), force=True
+            )
+            async with manager.guild_lock(guild_id):
+                async with manager.config.guild_from_id(guild_id).categories() as categories:
+                    categories[bank.name] = settings
+                bank.emoji = settings.get("emoji")
+                bank.milestones = Milestones.from_config(settings)
+            rows.setdefault(bank.name, [])
+            restored["categories"] += 1
+
+        elif record["type"] == "balances":
+            rows.setdefault(record["category"], []).extend(map(tuple, record["rows"]))
+
+        elif record["type"] == "notes":
+            notes.set_member(
+                guild_id, record["member"], {int(k): v for k, v in record["notes"].items()}
+            )
+            restored["notes"] += 1
+
+    for name, balances in rows.items():
+        bank = await manager.get_existing_dono_bank(name, guild_id)
+        async with bank.lock:
+            keep = {user_id for user_id, _ in balances}
+            for user_id in [u for u in bank._data if u not in keep]:
+                bank.remove_user(user_id, actor)
+            restored["balances"] += bank.bulk_update(balances, actor=actor, donation=False)
+        await asyncio.sleep(0)
+
+    if default and manager._resolve_category(guild_id, default):
+        await manager.set_default_category(guild_id, default)
+
+    await manager.flush()
+    return restored
+
+
+async def _balances(path: Path) -> AsyncIterator[Row]:
+    async for record in iter_records(path):
+        if record["type"] == "balances":
+            for user_id, amount in record["rows"]:
+                yield record["guild"], record["category"], user_id, amount
+
+
+async def _next(iterator: AsyncIterator[Row]) -> Optional[Row]:
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def diff(old: Path, new: Path) -> Dict[Tuple[int, str], Dict[str, int]]:
+    """
+    Compare the balances of two snapshots, one row of each at a time.
+
+    Returns `{(guild_id, category): {"added", "removed", "changed", "delta"}}` for every
+    category that differs. `added`/`removed` count users only in the new/old snapshot."""
+    result: Dict[Tuple[int, str], Dict[str, int]] = {}
+
+    def bump(key, field, delta):
+        entry = result.setdefault(key, {"added": 0, "removed": 0, "changed": 0, "delta": 0})
+        entry[field] += 1
+        entry["delta"] += delta
+
+    a_rows, b_rows = _balances(old), _balances(new)
+    a, b = await _next(a_rows), await _next(b_rows)
+    while a or b:
+        if b is None or (a is not None and a[:3] < b[:3]):
+            bump(a[:2], "removed", -a[3])
+            a = await _next(a_rows)
+        elif a is None or b[:3] < a[:3]:
+            bump(b[:2], "added", b[3])
+            b = await _next(b_rows)
+        else:
+            if a[3] != b[3]:
+                bump(a[:2], "changed", b[3] - a[3])
+            a, b = await _next(a_rows), await _next(b_rows)
+
+    return result
@@ -0,0 +1,112 @@
+import asyncio
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, List, Tuple
+
+import aiohttp
+
+from .ledger import MAX_AMOUNT
+
+FORMATS = ("csv", "jsonl")
+ROW_CHUNK = 1000
+READ_CHUNK = 64 * 1024
+
+
+def detect_format(filename: str) -> str:
+    ext = filename.rsplit(".", 1)[-1].lower()
+    if ext == "csv":
+        return "csv"
+    if ext in ("jsonl", "json", "ndjson"):
+        return "jsonl"
+    raise ValueError(f"`{filename}` isn't a csv or json lines file.")
+
+
+def parse_row(line: str, fmt: str) -> Tuple[int, int]:
+    """
+    Parse a single `user_id, amount` row, raises ValueError if it isn't one."""
+    if fmt == "csv":
+        fields = next(csv.reader([line]))
+        if len(fields) < 2:
+            raise ValueError("expected 2 columns")
+        user_id, amount = fields[0], fields[1]
+
+    else:
+        try:
+            data = json.loads(line)
+            user_id, amount = data["user_id"], data["amount"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            raise ValueError("expected an object with `user_id` and `amount` keys")
+
+    user_id, amount = int(str(user_id).strip()), int(str(amount).strip().replace(",", ""))
+    if amount < 0:
+        raise ValueError("amounts can't be negative")
+    if amount > MAX_AMOUNT:
+        raise ValueError("amount is too big")
+    return user_id, amount
+
+
+async def iter_lines(url: str) -> AsyncIterator[str]:
+    """
+    Stream a file line by line without ever holding all of it in memory."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            buffer = b""
+            async for chunk in resp.content.iter_chunked(READ_CHUNK):
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    yield line.decode("utf-8-sig").strip()
+            if buffer:
+                yield buffer.decode("utf-8-sig").strip()
+
+
+async def iter_row_chunks(
+    lines: AsyncIterator[str], fmt: str, size: int = ROW_CHUNK
+) -> AsyncIterator[Tuple[List[Tuple[int, int]], List[int]]]:
+    """
+    Group parsed rows into chunks of `size`.
+
+    Yields `(rows, bad_line_numbers)` pairs. Blank lines and a csv header are skipped."""
+    rows, bad = [], []
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line:
+            continue
+        try:
+            rows.append(parse_row(line, fmt))
+        except ValueError:
+            if not (line_no == 1 and fmt == "csv"):  # probably the header.
+                bad.append(line_no)
+
+        if len(rows) >= size:
+            yield rows, bad
+            rows, bad = [], []
+
+    if rows or bad:
+        yield rows, bad
+
+
+async def export_rows(rows: Iterable[Tuple[int, int]], fmt: str) -> io.BytesIO:
+    """
+    Write `(user_id, amount)` rows to an in memory file, yielding to the loop every chunk."""
+    fp = io.BytesIO()
+    text = io.TextIOWrapper(fp, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text) if fmt == "csv" else None
+    if writer:
+        writer.writerow(("user_id", "amount"))
+
+    for index, (user_id, amount) in enumerate(rows, 1):
+        if writer:
+            writer.writerow((user_id, amount))
+        else:
+            text.write(json.dumps({"user_id": user_id, "amount": amount}) + "\n")
+
+        if not index % ROW_CHUNK:
+            await asyncio.sleep(0)
+
+    text.detach()
+    fp.seek(0)
+    return fp
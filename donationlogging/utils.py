@@ -1,5 +1,7 @@
 import asyncio
+import contextlib
 import re
+from typing import Callable, Dict
 
 import discord
 from discord.ext.commands.converter import EmojiConverter, RoleConverter
@@ -8,13 +10,45 @@ from discord.ext.commands.view import StringView
 from emoji import UNICODE_EMOJI_ENGLISH
 from redbot.core import commands
 from redbot.core.utils import mod
-from redbot.core.utils.predicates import MessagePredicate
+from redbot.core.utils.menus import start_adding_reactions
+from redbot.core.utils.predicates import MessagePredicate, ReactionPredicate
 
 from .exceptions import CategoryAlreadyExists, CategoryDoesNotExist
+from .ledger import MAX_AMOUNT
 from .models import DonoBank
 
 time_regex = re.compile(r"(?:(\d{1,5})(h|s|m|d))+?")
 time_dict = {"h": 3600, "s": 1, "m": 60, "d": 86400}
+window_regex = re.compile(r"(\d{1,4})(d|w)")
+amount_regex = re.compile(
+    r"""
+    (?P<whole>\d{1,3}(?:(?P<separator>[,_])\d{3}(?:(?P=separator)\d{3})*)?|\d+)?
+    (?:\.(?P<fraction>\d*))?
+    (?:e(?P<exponent>[+-]?\d{1,3}))?
+    (?P<suffixes>[kmbt]{0,3})
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+suffix_dict = {"k": 10**3, "m": 10**6, "b": 10**9, "t": 10**12}
+
+
+def parse_amount(argument: str) -> int:
+    """
+    Parse an amount, see `MoniConverter`. Raises ValueError if it isn't one
+    and OverflowError if it's bigger than `MAX_AMOUNT`."""
+    match = amount_regex.fullmatch(argument.strip())
+    if not match or not (match["whole"] or match["fraction"]):
+        raise ValueError(argument)
+
+    fraction = match["fraction"] or ""
+    exponent = int(match["exponent"] or 0) - len(fraction)
+    value = int((match["whole"] or "0").replace(",", "").replace("_", "") + fraction)
+    for suffix in match["suffixes"].lower():
+        value *= suffix_dict[suffix]
+    value = value * 10**exponent if exponent >= 0 else value // 10**-exponent
+    if value > MAX_AMOUNT:
+        raise OverflowError(argument)
+    return value
 
 
 class CategoryConverter(commands.Converter):
@@ -139,24 +173,50 @@ class flags(commands.Converter):
 
 
 class MoniConverter(commands.Converter):
+    """
+    Converts an amount like `1000`, `1,000`, `1_000`, `1.5k`, `2.5m`, `1kk` or `20e4` to an int.
+
+    The math is done on integers so big amounts come out exact, anything after the
+    decimal point that's left over once suffixes and exponents are applied is dropped.
+    Separators have to split the digits in groups of 3 and can't be mixed,
+    so neither `1,5k` nor `1,000_000` is an amount."""
+
     async def convert(self, ctx, argument):
         try:
-            total_stars = 0
-            num_map = {"K": 1000, "M": 1000000, "B": 1000000000}
-            if argument.isdigit():
-                total_stars = int(argument)
-            else:
-                if len(argument) > 1:
-                    total_stars = float(argument[:-1]) * num_map.get(argument[-1].upper(), 1)
-            return int(total_stars)
+            return parse_amount(argument)
+        except OverflowError:
+            raise BadArgument(f"Amounts can't be bigger than {MAX_AMOUNT:,}.")
+        except ValueError:
+            if re.match(r"<@!?([0-9]+)>$", argument):
+                raise BadArgument(f"The mention comes after the amount.")
+            raise BadArgument(f"Couldn't convert {argument} to a proper amount.")
+
+
+class WindowConverter(commands.Converter):
+    """
+    Converts a leaderboard window like `7d`, `2w` or `month` to a number of days.
+
+    `all` means no window at all."""
+
+    aliases = {"day": 1, "today": 1, "week": 7, "month": 30, "year": 365}
+
+    async def convert(self, ctx, argument):
+        argument = argument.lower()
+        if argument in ("all", "alltime", "all-time"):
+            return None
+
+        if not (days := self.aliases.get(argument)):
+            if not (match := window_regex.fullmatch(argument)):
+                raise BadArgument(
+                    f"`{argument}` isn't a valid window. Use something like `7d`, `2w` or `month`."
+                )
+            days = int(match.group(1)) * (7 if match.group(2) == "w" else 1)
 
-        except:
-            try:
-                return int(float(argument))
-            except:
-                if re.match(r"<@!?([0-9]+)>$", argument):
-                    raise BadArgument(f"The mention comes after the amount.")
-                raise BadArgument(f"Couldn't convert {argument} to a proper amount.")
+        if not 0 < days <= ctx.cog.cache.ledger.retention:
+            raise BadArgument(
+                f"The window has to be between 1 and {ctx.cog.cache.ledger.retention} days."
+            )
+        return days
 
 
 class AmountRoleConverter(commands.Converter):
@@ -211,6 +271,57 @@ async def sortdict(argument, key_or_value="value"):
         return final
 
 
+def jump_url(guild_id: int, channel_id: int, message_id: int) -> str:
+    # same thing discord.Message.jump_url gives, without needing the message.
+    return f"https://discord.com/channels/{guild_id}/{channel_id}/{message_id}"
+
+
+async def lazy_menu(
+    ctx: commands.Context, render: Callable[[int], discord.Embed], page_count: int, timeout=60
+):
+    """
+    A reaction menu that only renders a page when it's about to be shown.
+
+    Red's `menu` needs every page up front, this takes a function that renders the nth page.
+    Rendered pages are kept around while the menu is open."""
+    rendered: Dict[int, discord.Embed] = {}
+
+    def get(page: int) -> discord.Embed:
+        if page not in rendered:
+            rendered[page] = render(page)
+        return rendered[page]
+
+    page = 0
+    message = await ctx.send(embed=get(page))
+    if page_count <= 1:
+        return message
+
+    controls = [
+        "\N{LEFTWARDS BLACK ARROW}\N{VARIATION SELECTOR-16}",
+        "\N{CROSS MARK}",
+        "\N{BLACK RIGHTWARDS ARROW}\N{VARIATION SELECTOR-16}",
+    ]
+    start_adding_reactions(message, controls)
+    while True:
+        pred = ReactionPredicate.with_emojis(controls, message, ctx.author)
+        try:
+            await ctx.bot.wait_for("reaction_add", check=pred, timeout=timeout)
+        except asyncio.TimeoutError:
+            break
+
+        if pred.result == 1:
+            break
+
+        page = (page + (1 if pred.result == 2 else -1)) % page_count
+        with contextlib.suppress(discord.HTTPException):
+            await message.remove_reaction(controls[pred.result], ctx.author)
+        await message.edit(embed=get(page))
+
+    with contextlib.suppress(discord.HTTPException):
+        await message.clear_reactions()
+    return message
+
+
 # ______________ checks ______________
 
 
@@ -1,10 +1,20 @@
 import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional
 
 import discord
 from redbot.core import Config
 from redbot.core.utils.chat_formatting import humanize_list
 
 from .models import EndedGiveaway, Giveaway, PendingGiveaway, Requirements
+from .templates import GuildTemplates
+
+log = logging.getLogger("red.ashcogs.giveaways")
+
+REHYDRATE_CHUNK_SIZE = 50
+
+GIVEAWAY_KEYS = ("activegaws", "endedgaws", "pendinggaws")
 
 
 class conf:
@@ -32,6 +42,11 @@ class conf:
             "blacklist": [],
             "bypass": [],
             "top_managers": {},
+            # partitioned processes save their guilds' giveaways here instead of globally.
+            "activegaws": [],
+            "endedgaws": [],
+            "pendinggaws": [],
+            "partitioned_store": False,
         }
 
         default_role = {"multi": 0}
@@ -41,17 +56,23 @@ class conf:
             "endedgaws": [],
             "pendinggaws": [],
             "already_sent": False,
+            "partitioned": False,
         }
 
         self.config.register_guild(**default_guild)
         self.config.register_global(**default_global)
         self.config.register_role(**default_role)
 
+        self._templates: Dict[int, GuildTemplates] = {}
+
     async def _sent_message(self, b: bool = None):
         if not b:
             return await self.config.already_sent()
         await self.config.already_sent.set(True)
 
+    async def set_partitioned(self, b: bool):
+        await self.config.partitioned.set(b)
+
     async def get_guild_timer(self, guild: discord.Guild):
         return await self.config.guild(guild).edit_timer()
 
@@ -90,6 +111,22 @@ class conf:
     async def get_guild_emoji(self, guild: discord.Guild):
         return await self.config.guild(guild).emoji()
 
+    async def get_templates(self, guild: discord.Guild) -> GuildTemplates:
+        if not (templates := self._templates.get(guild.id)):
+            data = await self.config.guild(guild).all()
+            templates = self._templates[guild.id] = GuildTemplates(
+                msg=data["msg"],
+                endmsg=data["endmsg"],
+                tmsg=data["tmsg"],
+                emoji=data["emoji"],
+                edit_timer=data["edit_timer"],
+            )
+
+        return templates
+
+    def invalidate_templates(self, guild: discord.Guild):
+        self._templates.pop(guild.id, None)
+
     async def get_all_roles_multi(self, guild: discord.Guild):
         roles = await self.config.all_roles()
         final = {}
@@ -126,16 +163,20 @@ class conf:
         return f"Set the role multi for role: `@{role.name}` to {multi}"
 
     async def set_guild_msg(self, guild: discord.Guild, message):
-        return await self.config.guild(guild).msg.set(message)
+        await self.config.guild(guild).msg.set(message)
+        self.invalidate_templates(guild)
 
     async def set_guild_emoji(self, guild: discord.Guild, emoji):
-        return await self.config.guild(guild).emoji.set(str(emoji))
+        await self.config.guild(guild).emoji.set(str(emoji))
+        self.invalidate_templates(guild)
 
     async def set_guild_tmsg(self, guild: discord.Guild, message):
-        return await self.config.guild(guild).tmsg.set(message)
+        await self.config.guild(guild).tmsg.set(message)
+        self.invalidate_templates(guild)
 
     async def set_guild_endmsg(self, guild: discord.Guild, message):
-        return await self.config.guild(guild).endmsg.set(message)
+        await self.config.guild(guild).endmsg.set(message)
+        self.invalidate_templates(guild)
 
     async def set_guild_windm(self, guild: discord.Guild, status: bool):
         return await self.config.guild(guild).winnerdm.set(status)
@@ -156,7 +197,8 @@ class conf:
         return True
 
     async def set_guild_timer(self, guild: discord.Guild, b: bool):
-        return await self.config.guild(guild).edit_timer.set(b)
+        await self.config.guild(guild).edit_timer.set(b)
+        self.invalidate_templates(guild)
 
     async def reset_role_multi(self, role: discord.Role):
         await self.config.role(role).multi.set(0)
@@ -238,54 +280,135 @@ class conf:
                 for _id in by
             ]
 
-    async def cache_to_config(self):
-        active = self.cache.copy()
-        ended = self.ended_cache.copy()
-        pending = self.pending_cache.copy()
-        await self.config.activegaws.set([i.to_dict() for i in active])
-        await self.config.endedgaws.set([i.to_dict() for i in ended])
-        await self.config.pendinggaws.set([i.to_dict() for i in pending])
+    async def _stored_giveaways(self) -> Dict[str, Dict[Optional[int], list]]:
+        # every saved giveaway grouped by guild, the guilds saved by a partitioned process
+        # take their own scope's lists over whatever is left of them in the global ones.
+        guilds = await self.config.all_guilds()
+        stored = {g for g, data in guilds.items() if data.get("partitioned_store")}
+        giveaways = {}
+        for key in GIVEAWAY_KEYS:
+            grouped = giveaways[key] = {g: list(guilds[g][key]) for g in stored}
+            for i in await self.config.get_attr(key)():
+                if i.get("guild") not in stored:
+                    grouped.setdefault(i.get("guild"), []).append(i)
+
+        return giveaways
+
+    async def cache_to_config(self, owns: Callable[[int], bool] = None):
+        """
+        Save the caches to config.
+
+        `owns` is passed in partitioned mode. Only the guilds it's true for are saved then,
+        each to their own guild scope, so processes don't overwrite each other's giveaways."""
+        cached = {
+            "activegaws": [i.to_dict() for i in self.cache.copy()],
+            "endedgaws": [i.to_dict() for i in self.ended_cache.copy()],
+            "pendinggaws": [i.to_dict() for i in self.pending_cache.copy()],
+        }
+        if owns is None:
+            for key, giveaways in cached.items():
+                await self.config.get_attr(key).set(giveaways)
+            # everything is in the global lists again.
+            for guild_id, data in (await self.config.all_guilds()).items():
+                if data.get("partitioned_store"):
+                    group = self.config.guild_from_id(guild_id)
+                    for key in GIVEAWAY_KEYS:
+                        await group.get_attr(key).clear()
+                    await group.partitioned_store.clear()
+            return
+
+        guild_ids = {g for grouped in (await self._stored_giveaways()).values() for g in grouped}
+        guild_ids.update(i.get("guild") for giveaways in cached.values() for i in giveaways)
+        for guild_id in guild_ids:
+            if guild_id is None or not owns(guild_id):
+                continue  # giveaways without a guild stay in the global lists.
+            group = self.config.guild_from_id(guild_id)
+            for key, giveaways in cached.items():
+                await group.get_attr(key).set([i for i in giveaways if i.get("guild") == guild_id])
+            await group.partitioned_store.set(True)
+
+    @staticmethod
+    async def _deserialise(raw: list, model, bot, cog, chunk_size: int = REHYDRATE_CHUNK_SIZE):
+        # builds giveaway objects a chunk at a time and hands control back
+        # to the event loop in between so big caches don't block startup.
+        for index, i in enumerate(raw, 1):
+            # a broken record is logged and skipped instead of stopping everything after it.
+            try:
+                guild = i.pop("guild", None)
+                i["requirements"] = Requirements(
+                    guild=bot.get_guild(guild) if guild else None, **i["requirements"]
+                )
+                giveaway = model(bot=bot, cog=cog, guild=guild, **i)
+            except Exception as e:
+                log.exception(f"Failed to load a {model.__name__} from config.", exc_info=e)
+            else:
+                yield giveaway
+
+            if not index % chunk_size:
+                await asyncio.sleep(0)
 
     async def config_to_cache(self, bot, cog):
+        """
+        Load giveaways from config straight into the cog's caches.
+
+        This is meant to be run as a background task after the cog has been added
+        so that commands are usable while the giveaways are still being loaded.
+        Giveaways that should've ended while the bot was down are handed to the cog's
+        catch up queue instead of waiting for the end loop."""
+        started = time.perf_counter()
+        self.cache = cog.giveaway_cache
+        self.ended_cache = cog.ended_cache
+        self.pending_cache = cog.pending_cache
+        overdue = 0
+        owns = cog.owns if cog.partitioned else None
+        raw = {}
+        for key, grouped in (await self._stored_giveaways()).items():
+            raw[key] = [
+                i
+                for guild_id, giveaways in grouped.items()
+                if owns is None or (guild_id is not None and owns(guild_id))
+                for i in giveaways
+            ]
+
+        # other processes might have already ended some of these, those go to the ended ones.
+        finished = {}
+        if cog.partitioned:
+            finished = await cog.leases.finished(i["message"] for i in raw["activegaws"])
+            ended_ids = {i["message"] for i in raw["endedgaws"]}
+            raw["endedgaws"].extend(
+                ended
+                for message_id, ended in finished.items()
+                if ended and message_id not in ended_ids
+            )
+
         # active giveaway caching
-        org = await self.config.activegaws()
-        if org:
-            for i in org:
-                i.update(
-                    {
-                        "requirements": Requirements(
-                            guild=bot.get_guild(i["guild"]), **i["requirements"]
-                        )
-                    }
-                )
-                i.pop("guild")
-            self.cache = [Giveaway(bot=bot, cog=cog, **i) for i in org]
+        async for giveaway in self._deserialise(raw["activegaws"], Giveaway, bot, cog):
+            if giveaway.message_id in finished:
+                continue
+            self.cache.append(giveaway)
+            cog.index.add(giveaway)
+            if giveaway.remaining_time == 0:
+                cog.queue_catch_up(giveaway)
+                overdue += 1
 
         # ended giveaway caching
-        org = await self.config.endedgaws()
-        if org:
-            for i in org:
-                i.update(
-                    {
-                        "requirements": Requirements(
-                            guild=bot.get_guild(i["guild"]), **i["requirements"]
-                        )
-                    }
-                )
-                i.pop("guild")
-            self.ended_cache = [EndedGiveaway(bot=bot, cog=cog, **i) for i in org]
+        async for giveaway in self._deserialise(raw["endedgaws"], EndedGiveaway, bot, cog):
+            self.ended_cache.append(giveaway)
+            cog.index.add(giveaway)
 
         # pending giveaway caching
-        org = await self.config.pendinggaws()
-        if org:
-            for i in org:
-                i.update(
-                    {
-                        "requirements": Requirements(
-                            guild=bot.get_guild(i.get("guild")) if i.get("guild") else None,
-                            **i["requirements"],
-                        )
-                    }
-                )
-                i.pop("guild")
-            self.pending_cache = [PendingGiveaway(bot=bot, cog=cog, **i) for i in org]
+        async for giveaway in self._deserialise(raw["pendinggaws"], PendingGiveaway, bot, cog):
+            self.pending_cache.append(giveaway)
+
+        stats = {
+            "active": len(self.cache),
+            "ended": len(self.ended_cache),
+            "pending": len(self.pending_cache),
+            "overdue": overdue,
+            "seconds": time.perf_counter() - started,
+        }
+        log.info(
+            "Rehydrated {active} active ({overdue} overdue), {ended} ended and {pending} pending "
+            "giveaways in {seconds:.2f}s.".format(**stats)
+        )
+        return stats
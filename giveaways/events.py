@@ -1,14 +1,23 @@
 import asyncio
+import logging
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Set
 
 import discord
 from amari import AmariClient
 from discord.ext import tasks
 from redbot.core import commands
+from redbot.core.data_manager import cog_data_path
 
 from .confhandler import conf
 from .models import EndedGiveaway, Giveaway, PendingGiveaway
+from .ownership import GiveawayLeases, shard_id_for
+from .replay import ReactionRecorder
+from .search import GiveawayIndex
+
+log = logging.getLogger("red.ashcogs.giveaways")
+
+CATCH_UP_CONCURRENCY = 3
 
 
 class main(commands.Cog):
@@ -19,14 +28,36 @@ class main(commands.Cog):
         self.giveaway_cache: List[Giveaway] = []
         self.ended_cache: List[EndedGiveaway] = []
         self.pending_cache: List[PendingGiveaway] = []
+        self.index = GiveawayIndex()
+
+        # giveaways that ended while the bot was down get ended by these workers
+        # instead of waiting on the end loop to get to them one by one.
+        self._catch_up_queue: "asyncio.Queue[Giveaway]" = asyncio.Queue()
+        self._catching_up: Set[int] = set()
+        self._catch_up_workers: List[asyncio.Task] = [
+            asyncio.create_task(self._catch_up_worker()) for _ in range(CATCH_UP_CONCURRENCY)
+        ]
+        self._rehydrate_task: Optional[asyncio.Task] = None
+
+        # when partitioned, every process only ends giveaways for guilds on its own shards
+        # and the leases make sure a giveaway never gets ended twice.
+        self.partitioned: bool = False
+        self.leases = GiveawayLeases(cog_data_path(self) / "leases.sqlite3")
+        self.recorder: Optional[ReactionRecorder] = None
 
     def cog_unload(self):
         async def stop() -> asyncio.Task:
             self.edit_minutes_task.cancel()
+            if self._rehydrate_task and not self._rehydrate_task.done():
+                await self._rehydrate_task  # don't save a half loaded cache over the config.
+            for worker in self._catch_up_workers:
+                worker.cancel()
+            if self.recorder:
+                self.recorder.close()
             self.config.cache = self.giveaway_cache
             self.config.ended_cache = self.ended_cache
             self.config.pending_cache = self.pending_cache
-            await self.config.cache_to_config()
+            await self.config.cache_to_config(self.owns if self.partitioned else None)
             if getattr(self.bot, "amari", None):
                 await self.bot.amari.close()
 
@@ -62,14 +93,94 @@ You can then set the amari api key with the `[p]set api amari auth,<api key>` co
                     await s.config._sent_message(True)
 
         s.amari = getattr(bot, "amari", None)
-        await s.config.config_to_cache(bot, s)
-        s.giveaway_cache = s.config.cache
-        s.ended_cache = s.config.ended_cache
-        s.pending_cache = s.config.pending_cache
+        s.partitioned = await s.config.config.partitioned()
+        s._rehydrate_task = asyncio.create_task(s.config.config_to_cache(bot, s))
         return s
 
+    def owns(self, guild_id: int) -> bool:
+        if not self.partitioned or not (shard_ids := getattr(self.bot, "shard_ids", None)):
+            return True
+
+        return shard_id_for(guild_id, self.bot.shard_count) in shard_ids
+
+    def owns_giveaway(self, giveaway: Giveaway) -> bool:
+        if not self.partitioned:
+            return True
+
+        channel = giveaway.channel  # this is None if the guild is on another process' shards.
+        return channel is not None and self.owns(channel.guild.id)
+
+    async def end_giveaway(self, giveaway: Giveaway, canceller=None):
+        if not self.partitioned:
+            return await giveaway.end(canceller)
+
+        if not self.owns_giveaway(giveaway) or not await self.leases.claim(giveaway.message_id):
+            return
+
+        # ending can take a while with big giveaways so keep the lease from expiring meanwhile.
+        renewer = asyncio.create_task(self._renew_lease(giveaway.message_id))
+        try:
+            result = await giveaway.end(canceller)
+        except Exception:
+            await self.leases.release(giveaway.message_id)
+            raise
+        finally:
+            renewer.cancel()
+
+        ended = next(
+            (i for i in reversed(self.ended_cache) if i.message_id == giveaway.message_id), None
+        )
+        if not await self.leases.finish(giveaway.message_id, ended and ended.to_dict()):
+            log.error(
+                f"Lost the lease for giveaway {giveaway.message_id} while ending it, "
+                "another process might end it again."
+            )
+        return result
+
+    async def _renew_lease(self, message_id: int):
+        while True:
+            await asyncio.sleep(self.leases.ttl / 3)
+            if not await self.leases.renew(message_id):
+                log.error(f"Couldn't renew the lease for giveaway {message_id} while ending it.")
+                return
+
+    def track_giveaway(self, giveaway: Giveaway):
+        self.giveaway_cache.append(giveaway)
+        self.index.add(giveaway)
+
+    def untrack_giveaway(self, giveaway: Giveaway):
+        self.giveaway_cache.remove(giveaway)
+        self.index.remove(giveaway.message_id)
+
+    def mark_ended(self, giveaway: Giveaway, ended: EndedGiveaway):
+        self.giveaway_cache.remove(giveaway)
+        self.ended_cache.append(ended)
+        self.index.add(ended)  # replaces the active one since they share the message id.
+
+    def queue_catch_up(self, giveaway: Giveaway):
+        self._catching_up.add(giveaway.message_id)
+        self._catch_up_queue.put_nowait(giveaway)
+
+    async def _catch_up_worker(self):
+        await self.bot.wait_until_red_ready()
+        while True:
+            giveaway = await self._catch_up_queue.get()
+            try:
+                if giveaway in self.giveaway_cache:
+                    await self.end_giveaway(giveaway)
+            except Exception as e:
+                log.exception(
+                    f"Failed to end overdue giveaway with id {giveaway.message_id}.", exc_info=e
+                )
+            finally:
+                # if it failed, the end loop will pick it up again.
+                self._catching_up.discard(giveaway.message_id)
+                self._catch_up_queue.task_done()
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        if self.recorder:
+            self.recorder.record_reaction(payload)
         data = self.giveaway_cache
         if payload.member.bot or not payload.guild_id:
             return
@@ -197,11 +308,15 @@ You can then set the amari api key with the `[p]set api amari auth,<api key>` co
         active_data = self.giveaway_cache.copy()
         pending_data = self.pending_cache.copy()
         for i in active_data:
+            if i.message_id in self._catching_up or not self.owns_giveaway(i):
+                continue
             await i.edit_timer()
             if i.remaining_time == 0:
-                await i.end()
+                await self.end_giveaway(i)
 
         for i in pending_data:
+            if not self.owns_giveaway(i):
+                continue
             if i.remaining_time_to_start == 0:
                 await i.start_giveaway()
                 self.pending_cache.remove(i)
@@ -1,6 +1,5 @@
 import asyncio
 import contextlib
-import datetime
 import logging
 import random
 import time as _time
@@ -8,15 +7,18 @@ import typing
 
 import discord
 from redbot.core import commands
-from redbot.core.utils.chat_formatting import humanize_list, humanize_timedelta, pagify
+from redbot.core.data_manager import cog_data_path
+from redbot.core.utils.chat_formatting import box, humanize_list, humanize_timedelta, pagify
 from redbot.core.utils.menus import DEFAULT_CONTROLS, menu, start_adding_reactions
 from redbot.core.utils.predicates import ReactionPredicate
 
+from .events import main
 from .gset import gsettings
-from .models import Giveaway, PendingGiveaway, Requirements, SafeMember
+from .models import EndedGiveaway, Giveaway, PendingGiveaway, Requirements
+from .replay import ReactionRecorder, ReactionReplayer, format_report
 from .util import (
-    Coordinate,
     Flags,
+    SearchFlags,
     TimeConverter,
     WinnerConverter,
     ask_for_answers,
@@ -45,11 +47,14 @@ class giveaways(gsettings, name="Giveaways"):
         super().__init__(bot)
 
     async def red_delete_data_for_user(self, *, requester, user_id: int):
-        if not self.giveaway_cache:
-            return
         for i in self.giveaway_cache.copy():
-            if i.host.id == user_id:
-                self.giveaway_cache.remove(i)
+            if i._host == user_id:
+                self.untrack_giveaway(i)
+
+        for i in self.ended_cache.copy():
+            if i._host == user_id:
+                self.ended_cache.remove(i)
+                self.index.remove(i.message_id)
 
     def format_help_for_context(self, ctx: commands.Context) -> str:
         pre_processed = super().format_help_for_context(ctx) or ""
@@ -227,99 +232,23 @@ class giveaways(gsettings, name="Giveaways"):
                 requirements,
                 prize,
                 flags,
+                ctx.guild.id,
             )
             self.pending_cache.append(pg)
             return await ctx.send(f"Giveaway for `{pg.prize}` will start in <t:{pg.start}:R>")
 
-        emoji = await self.config.get_guild_emoji(ctx.guild)
-        endtime = ctx.message.created_at + datetime.timedelta(seconds=time)
-
-        embed = discord.Embed(
-            title=prize.center(len(prize) + 4, "*"),
-            description=(
-                f"React with {emoji} to enter\n"
-                f"Host: {ctx.author.mention}\n"
-                f"Ends {f'<t:{int(_time.time()+time)}:R>' if not await self.config.get_guild_timer(ctx.guild) else f'in {humanize_timedelta(seconds=time)}'}\n"
-            ),
-            timestamp=endtime,
-        ).set_footer(text=f"Winners: {winners} | ends : ", icon_url=ctx.guild.icon_url)
-
-        message = await self.config.get_guild_msg(ctx.guild)
-
-        # flag handling below!!
-
-        if donor := flags.get("donor"):
-            embed.add_field(name="**Donor:**", value=f"{donor.mention}", inline=False)
-        ping = flags.get("ping")
-        no_multi = flags.get("no_multi")
-        no_defaults = flags.get("no_defaults")
-        donor_join = not flags.get("no_donor")
-        msg = flags.get("msg")
-        thank = flags.get("thank")
-        if no_defaults:
-            requirements = requirements.no_defaults(True)  # ignore defaults.
-
-        if not no_defaults:
-            requirements = requirements.no_defaults()  # defaults will be used!!!
-
-        if not requirements.null:
-            embed.add_field(name="Requirements:", value=str(requirements), inline=False)
-
-        gembed = await messagable.send(message, embed=embed)
-        await gembed.add_reaction(emoji)
-
-        if ping:
-            pingrole = await self.config.get_pingrole(ctx.guild)
-            ping = (
-                pingrole.mention
-                if pingrole
-                else f"No pingrole set. Use `{ctx.prefix}gset pingrole` to add a pingrole"
-            )
-
-        if msg and ping:
-            membed = discord.Embed(
-                description=f"***Message***: {msg}", color=discord.Color.random()
-            )
-            await messagable.send(
-                ping, embed=membed, allowed_mentions=discord.AllowedMentions(roles=True)
-            )
-        elif ping and not msg:
-            await messagable.send(ping)
-        elif msg and not ping:
-            membed = discord.Embed(
-                description=f"***Message***: {msg}", color=discord.Color.random()
-            )
-            await messagable.send(embed=membed)
-        if thank:
-            tmsg: str = await self.config.get_guild_tmsg(ctx.guild)
-            embed = discord.Embed(
-                description=tmsg.format_map(
-                    Coordinate(
-                        donor=SafeMember(donor) if donor else SafeMember(ctx.author),
-                        prize=prize,
-                    )
-                ),
-                color=0x303036,
-            )
-            await messagable.send(embed=embed)
-
-        data = {
-            "donor": donor.id if donor else None,
-            "donor_can_join": donor_join,
-            "use_multi": not no_multi,
-            "message": gembed.id,
-            "emoji": emoji,
-            "channel": channel.id if channel else ctx.channel.id,
-            "cog": self,
-            "time": _time.time() + time,
-            "winners": winners,
-            "requirements": requirements,
-            "prize": prize,
-            "host": ctx.author.id,
-            "bot": self.bot,
-        }
-        giveaway = Giveaway(**data)
-        self.giveaway_cache.append(giveaway)
+        await Giveaway.create(
+            self.bot,
+            self,
+            channel=messagable,
+            host=ctx.author,
+            prize=prize,
+            winners=winners,
+            end_time=_time.time() + time,
+            requirements=requirements,
+            flags=flags,
+            prefix=ctx.prefix,
+        )
 
     async def message_reply(self, message: discord.Message) -> discord.Message:
         if not message.reference:
@@ -379,7 +308,7 @@ class giveaways(gsettings, name="Giveaways"):
             if pred.result:
                 for i in activegaw.copy():
                     if i.guild == ctx.guild:
-                        await i.end()
+                        await self.end_giveaway(i)
                 return await ctx.send("All giveaways have been ended.")
 
             else:
@@ -390,7 +319,7 @@ class giveaways(gsettings, name="Giveaways"):
             return await ctx.send("There is no active giveaway with that ID.")
 
         else:
-            await e[0].end()
+            await self.end_giveaway(e[0])
 
     @giveaway.command(name="reroll")
     @is_gwmanager()
@@ -451,10 +380,57 @@ class giveaways(gsettings, name="Giveaways"):
         Clear the giveaway cache in the bot.
 
         This will abandon all ongoing giveaways and leave them as is"""
-        self.giveaway_cache.clear()
+        for i in self.giveaway_cache.copy():
+            self.untrack_giveaway(i)
 
         await ctx.send("Cleared all giveaway data.")
 
+    @giveaway.command(name="record", hidden=True)
+    @commands.is_owner()
+    async def record(self, ctx, start_or_stop: str):
+        """
+        Record reactions on active giveaways to replay them later with `[p]giveaway replay`.
+
+        This records every reaction on every active giveaway until it's stopped."""
+        if start_or_stop.lower() not in ["start", "stop"]:
+            return await ctx.send_help("giveaway record")
+
+        if start_or_stop.lower() == "start":
+            if self.recorder:
+                return await ctx.send("Already recording.")
+            path = cog_data_path(self) / "recordings"
+            path.mkdir(exist_ok=True)
+            self.recorder = ReactionRecorder(
+                path / f"{int(_time.time())}.jsonl", self.giveaway_cache.copy()
+            )
+            return await ctx.send(f"Started recording to `{self.recorder.path.name}`.")
+
+        if not self.recorder:
+            return await ctx.send("Not recording right now.")
+        recorder, self.recorder = self.recorder, None
+        recorder.close()
+        await ctx.send(f"Recorded {recorder.recorded} reactions to `{recorder.path.name}`.")
+
+    @giveaway.command(name="replay", hidden=True)
+    @commands.is_owner()
+    async def replay(self, ctx, recording: str = None, speed: float = 1.0):
+        """
+        Replay a recording made with `[p]giveaway record` against fake discord objects.
+
+        Nothing is actually sent to discord. [speed] speeds up the recorded timings,
+        pass 0 to fire every reaction at once.
+        Shows handler latency, event loop lag and the amount of REST calls it would've made."""
+        path = cog_data_path(self) / "recordings"
+        recordings = sorted(p.name for p in path.glob("*.jsonl")) if path.exists() else []
+        if not recording or recording not in recordings:
+            return await ctx.send("Available recordings:\n" + box("\n".join(recordings) or "None"))
+
+        async with ctx.typing():
+            report = await ReactionReplayer(path / recording, speed=speed).run(
+                main.on_raw_reaction_add
+            )
+        await ctx.send(box(format_report(report)))
+
     async def active_giveaways(self, ctx, per_guild: bool = False):
         data = self.giveaway_cache.copy()
         failed = ""
@@ -468,7 +444,7 @@ class giveaways(gsettings, name="Giveaways"):
 
             if not msg:
                 failed += f"\nMessage with id `{i.message_id}` was not found. Removing from cache."
-                self.giveaway_cache.remove(i)
+                self.untrack_giveaway(i)
                 continue
 
             try:
@@ -480,7 +456,7 @@ class giveaways(gsettings, name="Giveaways"):
     """
             except Exception as e:
                 failed += f"There was an error with the giveaway `{i.message_id}` so it was removed:\n{e}\n"
-                self.giveaway_cache.remove(i)
+                self.untrack_giveaway(i)
                 continue
 
         return final, failed
@@ -594,6 +570,62 @@ Ends at: {endsat}
 
                 await ctx.send(embed=embed)
 
+    @giveaway.command(name="search", usage="[flags]")
+    @commands.guild_only()
+    @is_gwmanager()
+    @commands.bot_has_permissions(embed_links=True)
+    async def gsearch(self, ctx: commands.Context, *, flags: SearchFlags = {}):
+        """
+        Search through this server's active and ended giveaways.
+
+        All the given flags must match for a giveaway to show up.
+        Passing no flags shows every giveaway, newest first.
+
+        Flags:
+            `--host <user>` giveaways hosted by this user.
+            `--donor <user>` giveaways donated by this user.
+            `--channel <channel>` giveaways in this channel.
+            `--prize <words>` giveaways whose prize contains all these words.
+            `--after <date/time>` and `--before <date/time>` giveaways ending (or that ended) in this range.
+            `--active` or `--ended` only active or ended giveaways.
+
+        Example:
+            `[p]giveaway search --host @someone --prize nitro --after 1 january 2022`"""
+        results = self.index.search(ctx.guild.id, **flags)
+        if not results:
+            return await ctx.send("No giveaways matched your search.")
+
+        per_page = 10
+        pages = []
+        for start in range(0, len(results), per_page):
+            lines = []
+            for i in results[start : start + per_page]:
+                link = f"https://discord.com/channels/{ctx.guild.id}/{i._channel}/{i.message_id}"
+                if isinstance(i, EndedGiveaway):
+                    when = f"Ended <t:{i.ended_at}:R>" if i.ended_at else "Ended"
+                else:
+                    when = f"Ends <t:{int(i._time)}:R>"
+                lines.append(
+                    f"**[{i.prize}]({link})**\n"
+                    f"Hosted by <@{i._host}> in <#{i._channel}> with {i.winners} winner(s). {when}"
+                )
+            pages.append("\n\n".join(lines))
+
+        embeds = []
+        for page_no, page in enumerate(pages, 1):
+            embed = discord.Embed(
+                title=f"Found {len(results)} giveaway(s)!",
+                description=page,
+                color=discord.Color.blurple(),
+            )
+            embed.set_author(name=ctx.guild.name, icon_url=ctx.guild.icon_url)
+            embed.set_footer(text=f"Page {page_no}/{len(pages)}")
+            embeds.append(embed)
+
+        if len(embeds) == 1:
+            return await ctx.send(embed=embeds[0])
+        await menu(ctx, embeds, DEFAULT_CONTROLS)
+
     @giveaway.command(name="top")
     @commands.cooldown(1, 10, commands.BucketType.guild)
     @commands.bot_has_permissions(embed_links=True)
@@ -291,6 +291,24 @@ class gsettings(main):
             f"Editing timers for giveaways has been {'enabled' if enable_or_disable else 'disabled'}."
         )
 
+    @gset.command(name="partition")
+    @commands.is_owner()
+    async def partition(self, ctx, enable_or_disable: bool):
+        """
+        Configure whether giveaway ending is split by shard between processes.
+
+        Enable this only if you run your bot's shards across multiple processes sharing
+        the same data directory. Each process will then only end giveaways for the guilds
+        on its own shards and a shared lease file makes sure a giveaway never gets ended twice.
+        Every process also only saves the giveaways of its own guilds, separately per guild.
+
+        This is a global setting and needs to be enabled in every process."""
+        await self.config.set_partitioned(enable_or_disable)
+        self.partitioned = enable_or_disable
+        return await ctx.send(
+            f"Partitioned giveaway ending has been {'enabled' if enable_or_disable else 'disabled'}."
+        )
+
     @gset.command(name="showsettings", aliases=["ss", "show", "showset"])
     @commands.admin_or_permissions(administrator=True)
     @commands.bot_has_permissions(embed_links=True)
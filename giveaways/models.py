@@ -1,7 +1,6 @@
 import random
 import time
 from collections import Counter
-from datetime import datetime, timedelta
 from enum import Enum
 from functools import reduce
 from typing import Dict, List, Optional, Union
@@ -11,9 +10,7 @@ from discord.ext.commands.converter import RoleConverter
 from discord.ext.commands.errors import BadArgument, RoleNotFound
 from redbot.core import commands
 from redbot.core.bot import Red
-from redbot.core.utils.chat_formatting import humanize_list, humanize_timedelta
-
-from .util import Coordinate
+from redbot.core.utils.chat_formatting import humanize_list
 
 
 class EndReason(Enum):
@@ -222,6 +219,7 @@ class BaseGiveaway:
         channel=None,
         requirements=None,
         winners=None,
+        guild=None,
     ) -> None:
         self.bot: Red = bot
         self.cog = cog
@@ -231,6 +229,7 @@ class BaseGiveaway:
         self._channel: int = channel
         self.requirements: Requirements = requirements
         self.winners: int = winners
+        self._guild: Optional[int] = guild
 
     def __getitem__(self, key):
         attr = getattr(self, key, None)
@@ -251,6 +250,13 @@ class BaseGiveaway:
     def guild(self) -> discord.Guild:
         return self.channel.guild
 
+    @property
+    def guild_id(self) -> Optional[int]:
+        # the channel isn't available until the bot is ready, the stored id always is.
+        if self._guild:
+            return self._guild
+        return channel.guild.id if (channel := self.channel) else None
+
     @property
     def remaining_time(self) -> int:
         if self._time > int(time.time()):
@@ -282,8 +288,9 @@ class Giveaway(BaseGiveaway):
         use_multi: bool = True,
         donor: Optional[int] = None,
         donor_can_join: bool = True,
+        guild: Optional[int] = None,
     ):
-        super().__init__(bot, cog, prize, time, host, channel, requirements, winners)
+        super().__init__(bot, cog, prize, time, host, channel, requirements, winners, guild)
         self.message_id = message
         self.emoji = emoji or "🎉"
         self.use_multi = use_multi
@@ -295,6 +302,97 @@ class Giveaway(BaseGiveaway):
     def __hash__(self) -> int:
         return self.message_id
 
+    @classmethod
+    async def create(
+        cls,
+        bot: Red,
+        cog,
+        *,
+        channel: discord.TextChannel,
+        host: discord.Member,
+        prize: str,
+        winners: int,
+        end_time: float,
+        requirements: Requirements,
+        flags: dict,
+        prefix: str,
+    ) -> "Giveaway":
+        """
+        Send a new giveaway to `channel` along with the extra messages its flags ask for
+        and add it to the cog's active giveaways."""
+        guild = channel.guild
+        templates = await cog.config.get_templates(guild)
+
+        # flag handling below!!
+
+        donor = flags.get("donor")
+        ping = flags.get("ping")
+        msg = flags.get("msg")
+        if flags.get("no_defaults"):
+            requirements = requirements.no_defaults(True)  # ignore defaults.
+
+        else:
+            requirements = requirements.no_defaults()  # defaults will be used!!!
+
+        gembed = await channel.send(
+            **templates.start(
+                guild=guild,
+                host=host,
+                prize=prize,
+                winners=winners,
+                ends_at=end_time,
+                requirements=requirements,
+                donor=donor,
+            )
+        )
+        await gembed.add_reaction(templates.emoji)
+
+        if ping:
+            pingrole = await cog.config.get_pingrole(guild)
+            ping = (
+                pingrole.mention
+                if pingrole
+                else f"No pingrole set. Use `{prefix}gset pingrole` to add a pingrole"
+            )
+
+        if msg and ping:
+            membed = discord.Embed(
+                description=f"***Message***: {msg}", color=discord.Color.random()
+            )
+            await channel.send(
+                ping, embed=membed, allowed_mentions=discord.AllowedMentions(roles=True)
+            )
+        elif ping and not msg:
+            await channel.send(ping)
+        elif msg and not ping:
+            membed = discord.Embed(
+                description=f"***Message***: {msg}", color=discord.Color.random()
+            )
+            await channel.send(embed=membed)
+        if flags.get("thank"):
+            await channel.send(**templates.thank(donor=SafeMember(donor or host), prize=prize))
+
+        giveaway = cls(
+            bot=bot,
+            cog=cog,
+            donor=donor.id if donor else None,
+            donor_can_join=not flags.get("no_donor"),
+            use_multi=not flags.get("no_multi"),
+            message=gembed.id,
+            emoji=templates.emoji,
+            channel=channel.id,
+            time=end_time,
+            winners=winners,
+            requirements=requirements,
+            prize=prize,
+            host=host.id,
+            guild=guild.id,
+        )
+        cog.track_giveaway(giveaway)
+        if recorder := getattr(cog, "recorder", None):
+            recorder.record_giveaway(giveaway)
+        return giveaway
+
     @property
     def donor(self) -> discord.Member:
         return self.guild.get_member(self._donor)
@@ -359,19 +457,21 @@ class Giveaway(BaseGiveaway):
                     return False
 
     async def edit_timer(self):
-        if not (t := self.next_edit) or not await self.cog.config.get_guild_timer(self.guild):
+        if not (t := self.next_edit) or t > time.time():
             return
 
-        if t > time.time():
+        templates = await self.cog.config.get_templates(self.guild)
+        if not templates.edit_timer:
             return
 
         message = await self.get_message()
-        embed: discord.Embed = message.embeds[0]
-        timer_pos = embed.description.find("in") + 3
-        embed.description = embed.description[:timer_pos] + humanize_timedelta(
-            seconds=self.remaining_time
+        if not message:
+            return
+        await message.edit(
+            **templates.timer_update(
+                message.embeds[0], emoji=self.emoji, host_id=self._host, ends_at=self._time
+            )
         )
-        await message.edit(embed=embed)
         self.next_edit = self.get_next_edit_time()
 
     async def end(self, canceller=None) -> None:
@@ -384,13 +484,15 @@ class Giveaway(BaseGiveaway):
             "prize": self.prize,
             "requirements": self.requirements,
             "winnersno": self.winners,
+            "donor": self._donor,
+            "ended_at": int(time.time()),
+            "guild": self.guild_id,
         }
         msg = await self.get_message()
         if not msg:
             await self.channel.send(
                 f"Can't find message with id: {self.message_id}. Removing id from active giveaways."
             )
-            self.cog.giveaway_cache.remove(self)
             end_data.update(
                 {
                     "winnerslist": [],
@@ -399,16 +501,15 @@ class Giveaway(BaseGiveaway):
                     ),
                 }
             )
-            self.cog.ended_cache.append(EndedGiveaway(**end_data))
+            self.cog.mark_ended(self, EndedGiveaway(**end_data))
             return
         guild = self.guild
         winners = self.winners
-        embed = msg.embeds[0]
         prize = self.prize
         host = self._host
         winnerdm = await self.cog.config.dm_winner(guild)
         hostdm = await self.cog.config.dm_host(guild)
-        endmsg: str = await self.cog.config.get_guild_endmsg(guild)
+        templates = await self.cog.config.get_templates(guild)
         channel = msg.channel
         gmsg = msg
         entrants = (
@@ -436,19 +537,17 @@ class Giveaway(BaseGiveaway):
         link = gmsg.jump_url
 
         if len(entrants) == 0 or winners == 0:
-            embed = gmsg.embeds[0]
-            embed.description = (
-                f"This giveaway has ended.\nThere were 0 winners.\n**Host:** <@{host}>"
-            )
-            embed.set_footer(
-                text=f"{msg.guild.name} - Winners: {winners}", icon_url=msg.guild.icon_url
+            edit, reply = templates.end(
+                gmsg.embeds[0],
+                guild=msg.guild,
+                host_id=host,
+                winners=winners,
+                prize=prize,
+                link=link,
             )
-            await gmsg.edit(embed=embed)
+            await gmsg.edit(**edit)
 
-            await gmsg.reply(
-                f"The giveaway for ***{prize}*** has ended. There were 0 winners.\nClick on my replied message to jump to the giveaway."
-                f"Or click on this link: {gmsg.jump_url}"
-            )
+            await gmsg.reply(**reply)
             if hostdm == True:
                 await self.hdm(host, gmsg.jump_url, prize, "None")
 
@@ -458,8 +557,7 @@ class Giveaway(BaseGiveaway):
             else:
                 end_data.update({"reason": EndReason.CANCELLED.value.format(canceller)})
 
-            self.cog.giveaway_cache.remove(self)
-            self.cog.ended_cache.append(EndedGiveaway(**end_data))
+            self.cog.mark_ended(self, EndedGiveaway(**end_data))
             return True
 
         w = ""
@@ -469,16 +567,18 @@ class Giveaway(BaseGiveaway):
         for k, v in wcounter.items():
             w += f"<@{k.id}> x {v}, " if v > 1 else f"<@{k.id}> "
 
-        formatdict = {"winner": w, "prize": prize, "link": link}
-
-        embed = gmsg.embeds[0]
-        embed.description = f"This giveaway has ended.\n**Winners:** {w}\n**Host:** <@{host}>"
-        embed.set_footer(
-            text=f"{msg.guild.name} - Winners: {winners}", icon_url=msg.guild.icon_url
+        edit, reply = templates.end(
+            gmsg.embeds[0],
+            guild=msg.guild,
+            host_id=host,
+            winners=winners,
+            prize=prize,
+            link=link,
+            winner_mentions=w,
         )
-        await gmsg.edit(embed=embed)
+        await gmsg.edit(**edit)
 
-        await gmsg.reply(endmsg.format_map(formatdict))
+        await gmsg.reply(**reply)
 
         if winnerdm == True:
             await self.wdm(w_list, gmsg.jump_url, prize, channel.guild)
@@ -486,19 +586,18 @@ class Giveaway(BaseGiveaway):
         if hostdm == True:
             await self.hdm(host, gmsg.jump_url, prize, w)
 
-        self.cog.giveaway_cache.remove(self)
         end_data.update({"winnerslist": [i.id for i in w_list]})
         if not canceller:
             end_data.update({"reason": EndReason.SUCCESS.value})
         else:
             end_data.update({"reason": EndReason.CANCELLED.value.format(canceller)})
-        self.cog.ended_cache.append(EndedGiveaway(**end_data))
+        self.cog.mark_ended(self, EndedGiveaway(**end_data))
         return True
 
     def to_dict(self) -> dict:
         data = {
             "time": self._time,
-            "guild": self.guild.id,
+            "guild": self.guild_id,
             "host": self._host,
             "channel": self._channel,
             "message": self.message_id,
@@ -515,14 +614,29 @@ class Giveaway(BaseGiveaway):
 
 class EndedGiveaway(BaseGiveaway):
     def __init__(
-        self, bot, cog, host, channel, message, winnersno, winnerslist, prize, requirements, reason
+        self,
+        bot,
+        cog,
+        host,
+        channel,
+        message,
+        winnersno,
+        winnerslist,
+        prize,
+        requirements,
+        reason,
+        donor=None,
+        ended_at=None,
+        guild=None,
     ) -> None:
         super().__init__(
-            bot, cog, prize, None, host, channel, requirements, winnersno
+            bot, cog, prize, None, host, channel, requirements, winnersno, guild
         )  # winners no is number of winners and list is a list of winners.
         self.message_id = message
         self._winnerlist = winnerslist
         self.reason: str = reason
+        self._donor = donor or host
+        self.ended_at: Optional[int] = ended_at  # None for giveaways ended before this was added
 
     def __hash__(self) -> int:
         return hash(self.message_id)
@@ -546,19 +660,23 @@ class EndedGiveaway(BaseGiveaway):
         return {
             "message": self.message_id,
             "channel": self._channel,
-            "guild": self.guild.id,
+            "guild": self.guild_id,
             "host": self._host,
             "prize": self.prize,
             "requirements": self.requirements.as_dict(),
             "winnersno": self.winners,
-            "winnerslist": self.winnerslist,
+            "winnerslist": self._winnerlist,
             "reason": self.reason,
+            "donor": self._donor,
+            "ended_at": self.ended_at,
         }
 
 
 class PendingGiveaway(BaseGiveaway):
-    def __init__(self, bot, cog, host, _time, winners, requirements, prize, flags):
-        super().__init__(bot, cog, prize, _time, host, flags.get("channel"), requirements, winners)
+    def __init__(self, bot, cog, host, _time, winners, requirements, prize, flags, guild=None):
+        super().__init__(
+            bot, cog, prize, _time, host, flags.get("channel"), requirements, winners, guild
+        )
         self.flags: dict = flags
         self.start: int = flags.get("starts_in")
 
@@ -572,102 +690,24 @@ class PendingGiveaway(BaseGiveaway):
         return hash((self.prize, self._time, self._host, self._channel, self.winners))
 
     async def start_giveaway(self):
-        emoji = await self.cog.config.get_guild_emoji(self.guild)
-        endtime = datetime.now() + timedelta(seconds=self.remaining_time)
-        embed = discord.Embed(
-            title=self.prize.center(len(self.prize) + 4, "*"),
-            description=(
-                f"React with {emoji} to enter\n"
-                f"Host: {self.host.mention}\n"
-                f"Ends {f'<t:{int(time.time()+self.remaining_time)}:R>' if not await self.cog.config.get_guild_timer(self.guild) else f'in {humanize_timedelta(seconds=self.remaining_time)}'}\n"
-            ),
-            timestamp=endtime,
-        ).set_footer(text=f"Winners: {self.winners} | ends : ", icon_url=self.guild.icon_url)
-
-        message = await self.cog.config.get_guild_msg(self.guild)
-
-        # flag handling below!!
-
-        if donor := self.flags.get("donor"):
-            embed.add_field(name="**Donor:**", value=f"{donor.mention}", inline=False)
-        messagable = self.channel
-        ping = self.flags.get("ping")
-        no_multi = self.flags.get("no_multi")
-        no_defaults = self.flags.get("no_defaults")
-        donor_join = not self.flags.get("no_donor")
-        msg = self.flags.get("msg")
-        thank = self.flags.get("thank")
-        requirements = self.requirements
-        if no_defaults:
-            requirements = self.requirements.no_defaults(True)  # ignore defaults.
-
-        if not no_defaults:
-            requirements = self.requirements.no_defaults()  # defaults will be used!!!
-
-        if not requirements.null:
-            embed.add_field(name="Requirements:", value=str(requirements), inline=False)
-
-        gembed = await messagable.send(message, embed=embed)
-        await gembed.add_reaction(emoji)
-
-        if ping:
-            pingrole = await self.cog.config.get_pingrole(self.guild)
-            ping = (
-                pingrole.mention
-                if pingrole
-                else f"No pingrole set. Use `{(await self.bot.get_valid_prefixes(self.guild))[0]}gset pingrole` to add a pingrole"
-            )
-
-        if msg and ping:
-            membed = discord.Embed(
-                description=f"***Message***: {msg}", color=discord.Color.random()
-            )
-            await messagable.send(
-                ping, embed=membed, allowed_mentions=discord.AllowedMentions(roles=True)
-            )
-        elif ping and not msg:
-            await messagable.send(ping)
-        elif msg and not ping:
-            membed = discord.Embed(
-                description=f"***Message***: {msg}", color=discord.Color.random()
-            )
-            await messagable.send(embed=membed)
-        if thank:
-            tmsg: str = await self.cog.config.get_guild_tmsg(self.guild)
-            embed = discord.Embed(
-                description=tmsg.format_map(
-                    Coordinate(
-                        donor=SafeMember(donor) if donor else SafeMember(self.host),
-                        prize=self.prize,
-                    )
-                ),
-                color=0x303036,
-            )
-            await messagable.send(embed=embed)
-
-        data = {
-            "donor": donor.id if donor else None,
-            "donor_can_join": donor_join,
-            "use_multi": not no_multi,
-            "message": gembed.id,
-            "emoji": emoji,
-            "channel": self._channel,
-            "cog": self.cog,
-            "time": self._time,
-            "winners": self.winners,
-            "requirements": requirements,
-            "prize": self.prize,
-            "host": self._host,
-            "bot": self.bot,
-        }
-        giveaway = Giveaway(**data)
-        self.cog.giveaway_cache.append(giveaway)
+        await Giveaway.create(
+            self.bot,
+            self.cog,
+            channel=self.channel,
+            host=self.host,
+            prize=self.prize,
+            winners=self.winners,
+            end_time=self._time,
+            requirements=self.requirements,
+            flags=self.flags,
+            prefix=(await self.bot.get_valid_prefixes(self.guild))[0],
+        )
 
     def to_dict(self):
         return {
             "host": self._host,
             "prize": self.prize,
-            "guild": self.guild.id,
+            "guild": self.guild_id,
             "requirements": self.requirements.as_dict(),
             "winners": self.winners,
             "_time": self._time,
@@ -0,0 +1,162 @@
+import asyncio
+import functools
+import json
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+
+def shard_id_for(guild_id: int, shard_count: int) -> int:
+    """
+    The shard a guild lives on, same formula discord uses."""
+    return (guild_id >> 22) % shard_count
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# sqlite's default limit on the number of `?` in one query is 999.
+QUERY_CHUNK = 500
+
+
+class GiveawayLeases:
+    """
+    A small sqlite backed lease table shared by every process using the same data directory.
+
+    A process needs to hold a giveaway's lease to end it. Once the giveaway has been ended
+    the lease is marked as done so no other process can ever claim it again.
+    Leases that aren't renewed or finished in `ttl` seconds (the process died mid way or
+    something) can be taken over by another process.
+    Finished leases keep the ended giveaway around so whoever loads the giveaway from config
+    next can move it to the ended ones, they're pruned after `keep` seconds."""
+
+    def __init__(
+        self, path: Path, owner: Optional[str] = None, ttl: int = 120, keep: int = 30 * 86400
+    ):
+        self.path = path
+        self.owner = owner or default_owner()
+        self.ttl = ttl
+        self.keep = keep
+        self._created = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        if not self._created:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "message_id INTEGER PRIMARY KEY, "
+                "owner TEXT NOT NULL, "
+                "expires REAL NOT NULL, "
+                "done INTEGER NOT NULL DEFAULT 0, "
+                "ended TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(leases)")}
+            if "ended" not in columns:  # lease files from before ended giveaways were kept.
+                conn.execute("ALTER TABLE leases ADD COLUMN ended TEXT")
+            self._created = True
+        return conn
+
+    async def _run(self, func, *args):
+        # sqlite is blocking so keep it off the event loop.
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(func, *args)
+        )
+
+    def _claim(self, message_id: int) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")  # takes the write lock so no one else can sneak in.
+            try:
+                row = conn.execute(
+                    "SELECT owner, expires, done FROM leases WHERE message_id = ?", (message_id,)
+                ).fetchone()
+                if row and (row[2] or (row[0] != self.owner and row[1] > now)):
+                    claimed = False
+
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO leases (message_id, owner, expires, done, ended) "
+                        "VALUES (?, ?, ?, 0, NULL)",
+                        (message_id, self.owner, now + self.ttl),
+                    )
+                    claimed = True
+
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            conn.execute("COMMIT")
+            return claimed
+
+    def _renew(self, message_id: int) -> bool:
+        with closing(self._connect()) as conn:
+            return bool(
+                conn.execute(
+                    "UPDATE leases SET expires = ? WHERE message_id = ? AND owner = ? AND done = 0",
+                    (time.time() + self.ttl, message_id, self.owner),
+                ).rowcount
+            )
+
+    def _finish(self, message_id: int, ended: Optional[dict]) -> bool:
+        # `expires` is reused as the time it was finished at for pruning.
+        with closing(self._connect()) as conn:
+            return bool(
+                conn.execute(
+                    "UPDATE leases SET done = 1, expires = ?, ended = ? "
+                    "WHERE message_id = ? AND owner = ? AND done = 0",
+                    (time.time(), json.dumps(ended) if ended else None, message_id, self.owner),
+                ).rowcount
+            )
+
+    def _release(self, message_id: int):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "DELETE FROM leases WHERE message_id = ? AND owner = ? AND done = 0",
+                (message_id, self.owner),
+            )
+
+    def _finished(self, message_ids: Iterable[int]) -> Dict[int, Optional[dict]]:
+        message_ids = list(message_ids)
+        finished = {}
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "DELETE FROM leases WHERE done = 1 AND expires < ?", (time.time() - self.keep,)
+            )
+            for i in range(0, len(message_ids), QUERY_CHUNK):
+                chunk = message_ids[i : i + QUERY_CHUNK]
+                for message_id, ended in conn.execute(
+                    "SELECT message_id, ended FROM leases WHERE done = 1 "
+                    f"AND message_id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ):
+                    finished[message_id] = json.loads(ended) if ended else None
+        return finished
+
+    async def claim(self, message_id: int) -> bool:
+        return await self._run(self._claim, message_id)
+
+    async def renew(self, message_id: int) -> bool:
+        """
+        Push back the expiry of a lease this process holds. False if it isn't held anymore."""
+        return await self._run(self._renew, message_id)
+
+    async def finish(self, message_id: int, ended: Optional[dict] = None) -> bool:
+        """
+        Mark a held lease as done, keeping the ended giveaway's data with it.
+
+        False if the lease wasn't held by this process anymore."""
+        return await self._run(self._finish, message_id, ended)
+
+    async def release(self, message_id: int):
+        await self._run(self._release, message_id)
+
+    async def finished(self, message_ids: Iterable[int]) -> Dict[int, Optional[dict]]:
+        """
+        Which of the given giveaways have been ended by any process, mapped to their
+        ended giveaway's data if it was kept. Old finished leases are pruned along the way."""
+        return await self._run(self._finished, message_ids)
@@ -0,0 +1,455 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import discord
+
+from .models import Giveaway, Requirements
+from .templates import GuildTemplates
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+# buffered lines get written once there are this many, or this many seconds after the last write.
+FLUSH_LINES = 100
+FLUSH_INTERVAL = 1.0
+
+
+class ReactionRecorder:
+    """
+    Records giveaway reactions and the state of the giveaways they were for
+    to a json lines file that can be fed back in with `ReactionReplayer`.
+
+    Each line is either a `giveaway` (its `to_dict`) or a `reaction` with the
+    time it arrived at in seconds since the recording started.
+
+    Lines are buffered and written by a single worker thread so recording
+    never blocks the event loop on disk."""
+
+    def __init__(self, path: Path, giveaways: List[Giveaway]):
+        self.path = path
+        self.started = time.monotonic()
+        self.recorded = 0
+        self._giveaways = set()
+        self._buffer: List[str] = []
+        self._flushed = time.monotonic()
+        # one worker so writes land in the order they were made.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._fp = None
+        self._executor.submit(self._open)
+        for giveaway in giveaways:
+            self.record_giveaway(giveaway)
+
+    def _open(self):
+        self._fp = open(self.path, "w", encoding="utf-8")
+
+    def _write_lines(self, lines: List[str]):
+        self._fp.write("".join(lines))
+
+    def _write(self, data: dict):
+        self._buffer.append(json.dumps(data) + "\n")
+        if len(self._buffer) >= FLUSH_LINES or time.monotonic() - self._flushed >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """
+        Hand the buffered lines to the writer thread."""
+        if self._buffer:
+            self._executor.submit(self._write_lines, self._buffer)
+            self._buffer = []
+        self._flushed = time.monotonic()
+
+    def record_giveaway(self, giveaway: Giveaway):
+        if giveaway.message_id in self._giveaways or not giveaway.channel:
+            return
+        self._giveaways.add(giveaway.message_id)
+        self._write({"type": "giveaway", "data": giveaway.to_dict()})
+
+    def record_reaction(self, payload: discord.RawReactionActionEvent):
+        if payload.message_id not in self._giveaways or not payload.member:
+            return
+        self.recorded += 1
+        self._write(
+            {
+                "type": "reaction",
+                "t": time.monotonic() - self.started,
+                "guild_id": payload.guild_id,
+                "channel_id": payload.channel_id,
+                "message_id": payload.message_id,
+                "user_id": payload.user_id,
+                "emoji": str(payload.emoji),
+                "bot": payload.member.bot,
+                "roles": [role.id for role in payload.member.roles],
+            }
+        )
+
+    def close(self):
+        # the close is queued after the last write, nothing here waits on the disk.
+        self.flush()
+        self._executor.submit(lambda: self._fp.close())
+        self._executor.shutdown(wait=False)
+
+
+# ______________ fake discord objects for the replayer ______________
+
+
+class FakeHTTP:
+    """
+    Stands in for discord's REST api. Every call is counted and takes `latency` seconds."""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls: Counter = Counter()
+
+    async def request(self, route: str):
+        self.calls[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+        self.name = str(role_id)
+        self.mention = f"<@&{role_id}>"
+
+
+class FakeUser:
+    def __init__(self, http: FakeHTTP, user_id: int, guild=None, roles=(), bot=False):
+        self._http = http
+        self.id = user_id
+        self.name = str(user_id)
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+        self.avatar_url = ""
+        self.guild = guild
+        self.roles = list(roles)
+        self.bot = bot
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, *args, **kwargs):
+        await self._http.request("send_dm")
+
+
+class FakeGuild:
+    def __init__(self, http: FakeHTTP, guild_id: int):
+        self.id = guild_id
+        self.name = str(guild_id)
+        self.icon_url = ""
+        self.me = FakeUser(http, 0, self, bot=True)
+        self._roles: Dict[int, FakeRole] = {}
+        self._members: Dict[int, FakeUser] = {}
+
+    def role(self, role_id: int) -> FakeRole:
+        return self._roles.setdefault(role_id, FakeRole(role_id))
+
+    def get_role(self, role_id) -> Optional[FakeRole]:
+        return self._roles.get(role_id)
+
+    def get_member(self, user_id) -> Optional[FakeUser]:
+        return self._members.get(user_id)
+
+
+class FakeReaction:
+    def __init__(self, emoji: str, users: List[FakeUser]):
+        self.emoji = emoji
+        self._users = users
+
+    def users(self):
+        users = self._users
+
+        class _Iterator:
+            async def flatten(self):
+                return users.copy()
+
+        return _Iterator()
+
+
+class FakeMessage:
+    def __init__(self, http: FakeHTTP, message_id: int, channel, emoji: str):
+        self._http = http
+        self.id = message_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.created_at = discord.utils.snowflake_time(message_id)
+        self.jump_url = f"https://discord.com/channels/{self.guild.id}/{channel.id}/{message_id}"
+        self.embeds = [discord.Embed(description="")]
+        self.entrants: List[FakeUser] = [self.guild.me]
+        self.reactions = [FakeReaction(emoji, self.entrants)]
+
+    async def remove_reaction(self, emoji, member):
+        await self._http.request("remove_reaction")
+        if member in self.entrants:
+            self.entrants.remove(member)
+
+    async def edit(self, **kwargs):
+        await self._http.request("edit_message")
+
+    async def reply(self, *args, **kwargs):
+        await self._http.request("send_message")
+
+
+class FakeChannel:
+    def __init__(self, http: FakeHTTP, channel_id: int, guild: FakeGuild):
+        self._http = http
+        self.id = channel_id
+        self.guild = guild
+        self.mention = f"<#{channel_id}>"
+        self.messages: Dict[int, FakeMessage] = {}
+
+    async def fetch_message(self, message_id):
+        await self._http.request("get_message")
+        return self.messages[message_id]
+
+    async def send(self, *args, **kwargs):
+        await self._http.request("send_message")
+
+
+class FakeConnection:
+    def __init__(self, bot, cache_messages: bool):
+        self.bot = bot
+        self.cache_messages = cache_messages
+
+    def _get_message(self, message_id):
+        if not self.cache_messages:
+            return None
+        for channel in self.bot.channels.values():
+            if message := channel.messages.get(message_id):
+                return message
+
+
+class FakeBot:
+    def __init__(self, http: FakeHTTP, cache_messages: bool = True):
+        self.http = http
+        self.guilds: Dict[int, FakeGuild] = {}
+        self.channels: Dict[int, FakeChannel] = {}
+        self._connection = FakeConnection(self, cache_messages)
+
+    def guild(self, guild_id: int) -> FakeGuild:
+        return self.guilds.setdefault(guild_id, FakeGuild(self.http, guild_id))
+
+    def channel(self, channel_id: int, guild: FakeGuild) -> FakeChannel:
+        return self.channels.setdefault(channel_id, FakeChannel(self.http, channel_id, guild))
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id):
+        for guild in self.guilds.values():
+            if member := guild.get_member(user_id):
+                return member
+        return FakeUser(self.http, user_id)
+
+    async def fetch_user(self, user_id):
+        await self.http.request("get_user")
+        return self.get_user(user_id)
+
+
+class FakeConf:
+    def __init__(self, winnerdm: bool = True, hostdm: bool = True):
+        self.winnerdm = winnerdm
+        self.hostdm = hostdm
+        self._templates = {}
+
+    async def dm_winner(self, guild):
+        return self.winnerdm
+
+    async def dm_host(self, guild):
+        return self.hostdm
+
+    async def get_templates(self, guild):
+        if guild.id not in self._templates:
+            self._templates[guild.id] = GuildTemplates(
+                msg=":tada:Giveaway:tada:",
+                endmsg="Congratulations {winner}. You have won the giveaway for ***{prize}***.\n{link}",
+                tmsg="Prize: {prize}\nDonor: {donor.mention}",
+                emoji="🎉",
+                edit_timer=False,
+            )
+        return self._templates[guild.id]
+
+    async def get_list_multi(self, guild, member_list):
+        return member_list.copy()
+
+
+class FakeCog:
+    def __init__(self, bot: FakeBot, conf: FakeConf):
+        self.bot = bot
+        self.config = conf
+        self.amari = None
+        self.recorder = None
+        self.giveaway_cache: List[Giveaway] = []
+        self.ended_cache = []
+
+    def track_giveaway(self, giveaway):
+        self.giveaway_cache.append(giveaway)
+
+    def mark_ended(self, giveaway, ended):
+        self.giveaway_cache.remove(giveaway)
+        self.ended_cache.append(ended)
+
+
+class FakePayload:
+    def __init__(self, member: FakeUser, message_id: int, channel_id: int, emoji: str):
+        self.member = member
+        self.user_id = member.id
+        self.guild_id = member.guild.id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.emoji = emoji
+
+
+# ______________ replayer ______________
+
+
+class ReactionReplayer:
+    """
+    Feeds a recording made by `ReactionRecorder` into the giveaway reaction handler
+    and `Giveaway.end` without a gateway, against a fake REST layer.
+
+    `speed` scales the recorded timings, 1 is real time and 0 fires everything at once."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        speed: float = 1.0,
+        latency: float = 0.05,
+        cache_messages: bool = True,
+        end: bool = True,
+    ):
+        self.path = path
+        self.speed = speed
+        self.end = end
+        self.http = FakeHTTP(latency)
+        self.bot = FakeBot(self.http, cache_messages)
+        self.cog = FakeCog(self.bot, FakeConf())
+        self.events: List[dict] = []
+
+        self.handler_latency: List[float] = []
+        self.end_latency: List[float] = []
+        self.loop_lag: List[float] = []
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as fp:
+            for line in fp:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data["type"] == "giveaway":
+                    self._load_giveaway(data["data"])
+                elif data["type"] == "reaction":
+                    self.events.append(data)
+
+    def _load_giveaway(self, data: dict):
+        guild = self.bot.guild(data["guild"])
+        channel = self.bot.channel(data["channel"], guild)
+        channel.messages[data["message"]] = FakeMessage(
+            self.http, data["message"], channel, data["emoji"]
+        )
+        for key in ("required", "blacklist", "bypass"):
+            for role_id in data["requirements"].get(key, []):
+                guild.role(int(role_id))
+        data["requirements"] = Requirements(guild=guild, **data["requirements"])
+        self.cog.track_giveaway(Giveaway(bot=self.bot, cog=self.cog, **data))
+
+    async def _sample_lag(self, interval: float = 0.01):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.loop_lag.append(max(loop.time() - start - interval, 0))
+
+    async def _dispatch(self, handler, event: dict):
+        guild = self.bot.guild(event["guild_id"])
+        member = guild._members.get(event["user_id"]) or FakeUser(
+            self.http,
+            event["user_id"],
+            guild,
+            [guild.role(role_id) for role_id in event["roles"]],
+            event["bot"],
+        )
+        guild._members[member.id] = member
+        message = self.bot.channels[event["channel_id"]].messages[event["message_id"]]
+        if member not in message.entrants:
+            message.entrants.append(
+                member
+            )  # the reaction is already there by the time we hear of it.
+
+        started = time.perf_counter()
+        await handler(
+            self.cog, FakePayload(member, event["message_id"], event["channel_id"], event["emoji"])
+        )
+        self.handler_latency.append(time.perf_counter() - started)
+
+    async def run(self, handler) -> Dict[str, Any]:
+        """
+        Replay every recorded reaction through `handler` (an unbound `on_raw_reaction_add`)
+        then end every giveaway and return the report."""
+        if not self.cog.giveaway_cache and not self.events:
+            self.load()
+
+        sampler = asyncio.create_task(self._sample_lag())
+        tasks = []
+        started = time.perf_counter()
+        for event in self.events:
+            if self.speed:
+                delay = event["t"] / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            # discord.py runs every listener in its own task, so do the same.
+            tasks.append(asyncio.create_task(self._dispatch(handler, event)))
+        await asyncio.gather(*tasks)
+
+        if self.end:
+            for giveaway in self.cog.giveaway_cache.copy():
+                end_started = time.perf_counter()
+                await giveaway.end()
+                self.end_latency.append(time.perf_counter() - end_started)
+
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "events": len(self.events),
+            "elapsed": elapsed,
+            "handler_p50": percentile(self.handler_latency, 50),
+            "handler_p90": percentile(self.handler_latency, 90),
+            "handler_p99": percentile(self.handler_latency, 99),
+            "handler_max": max(self.handler_latency, default=0.0),
+            "end_max": max(self.end_latency, default=0.0),
+            "loop_lag_p99": percentile(self.loop_lag, 99),
+            "loop_lag_max": max(self.loop_lag, default=0.0),
+            "rest_calls": sum(self.http.calls.values()),
+            "rest_calls_by_route": dict(self.http.calls),
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    ms = lambda seconds: f"{seconds * 1000:.2f}ms"
+    lines = [
+        f"Replayed {report['events']} reactions in {report['elapsed']:.2f}s",
+        f"Handler latency: p50 {ms(report['handler_p50'])}, p90 {ms(report['handler_p90'])}, "
+        f"p99 {ms(report['handler_p99'])}, max {ms(report['handler_max'])}",
+        f"Slowest giveaway end: {ms(report['end_max'])}",
+        f"Event loop lag: p99 {ms(report['loop_lag_p99'])}, max {ms(report['loop_lag_max'])}",
+        f"Simulated REST calls: {report['rest_calls']}",
+    ]
+    lines += [f"    {route}: {count}" for route, count in report["rest_calls_by_route"].items()]
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .models import BaseGiveaway, EndedGiveaway
+
+_token_regex = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(_token_regex.findall((text or "").lower()))
+
+
+class GiveawayIndex:
+    """
+    Secondary indexes over active and ended giveaways so they can be looked up
+    without scanning every giveaway the bot has ever seen.
+
+    Giveaways are keyed by their message id and indexed per guild by host, donor,
+    channel, prize tokens (a small inverted index) and time. The time of an active
+    giveaway is when it ends and the time of an ended one is when it actually ended."""
+
+    def __init__(self):
+        self._giveaways: Dict[int, BaseGiveaway] = {}
+        self._guild_of: Dict[int, int] = {}
+        self._by_host: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._by_donor: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._by_channel: Dict[int, Set[int]] = defaultdict(set)
+        self._by_token: Dict[Tuple[int, str], Set[int]] = defaultdict(set)
+        self._by_time: Dict[int, List[Tuple[float, int]]] = defaultdict(list)
+
+    def __len__(self):
+        return len(self._giveaways)
+
+    @staticmethod
+    def _time_of(giveaway: BaseGiveaway) -> float:
+        if isinstance(giveaway, EndedGiveaway):
+            return giveaway.ended_at or 0
+        return giveaway._time or 0
+
+    def add(self, giveaway: BaseGiveaway):
+        if giveaway.message_id in self._giveaways:
+            self.remove(giveaway.message_id)
+
+        if not (guild_id := giveaway.guild_id):
+            return
+
+        gid = giveaway.message_id
+        self._giveaways[gid] = giveaway
+        self._guild_of[gid] = guild_id
+        self._by_host[(guild_id, giveaway._host)].add(gid)
+        if donor := getattr(giveaway, "_donor", None):
+            self._by_donor[(guild_id, donor)].add(gid)
+        self._by_channel[giveaway._channel].add(gid)
+        for token in tokenize(giveaway.prize):
+            self._by_token[(guild_id, token)].add(gid)
+        insort(self._by_time[guild_id], (self._time_of(giveaway), gid))
+
+    def extend(self, giveaways: Iterable[BaseGiveaway]):
+        for giveaway in giveaways:
+            self.add(giveaway)
+
+    def remove(self, message_id: int):
+        if not (giveaway := self._giveaways.pop(message_id, None)):
+            return
+
+        guild_id = self._guild_of.pop(message_id)
+
+        def discard(index: dict, key):
+            if (ids := index.get(key)) is not None:
+                ids.discard(message_id)
+                if not ids:
+                    del index[key]
+
+        discard(self._by_host, (guild_id, giveaway._host))
+        discard(self._by_donor, (guild_id, getattr(giveaway, "_donor", None)))
+        discard(self._by_channel, giveaway._channel)
+        for token in tokenize(giveaway.prize):
+            discard(self._by_token, (guild_id, token))
+
+        times = self._by_time[guild_id]
+        entry = (self._time_of(giveaway), message_id)
+        if (pos := bisect_left(times, entry)) < len(times) and times[pos] == entry:
+            del times[pos]
+
+    def search(
+        self,
+        guild_id: int,
+        *,
+        host: Optional[int] = None,
+        donor: Optional[int] = None,
+        channel: Optional[int] = None,
+        prize: Optional[str] = None,
+        after: Optional[float] = None,
+        before: Optional[float] = None,
+        status: Optional[str] = None,
+    ) -> List[BaseGiveaway]:
+        """
+        Find giveaways in a guild matching every filter given, newest first.
+
+        `prize` matches giveaways whose prize contains all of its words.
+        `status` can be either of `active` or `ended`."""
+        candidates: List[Set[int]] = []
+        if host is not None:
+            candidates.append(self._by_host.get((guild_id, host), set()))
+        if donor is not None:
+            candidates.append(self._by_donor.get((guild_id, donor), set()))
+        if channel is not None:
+            candidates.append(self._by_channel.get(channel, set()))
+        for token in tokenize(prize):
+            candidates.append(self._by_token.get((guild_id, token), set()))
+
+        if candidates:
+            # start from the smallest set so the intersection stays cheap.
+            candidates.sort(key=len)
+            ids = set(candidates[0]).intersection(*candidates[1:])
+            stamped = [(self._time_of(self._giveaways[i]), i) for i in ids]
+            if after is not None:
+                stamped = [i for i in stamped if i[0] >= after]
+            if before is not None:
+                stamped = [i for i in stamped if i[0] <= before]
+            ordered = [gid for _, gid in sorted(stamped, reverse=True)]
+
+        else:
+            # only a time range (or nothing at all), slice it straight off the sorted index.
+            times = self._by_time.get(guild_id, [])
+            lo = bisect_left(times, (after,)) if after is not None else 0
+            hi = bisect_right(times, (before, float("inf"))) if before is not None else len(times)
+            ordered = [gid for _, gid in reversed(times[lo:hi])]
+
+        results = [self._giveaways[i] for i in ordered if self._guild_of.get(i) == guild_id]
+        if status == "active":
+            return [i for i in results if not isinstance(i, EndedGiveaway)]
+        elif status == "ended":
+            return [i for i in results if isinstance(i, EndedGiveaway)]
+        return results
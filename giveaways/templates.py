@@ -0,0 +1,185 @@
+import datetime
+import re
+import string
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import discord
+from redbot.core.utils.chat_formatting import humanize_timedelta
+
+_formatter = string.Formatter()
+# the `.attr` and `[index]` parts that follow the first name of a field.
+_lookup_regex = re.compile(r"\.([^.\[]+)|\[([^\]]+)\]")
+
+
+def _split_field(field: str) -> Optional[Tuple[str, Tuple[Tuple[bool, Any], ...]]]:
+    # same split str.format does, None if the field isn't one it would accept.
+    key = re.match(r"[^.\[]*", field).group()
+    chain, pos = [], len(key)
+    while pos < len(field):
+        if not (match := _lookup_regex.match(field, pos)):
+            return None
+        attr, index = match.groups()
+        chain.append((True, attr) if attr else (False, int(index) if index.isdigit() else index))
+        pos = match.end()
+    return key, tuple(chain)
+
+
+class CompiledTemplate:
+    """
+    A format string that is parsed once and rendered as many times as needed.
+
+    Fields that aren't available while rendering are left in the output as is,
+    just like `util.Coordinate` does with `str.format_map`."""
+
+    __slots__ = ("source", "_parts")
+
+    def __init__(self, source: str):
+        self.source = source
+        try:
+            self._parts = [self._compile(*part) for part in _formatter.parse(source)]
+        except ValueError:  # unbalanced braces and such, treat the whole thing as text.
+            self._parts = [(source, None, (), None, None, None)]
+
+    @staticmethod
+    def _compile(literal, field, spec, conversion):
+        if field is None:
+            return (literal, None, (), None, None, None)
+
+        conversion_str = f"!{conversion}" if conversion else ""
+        spec_str = f":{spec}" if spec else ""
+        raw = "{" + field + conversion_str + spec_str + "}"
+        # positional fields are never filled and private attributes are never looked up.
+        if (
+            not (split := _split_field(field))
+            or not split[0]
+            or split[0].isdigit()
+            or any(is_attr and name.startswith("_") for is_attr, name in split[1])
+        ):
+            return (literal + raw, None, (), None, None, None)
+        key, chain = split
+
+        return (literal, key, tuple(chain), raw, conversion, spec)
+
+    def __str__(self):
+        return self.source
+
+    def render(self, mapping: Mapping[str, Any]) -> str:
+        final = []
+        for literal, key, chain, raw, conversion, spec in self._parts:
+            final.append(literal)
+            if key is None:
+                continue
+
+            if key not in mapping:
+                final.append(raw)
+                continue
+
+            try:
+                value = mapping[key]
+                for is_attr, name in chain:
+                    value = getattr(value, name) if is_attr else value[name]
+
+                if conversion:
+                    value = _formatter.convert_field(value, conversion)
+                final.append(format(value, spec))
+            except Exception:  # a bad lookup or format spec shouldn't break the message.
+                final.append(raw)
+
+        return "".join(final)
+
+
+class GuildTemplates:
+    """
+    A guild's giveaway messages compiled and ready to be turned into message payloads.
+
+    The payloads are plain dicts that can be passed straight to `send`, `edit` or `reply`."""
+
+    def __init__(self, *, msg: str, endmsg: str, tmsg: str, emoji: str, edit_timer: bool):
+        self.msg = msg  # sent as is, `gset gmsg` has no placeholders.
+        self.endmsg = CompiledTemplate(endmsg)
+        self.tmsg = CompiledTemplate(tmsg)
+        self.emoji = emoji
+        self.edit_timer = edit_timer
+
+    def timer(self, ends_at: float) -> str:
+        if not self.edit_timer:
+            return f"<t:{int(ends_at)}:R>"
+
+        return f"in {humanize_timedelta(seconds=max(int(ends_at - time.time()), 0))}"
+
+    def description(self, emoji: str, host_id: int, ends_at: float) -> str:
+        return (
+            f"React with {emoji} to enter\n"
+            f"Host: <@{host_id}>\n"
+            f"Ends {self.timer(ends_at)}\n"
+        )
+
+    def start(
+        self,
+        *,
+        guild: discord.Guild,
+        host: discord.Member,
+        prize: str,
+        winners: int,
+        ends_at: float,
+        requirements,
+        donor: Optional[discord.Member] = None,
+    ) -> Dict[str, Any]:
+        embed = discord.Embed(
+            title=prize.center(len(prize) + 4, "*"),
+            description=self.description(self.emoji, host.id, ends_at),
+            timestamp=datetime.datetime.fromtimestamp(ends_at, datetime.timezone.utc),
+        ).set_footer(text=f"Winners: {winners} | ends : ", icon_url=guild.icon_url)
+
+        if donor:
+            embed.add_field(name="**Donor:**", value=f"{donor.mention}", inline=False)
+
+        if not requirements.null:
+            embed.add_field(name="Requirements:", value=str(requirements), inline=False)
+
+        return {"content": self.msg, "embed": embed}
+
+    def thank(self, *, donor, prize: str) -> Dict[str, Any]:
+        return {
+            "embed": discord.Embed(
+                description=self.tmsg.render({"donor": donor, "prize": prize}), color=0x303036
+            )
+        }
+
+    def timer_update(
+        self, embed: discord.Embed, *, emoji: str, host_id: int, ends_at: float
+    ) -> Dict[str, Any]:
+        embed.description = self.description(emoji, host_id, ends_at)
+        return {"embed": embed}
+
+    def end(
+        self,
+        embed: discord.Embed,
+        *,
+        guild: discord.Guild,
+        host_id: int,
+        winners: int,
+        prize: str,
+        link: str,
+        winner_mentions: str = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Returns the payload to edit the giveaway embed with and the one to reply to it with."""
+        if winner_mentions:
+            embed.description = (
+                f"This giveaway has ended.\n**Winners:** {winner_mentions}\n**Host:** <@{host_id}>"
+            )
+            reply = self.endmsg.render({"winner": winner_mentions, "prize": prize, "link": link})
+
+        else:
+            embed.description = (
+                f"This giveaway has ended.\nThere were 0 winners.\n**Host:** <@{host_id}>"
+            )
+            reply = (
+                f"The giveaway for ***{prize}*** has ended. There were 0 winners.\nClick on my replied message to jump to the giveaway. "
+                f"Or click on this link: {link}"
+            )
+
+        embed.set_footer(text=f"{guild.name} - Winners: {winners}", icon_url=guild.icon_url)
+        return {"embed": embed}, {"content": reply}
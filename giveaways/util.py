@@ -247,7 +247,8 @@ class Flags(commands.Converter):
                     try:
                         bank = await cog.cache.get_dono_bank(ctx.guild.id, bank)
                     except Exception as e:
-                        bank = await cog.cache.get_default_category(ctx.guild.id)
+                        # `dono add` falls back to the default category, or says there isn't one.
+                        bank = None
                 mem = flags.get("donor") or ctx.author
                 await ctx.invoke(command, category=bank, amount=amt, user=mem)
 
@@ -259,6 +260,65 @@ class Flags(commands.Converter):
         return flags
 
 
+_user_id_regex = re.compile(r"<@!?([0-9]+)>$|([0-9]+)$")
+_channel_id_regex = re.compile(r"<#([0-9]+)>$|([0-9]+)$")
+
+
+class SearchFlags(commands.Converter):
+    async def convert(self, ctx: commands.Context, argument: str):
+        argument = argument.replace("—", "--")
+        parser = NoExitParser(description="Giveaway search flag parser", add_help=False)
+
+        parser.add_argument("--host", dest="host", nargs="?", default=None)
+        parser.add_argument("--donor", dest="donor", nargs="?", default=None)
+        parser.add_argument("--channel", "--chan", dest="channel", nargs="?", default=None)
+        parser.add_argument("--prize", dest="prize", nargs="+", default=[])
+        parser.add_argument("--after", "--since", dest="after", nargs="+", default=None)
+        parser.add_argument("--before", "--until", dest="before", nargs="+", default=None)
+        status = parser.add_mutually_exclusive_group()
+        status.add_argument("--active", dest="status", action="store_const", const="active")
+        status.add_argument("--ended", dest="status", action="store_const", const="ended")
+
+        try:
+            flags = vars(parser.parse_args(argument.split(" ")))
+        except Exception as e:
+            raise BadArgument(e)
+
+        for key in ("host", "donor"):
+            if value := flags.get(key):
+                try:
+                    flags[key] = (await MemberConverter().convert(ctx, value)).id
+                except Exception:
+                    # they might not be in the server anymore
+                    if not (match := _user_id_regex.match(value)):
+                        raise BadArgument(f"`{value}` is not a valid user.")
+                    flags[key] = int(match.group(1) or match.group(2))
+
+        if channel := flags.get("channel"):
+            if not (match := _channel_id_regex.match(channel)):
+                try:
+                    match = None
+                    flags["channel"] = (await TextChannelConverter().convert(ctx, channel)).id
+                except Exception:
+                    raise BadArgument(f"`{channel}` is not a valid channel.")
+            if match:
+                flags["channel"] = int(match.group(1) or match.group(2))
+
+        flags["prize"] = " ".join(flags["prize"]) or None
+
+        for key in ("after", "before"):
+            if value := flags.get(key):
+                value = " ".join(value)
+                t = parse(value)
+                if not t:
+                    raise BadArgument(f"`{value}` is not a valid date/time!")
+                if not t.tzinfo:
+                    t = t.replace(tzinfo=datetime.timezone.utc)
+                flags[key] = t.timestamp()
+
+        return flags
+
+
 async def ask_for_answers(
     ctx: commands.Context,
     questions: List[Tuple[str, str, str, Callable[[discord.Message], Awaitable[Any]]]],
@@ -0,0 +1,185 @@
+import copy
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# the cogs' __init__ files pull in the whole cog and everything it depends on,
+# the tests only import the modules they need so the packages are registered bare.
+for name in ("donationlogging", "giveaways"):
+    if name not in sys.modules:
+        package = types.ModuleType(name)
+        package.__path__ = [str(ROOT / name)]
+        sys.modules[name] = package
+
+
+class MemoryValue:
+    """
+    A value or group of a `MemoryConfig`, only as much of red's api as the cogs use."""
+
+    def __init__(self, config: "MemoryConfig", path: tuple, default):
+        self._config = config
+        self._path = path
+        self._default = default
+
+    def _get(self):
+        data = self._config.data
+        for key in self._path:
+            if not isinstance(data, dict) or key not in data:
+                return copy.deepcopy(self._default)
+            data = data[key]
+        if isinstance(self._default, dict):
+            return {**copy.deepcopy(self._default), **copy.deepcopy(data)}
+        return copy.deepcopy(data)
+
+    def _set(self, value):
+        data = self._config.data
+        for key in self._path[:-1]:
+            data = data.setdefault(key, {})
+        data[self._path[-1]] = copy.deepcopy(value)
+
+    def __getattr__(self, name: str) -> "MemoryValue":
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get_attr(name)
+
+    def get_attr(self, name: str) -> "MemoryValue":
+        default = self._default.get(name) if isinstance(self._default, dict) else None
+        return MemoryValue(self._config, self._path + (name,), default)
+
+    def __call__(self) -> "_Context":
+        return _Context(self)
+
+    async def all(self):
+        return self._get()
+
+    async def set(self, value):
+        await self._config.before_write(self._path)
+        self._set(value)
+
+    async def clear(self):
+        await self._config.before_write(self._path)
+        data = self._config.data
+        for key in self._path[:-1]:
+            if key not in data:
+                return
+            data = data[key]
+        data.pop(self._path[-1], None)
+
+
+class _Context:
+    # awaiting it reads the value, `async with` hands out a copy that's written back.
+    def __init__(self, value: MemoryValue):
+        self.value = value
+
+    def __await__(self):
+        async def get():
+            return self.value._get()
+
+        return get().__await__()
+
+    async def __aenter__(self):
+        self.data = self.value._get()
+        return self.data
+
+    async def __aexit__(self, *exc):
+        await self.value.set(self.data)
+
+
+class MemoryConfig:
+    """
+    A `redbot.core.Config` that keeps everything in a dict.
+
+    `before_write` is awaited before every write, tests can replace it to hold
+    writes up or make them fail."""
+
+    def __init__(self):
+        self.data: dict = {}
+        self.defaults: dict = {}
+
+    async def before_write(self, path: tuple):
+        pass
+
+    def _group(self, *path, defaults: str) -> MemoryValue:
+        return MemoryValue(self, tuple(str(i) for i in path), self.defaults.get(defaults, {}))
+
+    def register_global(self, **defaults):
+        self.defaults.setdefault("GLOBAL", {}).update(defaults)
+
+    def register_guild(self, **defaults):
+        self.defaults.setdefault("GUILD", {}).update(defaults)
+
+    def register_member(self, **defaults):
+        self.defaults.setdefault("MEMBER", {}).update(defaults)
+
+    def init_custom(self, name: str, identifiers: int):
+        pass
+
+    def register_custom(self, name: str, **defaults):
+        self.defaults.setdefault(name, {}).update(defaults)
+
+    def __getattr__(self, name: str) -> MemoryValue:
+        if name.startswith("_") or name in ("data", "defaults"):
+            raise AttributeError(name)
+        return self._group("GLOBAL", defaults="GLOBAL").get_attr(name)
+
+    def guild_from_id(self, guild_id: int) -> MemoryValue:
+        return self._group("GUILD", guild_id, defaults="GUILD")
+
+    def guild(self, guild) -> MemoryValue:
+        return self.guild_from_id(guild.id)
+
+    def member_from_ids(self, guild_id: int, member_id: int) -> MemoryValue:
+        return self._group("MEMBER", guild_id, member_id, defaults="MEMBER")
+
+    def member(self, member) -> MemoryValue:
+        return self.member_from_ids(member.guild.id, member.id)
+
+    def custom(self, name: str, *identifiers) -> MemoryValue:
+        return self._group(name, *identifiers, defaults=name)
+
+    async def all_guilds(self) -> dict:
+        return {
+            int(guild_id): {**copy.deepcopy(self.defaults.get("GUILD", {})), **data}
+            for guild_id, data in copy.deepcopy(self.data.get("GUILD", {})).items()
+        }
+
+    async def all_members(self) -> dict:
+        return {
+            int(guild_id): {
+                int(member_id): {**copy.deepcopy(self.defaults.get("MEMBER", {})), **data}
+                for member_id, data in members.items()
+            }
+            for guild_id, members in copy.deepcopy(self.data.get("MEMBER", {})).items()
+        }
+
+
+@pytest.fixture
+def memory_config() -> MemoryConfig:
+    return MemoryConfig()
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path, memory_config):
+    """
+    A factory for `DonationManager`s backed by `memory_config` and a temporary data path.
+
+    It has to be called from inside the test's event loop."""
+    pytest.importorskip("redbot")
+    from donationlogging import models
+
+    monkeypatch.setattr(
+        models.Config, "get_conf", classmethod(lambda cls, *args, **kwargs: memory_config)
+    )
+    monkeypatch.setattr(models, "cog_data_path", lambda *args, **kwargs: tmp_path)
+
+    async def make(bot=None) -> "models.DonationManager":
+        manager = models.DonationManager(bot)
+        await manager._populate_cache()
+        await manager.ledger.load()
+        return manager
+
+    return make
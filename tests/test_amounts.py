@@ -0,0 +1,107 @@
+import time
+from decimal import Decimal, localcontext
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("discord")
+pytest.importorskip("emoji")
+hypothesis = pytest.importorskip("hypothesis")
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from donationlogging.ledger import MAX_AMOUNT
+from donationlogging.utils import parse_amount, suffix_dict
+
+amounts = st.integers(0, MAX_AMOUNT)
+
+
+def grouped(amount: int, separator: str) -> str:
+    return f"{amount:,}".replace(",", separator)
+
+
+@given(amounts)
+def test_plain_amounts_round_trip(amount):
+    assert parse_amount(str(amount)) == amount
+
+
+@given(amounts, st.sampled_from(",_"))
+def test_grouped_amounts_round_trip(amount, separator):
+    assert parse_amount(grouped(amount, separator)) == amount
+
+
+@given(st.integers(10**6, MAX_AMOUNT))
+def test_mixed_separators_are_rejected(amount):
+    text = grouped(amount, ",")
+    # swap the last separator for the other kind.
+    index = text.rindex(",")
+    with pytest.raises(ValueError):
+        parse_amount(text[:index] + "_" + text[index + 1 :])
+
+
+@given(
+    whole=st.integers(0, 10**12) | st.none(),
+    fraction=st.text("0123456789", max_size=8) | st.none(),
+    exponent=st.integers(-20, 20) | st.none(),
+    suffixes=st.text("kmbtKMBT", max_size=3),
+)
+def test_amounts_match_exact_decimal_math(whole, fraction, exponent, suffixes):
+    text = "" if whole is None else str(whole)
+    if fraction is not None:
+        text += "." + fraction
+    if exponent is not None:
+        text += f"e{exponent}"
+    text += suffixes
+
+    if whole is None and not fraction:
+        with pytest.raises(ValueError):
+            parse_amount(text)
+        return
+
+    with localcontext() as context:
+        context.prec = 100
+        expected = Decimal(f"{whole or 0}.{fraction or 0}e{exponent or 0}")
+        for suffix in suffixes.lower():
+            expected *= suffix_dict[suffix]
+        expected = int(expected)
+
+    if expected > MAX_AMOUNT:
+        with pytest.raises(OverflowError):
+            parse_amount(text)
+    else:
+        assert parse_amount(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, amount",
+    [
+        ("1.", 1),
+        ("1.5k", 1500),
+        (".5k", 500),
+        ("1kk", 10**6),
+        ("20e4", 200_000),
+        ("1,000,000", 10**6),
+        ("1_000_000", 10**6),
+        (" 1000 ", 1000),
+    ],
+)
+def test_examples(text, amount):
+    assert parse_amount(text) == amount
+
+
+@pytest.mark.parametrize("text", ["", ".", "-5", "1,5k", "1,000_000", "1_0", "1,00", "k", "1e"])
+def test_not_amounts(text):
+    with pytest.raises(ValueError):
+        parse_amount(text)
+
+
+def test_parse_speed():
+    # a rough benchmark, parsing is on every donation command so it should stay in microseconds.
+    samples = ["1000", "1,000,000", "2.5m", "1kk", "20e4", "9_223_372_036_854_775_807"] * 5000
+    start = time.perf_counter()
+    for text in samples:
+        parse_amount(text)
+    per_call = (time.perf_counter() - start) / len(samples)
+    print(f"parse_amount: {per_call * 1e6:.2f}µs per call")
+    assert per_call < 50e-6
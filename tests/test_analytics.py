@@ -0,0 +1,99 @@
+import random
+import statistics
+
+import pytest
+
+from donationlogging import analytics
+from donationlogging.leaderboard import Ranking
+from donationlogging.ledger import MAX_AMOUNT
+
+
+@pytest.fixture(params=["python", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(analytics, "np", None)
+    return request.param
+
+
+def naive(amounts, thresholds):
+    values = sorted(a for a in amounts if a > 0)
+    n, total = len(values), sum(values)
+    quantiles = statistics.quantiles(values, n=100, method="inclusive") if n > 1 else values * 99
+    gini = sum(abs(a - b) for a in values for b in values) / (2 * n * total)
+    histogram = {}
+    for value in values:
+        low = 10 ** (len(str(value)) - 1)
+        histogram[low] = histogram.get(low, 0) + 1
+    return {
+        "donors": n,
+        "total": total,
+        "mean": total / n,
+        "median": statistics.median(values),
+        "percentiles": {p: quantiles[p - 1] for p in analytics.PERCENTILES},
+        "gini": gini,
+        "milestones": [(t, sum(v >= t for v in values)) for t in sorted(thresholds)],
+        "histogram": histogram,
+    }
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_stats_match_a_naive_oracle(backend, seed):
+    rng = random.Random(seed)
+    amounts = [rng.choice([0, -5, rng.randint(1, 10 ** rng.randint(1, 12))]) for _ in range(60)]
+    thresholds = rng.sample(range(1, 10**6), 3)
+    stats = analytics.compute(amounts, thresholds)
+    expected = naive(amounts, thresholds)
+
+    assert stats.donors == expected["donors"]
+    assert stats.total == expected["total"]
+    assert stats.mean == pytest.approx(expected["mean"])
+    assert stats.median == pytest.approx(expected["median"])
+    for p, value in expected["percentiles"].items():
+        assert stats.percentiles[p] == pytest.approx(value)
+    assert stats.gini == pytest.approx(expected["gini"])
+    assert stats.milestones == expected["milestones"]
+    assert {low: count for low, _, count in stats.histogram if count} == expected["histogram"]
+    assert sum(count for *_, count in stats.histogram) == stats.donors
+    assert all(high == low * 10 for low, high, _ in stats.histogram)
+
+
+def test_huge_balances_dont_overflow(backend):
+    stats = analytics.compute([MAX_AMOUNT] * 3 + [1], [MAX_AMOUNT])
+    assert stats.total == 3 * MAX_AMOUNT + 1
+    assert stats.milestones == [(MAX_AMOUNT, 3)]
+    assert stats.histogram[-1][1] > MAX_AMOUNT
+
+
+def test_no_donors(backend):
+    assert analytics.compute([0, -1]) == analytics.EMPTY
+
+
+class Bank:
+    def __init__(self, amounts, thresholds=()):
+        self.ranking = Ranking(amounts)
+        self.milestones = [(t, [1]) for t in thresholds]
+
+
+def test_bank_stats_are_cached_until_the_bank_changes(monkeypatch):
+    calls = []
+    compute = analytics.compute
+    monkeypatch.setattr(analytics, "compute", lambda *a: calls.append(a) or compute(*a))
+    bank = Bank({1: 100, 2: 200}, [150])
+
+    first = analytics.bank_stats(bank)
+    assert analytics.bank_stats(bank) is first
+    assert len(calls) == 1
+
+    bank.ranking.update(3, 300)
+    assert analytics.bank_stats(bank).donors == 3
+    bank.milestones = [(150, [1]), (250, [2])]
+    assert analytics.bank_stats(bank).milestones == [(150, 2), (250, 1)]
+    assert len(calls) == 3
+
+    other = Bank({1: 100, 2: 200}, [150])
+    analytics.bank_stats(other)
+    assert len(calls) == 4
+    del other
+    assert len(analytics._cache) == 1
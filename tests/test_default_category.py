@@ -0,0 +1,44 @@
+import asyncio
+import types
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("discord")
+
+from donationlogging.dono import DonationLogging
+from donationlogging.exceptions import CategoryDoesNotExist
+
+
+def test_missing_default_category_raises(manager):
+    async def run():
+        mgr = await manager()
+        with pytest.raises(CategoryDoesNotExist):
+            await mgr.get_default_category(1)
+
+        bank = await mgr.get_dono_bank("a", 1)
+        await mgr.set_default_category(1, "a")
+        assert await mgr.get_default_category(1) is bank
+
+        await mgr.delete_bank(bank)
+        assert await mgr.get_default_category_name(1) is None
+        with pytest.raises(CategoryDoesNotExist):
+            await mgr.get_default_category(1)
+
+    asyncio.run(run())
+
+
+def test_batch_without_a_default_category_changes_nothing(manager):
+    async def run():
+        mgr = await manager()
+        bank = await mgr.get_dono_bank("a", 1)
+        cog = types.SimpleNamespace(
+            cache=mgr, bot=types.SimpleNamespace(user=types.SimpleNamespace(id=1))
+        )
+        with pytest.raises(CategoryDoesNotExist):
+            await DonationLogging.apply_batch(
+                cog, [(1, "a", 5, 100, None), (1, None, 5, 100, None)]
+            )
+        assert bank.get_donations(5) == 0
+
+    asyncio.run(run())
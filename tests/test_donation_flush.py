@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+
+def donations(config, guild_id, name):
+    return config.data.get("guild_category", {}).get(str(guild_id), {}).get(name)
+
+
+class Gate:
+    """
+    Holds up the first write of a category's donations until it's opened."""
+
+    def __init__(self, name):
+        self.name = name
+        self.reached = asyncio.Event()
+        self.opened = asyncio.Event()
+
+    async def __call__(self, path):
+        if path[0] == "guild_category" and path[2] == self.name and path[-1] == "donations":
+            if not self.reached.is_set():
+                self.reached.set()
+                await self.opened.wait()
+
+
+def test_flush_writes_dirty_banks(manager, memory_config):
+    async def run():
+        mgr = await manager()
+        bank = await mgr.get_dono_bank("a", 1)
+        bank.get_user(5).add(100)
+        await mgr.flush()
+        assert donations(memory_config, 1, "a") == {"donations": {"5": 100}}
+        assert not mgr._dirty
+
+    asyncio.run(run())
+
+
+def test_delete_waits_for_a_running_flush(manager, memory_config):
+    async def run():
+        mgr = await manager()
+        bank = await mgr.get_dono_bank("a", 1)
+        bank.get_user(5).add(100)
+        memory_config.before_write = gate = Gate("a")
+
+        flush = asyncio.create_task(mgr.flush())
+        await gate.reached.wait()
+        delete = asyncio.create_task(mgr.delete_bank(bank))
+        await asyncio.sleep(0)
+        gate.opened.set()
+        await asyncio.gather(flush, delete)
+
+        assert donations(memory_config, 1, "a") is None
+        assert "a" not in memory_config.data["GUILD"]["1"]["categories"]
+        await mgr.flush()
+        assert donations(memory_config, 1, "a") is None
+
+    asyncio.run(run())
+
+
+def test_cancelled_flush_doesnt_bring_back_a_deleted_bank(manager, memory_config):
+    async def run():
+        mgr = await manager()
+        first = await mgr.get_dono_bank("a", 1)
+        second = await mgr.get_dono_bank("b", 1)
+        first.get_user(5).add(100)
+        second.get_user(5).add(50)
+        memory_config.before_write = gate = Gate("a")
+
+        flush = asyncio.create_task(mgr.flush())
+        await gate.reached.wait()
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+        # both banks were unwritten when the flush got cancelled.
+        assert set(mgr._dirty) == {first, second}
+
+        await mgr.delete_bank(first)
+        await mgr.flush()
+        assert donations(memory_config, 1, "a") is None
+        assert donations(memory_config, 1, "b") == {"donations": {"5": 50}}
+        assert not mgr._dirty
+
+    asyncio.run(run())
+
+
+def test_bank_deleted_after_flush_picked_it_up_is_skipped(manager, memory_config):
+    async def run():
+        mgr = await manager()
+        first = await mgr.get_dono_bank("a", 1)
+        second = await mgr.get_dono_bank("b", 1)
+        second.get_user(5).add(50)
+        first.get_user(5).add(100)
+        # hold the flush on the first bank it writes, then delete the other one under it.
+        memory_config.before_write = gate = Gate("b")
+
+        flush = asyncio.create_task(mgr.flush())
+        await gate.reached.wait()
+        delete = asyncio.create_task(mgr.delete_bank(first))
+        await asyncio.sleep(0)
+        gate.opened.set()
+        await asyncio.gather(flush, delete)
+
+        assert donations(memory_config, 1, "a") is None
+        assert first not in mgr._dirty
+
+    asyncio.run(run())
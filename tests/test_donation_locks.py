@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+
+@pytest.fixture
+def yielding_config(memory_config):
+    # every write yields first, so read-modify-writes that aren't locked overlap.
+    async def before_write(path):
+        await asyncio.sleep(0)
+
+    memory_config.before_write = before_write
+    return memory_config
+
+
+def categories(config, guild_id=1):
+    return config.data["GUILD"][str(guild_id)]["categories"]
+
+
+def test_concurrent_lookups_of_a_new_category_make_one_bank(manager, yielding_config):
+    async def run():
+        mgr = await manager()
+        banks = await asyncio.gather(*(mgr.get_dono_bank("Event", 1) for _ in range(20)))
+        assert len(set(map(id, banks))) == 1
+        assert list(categories(yielding_config)) == ["event"]
+
+    asyncio.run(run())
+
+
+def test_concurrent_category_writes_dont_overwrite_each_other(manager, yielding_config):
+    async def run():
+        mgr = await manager()
+        bank = await mgr.get_dono_bank("main", 1)
+        doomed = await mgr.get_dono_bank("doomed", 1)
+        await asyncio.gather(
+            *(mgr.get_dono_bank(f"category {i}", 1, force=True) for i in range(10)),
+            *(bank.setroles({1000: [role_id]}, merge=True) for role_id in range(10)),
+            mgr.delete_bank(doomed),
+        )
+
+        saved = categories(yielding_config)
+        assert set(saved) == {"main", *(f"category {i}" for i in range(10))}
+        assert sorted(saved["main"]["1000"]) == list(range(10))
+        assert dict(bank.milestones) == {1000: tuple(range(10))}
+
+    asyncio.run(run())
+
+
+def test_concurrent_updates_under_the_bank_lock(manager, yielding_config):
+    async def run():
+        mgr = await manager()
+        bank = await mgr.get_dono_bank("main", 1)
+
+        async def donate(user_id):
+            for _ in range(100):
+                async with bank.lock:
+                    before = bank.get_donations(user_id)
+                    bank.get_user(user_id).add(10)
+                    await asyncio.sleep(0)  # what `dono add` awaits while syncing roles.
+                    assert bank.get_donations(user_id) == before + 10
+
+        start = time.perf_counter()
+        await asyncio.gather(*(donate(user_id % 5) for user_id in range(50)))
+        elapsed = time.perf_counter() - start
+        print(f"bank lock: {5000 / elapsed:.0f} updates per second")
+
+        assert {u: bank.get_donations(u) for u in range(5)} == {u: 10_000 for u in range(5)}
+        assert mgr.get_user_total(1, 0) == 10_000
+        await mgr.flush()
+        assert yielding_config.data["guild_category"]["1"]["main"]["donations"]["0"] == 10_000
+
+    asyncio.run(run())
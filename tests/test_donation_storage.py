@@ -0,0 +1,58 @@
+import asyncio
+import sys
+import time
+
+from donationlogging.ledger import MAX_AMOUNT
+
+
+def test_balances_are_int_keyed_and_saved_as_strings(manager, memory_config):
+    memory_config.data = {
+        "GUILD": {"1": {"categories": {"main": {"emoji": None}}}},
+        # balances saved before they were capped get capped when loaded.
+        "guild_category": {"1": {"main": {"donations": {"10": 5, "11": MAX_AMOUNT + 1}}}},
+    }
+
+    async def run():
+        mgr = await manager()
+        bank = await mgr.get_existing_dono_bank("main", 1)
+        assert bank._data == {10: 5, 11: MAX_AMOUNT}
+        assert bank.get_donations("10") == bank.get_donations(10) == 5
+        assert bank.get_user("10").user_id == 10
+
+        bank.get_user("12").add(7)
+        bank.bulk_update([("13", 1), (10, 5)], add=True)
+        bank.remove_user("11")
+        assert all(type(k) is int for k in bank._data)
+        assert [u for u, _ in bank.ranking.top()] == [10, 12, 13]
+        assert {b.name for b in mgr.get_user_banks(12)} == {"main"}
+
+        await mgr.flush()
+        saved = memory_config.data["guild_category"]["1"]["main"]["donations"]
+        assert saved == {"10": 10, "12": 7, "13": 1}
+
+    asyncio.run(run())
+
+
+def test_storage_footprint_and_speed(manager):
+    # a rough benchmark of 100k donors, printing what the int keys cost compared to strings.
+    async def run():
+        mgr = await manager()
+        bank = await mgr.get_dono_bank("main", 1)
+        rows = [(user_id, user_id % 1000 + 1) for user_id in range(10**17, 10**17 + 100_000)]
+
+        start = time.perf_counter()
+        bank.bulk_update(rows)
+        for user_id, _ in rows[:20_000]:
+            bank.get_user(user_id).add(1)
+        elapsed = time.perf_counter() - start
+
+        keys = sum(map(sys.getsizeof, bank._data))
+        string_keys = sum(sys.getsizeof(str(k)) for k in bank._data)
+        print(
+            f"100k donors: {elapsed * 1e3:.0f}ms to load and update 20k of them, "
+            f"{keys / 2**20:.1f}MiB of int keys against {string_keys / 2**20:.1f}MiB as strings"
+        )
+        assert keys < string_keys
+        assert elapsed < 20
+
+    asyncio.run(run())
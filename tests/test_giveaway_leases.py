@@ -0,0 +1,129 @@
+import asyncio
+import multiprocessing
+import sys
+
+import pytest
+
+from giveaways import ownership
+from giveaways.ownership import GiveawayLeases, shard_id_for
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ownership.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def leases(tmp_path):
+    # two processes' worth of leases on the same file, each with its own connections.
+    path = tmp_path / "leases.sqlite3"
+    return GiveawayLeases(path, "a", ttl=120), GiveawayLeases(path, "b", ttl=120)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_shard_formula():
+    guild_id = 270904126974590976
+    assert shard_id_for(guild_id, 1) == 0
+    assert shard_id_for(guild_id, 16) == (guild_id >> 22) % 16
+
+
+def test_only_one_owner_can_claim(clock, leases):
+    a, b = leases
+    assert run(a.claim(1))
+    assert not run(b.claim(1))
+    assert run(a.claim(1))  # claiming again just extends it.
+
+
+def test_renew_keeps_the_lease_past_its_ttl(clock, leases):
+    a, b = leases
+    assert run(a.claim(1))
+    for _ in range(5):
+        clock.now += 100
+        assert run(a.renew(1))
+        assert not run(b.claim(1))
+    assert not run(b.renew(1))
+
+
+def test_expired_lease_is_taken_over(clock, leases):
+    a, b = leases
+    assert run(a.claim(1))
+    clock.now += 121
+    assert run(b.claim(1))
+    # the old owner finds out it lost the lease instead of finishing over it.
+    assert not run(a.renew(1))
+    assert not run(a.finish(1, {"message": 1}))
+    assert run(b.finish(1, {"message": 1, "winnerslist": [5]}))
+    assert run(a.finished([1, 2])) == {1: {"message": 1, "winnerslist": [5]}}
+
+
+def test_finished_lease_is_never_claimed_again(clock, leases):
+    a, b = leases
+    assert run(a.claim(1))
+    assert run(a.finish(1))
+    clock.now += 10_000
+    assert not run(a.claim(1))
+    assert not run(b.claim(1))
+
+
+def test_released_lease_can_be_claimed(clock, leases):
+    a, b = leases
+    assert run(a.claim(1))
+    run(a.release(1))
+    assert run(b.claim(1))
+
+
+def test_old_finished_leases_are_pruned(clock, tmp_path):
+    a = GiveawayLeases(tmp_path / "leases.sqlite3", "a", keep=60)
+    assert run(a.claim(1)) and run(a.finish(1))
+    assert run(a.finished([1])) == {1: None}
+    clock.now += 61
+    assert run(a.finished([1])) == {}
+
+
+def test_finished_looks_up_more_ids_than_sqlite_allows(clock, leases):
+    a, _ = leases
+    for message_id in range(0, 3000, 7):
+        run(a.claim(message_id))
+        run(a.finish(message_id))
+    assert set(run(a.finished(range(3000)))) == set(range(0, 3000, 7))
+
+
+def _end_all(path, owner, message_ids, results):
+    leases = GiveawayLeases(path, owner)
+    for message_id in message_ids:
+        if leases._claim(message_id):
+            results.put((owner, message_id))
+            leases._finish(message_id, None)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="forks the workers")
+def test_processes_never_end_a_giveaway_twice(tmp_path):
+    path = tmp_path / "leases.sqlite3"
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    message_ids = list(range(200))
+    workers = [
+        context.Process(target=_end_all, args=(path, f"p{i}", message_ids, results))
+        for i in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    ended = [results.get(timeout=60) for _ in message_ids]
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert sorted(message_id for _, message_id in ended) == message_ids
+    assert results.empty()
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("discord")
+
+from giveaways.confhandler import conf
+from giveaways.models import Giveaway
+from giveaways.replay import FakeBot, FakeCog, FakeConf, FakeHTTP
+
+
+def record(message_id, **overrides):
+    data = {
+        "time": int(time.time()) + 3600,
+        "guild": 1 << 22,
+        "host": 1,
+        "channel": 2,
+        "message": message_id,
+        "emoji": "🎉",
+        "winners": 1,
+        "prize": "a prize",
+        "requirements": {"required": [], "blacklist": [], "bypass": []},
+    }
+    data.update(overrides)
+    return data
+
+
+def test_broken_records_are_skipped():
+    bot = FakeBot(FakeHTTP(0))
+    cog = FakeCog(bot, FakeConf())
+    raw = [
+        record(1),
+        record(2, requirements="not a dict"),
+        record(3, requirements={"unknown_key": 1}),
+        "not even a record",
+        record(4),
+    ]
+
+    async def load():
+        return [g async for g in conf._deserialise(raw, Giveaway, bot, cog, chunk_size=2)]
+
+    loaded = asyncio.run(load())
+    assert [g.message_id for g in loaded] == [1, 4]
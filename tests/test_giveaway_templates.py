@@ -0,0 +1,111 @@
+import time
+import types
+
+import pytest
+
+pytest.importorskip("redbot")
+discord = pytest.importorskip("discord")
+
+from giveaways.templates import CompiledTemplate, GuildTemplates
+
+DONOR = types.SimpleNamespace(mention="<@1>", name="donor", _token="secret", roles=["a", "b"])
+VALUES = {"donor": DONOR, "prize": "1 million coins", "winner": "<@2>", "link": "https://x"}
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "plain text",
+        "{donor.mention} donated {prize}!",
+        "{prize!r:>30} {donor.roles[1]} {{escaped}}",
+        "{winner} won {prize}, {link}",
+        "",
+    ],
+)
+def test_templates_render_like_str_format(source):
+    assert CompiledTemplate(source).render(VALUES) == source.format_map(VALUES)
+
+
+@pytest.mark.parametrize(
+    "source, rendered",
+    [
+        ("{unknown} {prize}", "{unknown} 1 million coins"),
+        ("{donor._token}", "{donor._token}"),
+        ("{0} {}", "{0} {}"),
+        ("{donor.missing} {prize:d}", "{donor.missing} {prize:d}"),
+        ("{donor.roles[9]}", "{donor.roles[9]}"),
+        ("unbalanced {prize", "unbalanced {prize"),
+    ],
+)
+def test_fields_that_cant_be_filled_are_left_alone(source, rendered):
+    assert CompiledTemplate(source).render(VALUES) == rendered
+
+
+def templates(**overrides):
+    options = dict(
+        msg="{not a template}",
+        endmsg="Congratulations {winner}! You won {prize}. {link}",
+        tmsg="Thank {donor.mention} for {prize}",
+        emoji="🎉",
+        edit_timer=False,
+    )
+    options.update(overrides)
+    return GuildTemplates(**options)
+
+
+def test_payloads():
+    guild = types.SimpleNamespace(name="guild", icon_url="https://icon")
+    host = types.SimpleNamespace(id=3)
+    requirements = types.SimpleNamespace(null=True)
+    tmpl = templates()
+
+    start = tmpl.start(
+        guild=guild, host=host, prize="coins", winners=2, ends_at=1e9, requirements=requirements
+    )
+    assert start["content"] == "{not a template}"
+    assert start["embed"].title == "**coins**"
+    assert "Ends <t:1000000000:R>" in start["embed"].description
+
+    assert tmpl.thank(donor=DONOR, prize="coins")["embed"].description == "Thank <@1> for coins"
+
+    edit, reply = tmpl.end(
+        start["embed"],
+        guild=guild,
+        host_id=3,
+        winners=2,
+        prize="coins",
+        link="https://x",
+        winner_mentions="<@2>",
+    )
+    assert "**Winners:** <@2>" in edit["embed"].description
+    assert reply == {"content": "Congratulations <@2>! You won coins. https://x"}
+
+    timed = templates(edit_timer=True).timer_update(
+        start["embed"], emoji="🎉", host_id=3, ends_at=time.time() + 3600
+    )
+    assert "\nEnds in " in timed["embed"].description
+    assert "<t:" not in timed["embed"].description
+
+
+def test_render_speed():
+    # a rough benchmark against formatting the config string every time like it used to.
+    class Coordinate(dict):
+        def __missing__(self, key):
+            return "{" + key + "}"
+
+    source = "Congratulations {winner}! You won {prize}. {link} {unknown}"
+    compiled = CompiledTemplate(source)
+    values = Coordinate(VALUES)
+
+    start = time.perf_counter()
+    for _ in range(20_000):
+        compiled.render(values)
+    rendered = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(20_000):
+        source.format_map(values)
+    formatted = time.perf_counter() - start
+    print(f"templates: {rendered * 50:.2f}µs rendered, {formatted * 50:.2f}µs with format_map")
+
+    assert compiled.render(values) == source.format_map(values)
+    assert rendered / 20_000 < 50e-6
@@ -0,0 +1,93 @@
+import random
+import time
+
+import pytest
+
+from donationlogging import leaderboard
+from donationlogging.leaderboard import PageCache, Ranking
+
+
+def ordered(amounts):
+    # what the ranking should look like, worked out the slow way.
+    return sorted(((u, a) for u, a in amounts.items() if a), key=lambda x: (-x[1], x[0]))
+
+
+@pytest.fixture
+def small_buckets(monkeypatch):
+    # small buckets so a few hundred updates split and empty plenty of them.
+    monkeypatch.setattr(Ranking, "LOAD", 4)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ranking_matches_a_sorted_list(small_buckets, seed):
+    rng = random.Random(seed)
+    amounts = {u: rng.choice([0, rng.randint(1, 50)]) for u in range(40)}
+    ranking = Ranking(amounts)
+    for _ in range(400):
+        user_id = rng.randrange(60)
+        # lots of ties on purpose, they're ordered by user id.
+        amounts[user_id] = rng.choice([0, rng.randint(1, 50)])
+        ranking.update(user_id, amounts[user_id])
+
+        expected = ordered(amounts)
+        assert list(ranking.top()) == expected
+        assert len(ranking) == len(expected)
+        start, limit = rng.randrange(len(expected) + 2), rng.randrange(1, 10)
+        assert list(ranking.top(limit, start)) == expected[start : start + limit]
+        positions = {u: i for i, (u, _) in enumerate(expected, 1)}
+        for probe in rng.sample(range(60), 5):
+            assert ranking.rank(probe) == positions.get(probe)
+            assert ranking.get(probe) == amounts.get(probe, 0)
+
+
+def test_version_only_changes_with_the_ranking():
+    ranking = Ranking({1: 10})
+    version = ranking.version
+    ranking.update(1, 10)
+    ranking.update(2, 0)
+    assert ranking.version == version
+    ranking.update(2, 5)
+    assert ranking.version != version
+    assert Ranking({1: 10}).version != ranking.version
+
+
+def test_page_cache_goes_stale(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(leaderboard.time, "monotonic", lambda: now[0])
+    cache = PageCache(ttl=10, maxsize=2)
+    renders = []
+
+    def render(name):
+        renders.append(name)
+        return name
+
+    assert cache.get("a", 1, lambda: render("a")) == "a"
+    cache.get("a", 1, lambda: render("a"))
+    assert renders == ["a"]
+
+    cache.get("a", 2, lambda: render("a"))  # the ranking changed.
+    now[0] = 11
+    cache.get("a", 2, lambda: render("a"))  # expired.
+    assert renders == ["a"] * 3
+
+    cache.get("b", 2, lambda: render("b"))
+    cache.get("a", 2, lambda: render("a"))
+    cache.get("c", 2, lambda: render("c"))  # pushes out "b", the least recently used.
+    cache.get("a", 2, lambda: render("a"))
+    cache.get("b", 2, lambda: render("b"))
+    assert renders == ["a"] * 3 + ["b", "c", "b"]
+
+
+def test_ranking_speed():
+    # a rough benchmark, every balance change updates a ranking.
+    rng = random.Random(0)
+    ranking = Ranking({u: rng.randint(1, 10**9) for u in range(100_000)})
+    start = time.perf_counter()
+    for _ in range(20_000):
+        ranking.update(rng.randrange(100_000), rng.randint(0, 10**9))
+    for _ in range(1_000):
+        list(ranking.top(10, rng.randrange(90_000)))
+        ranking.rank(rng.randrange(100_000))
+    elapsed = time.perf_counter() - start
+    print(f"Ranking: {elapsed * 1e3:.0f}ms for 20k updates and 1k top/rank queries")
+    assert elapsed < 5
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("redbot")
+
+from donationlogging.notes import NoteStore
+
+
+def note(content, category="a"):
+    return {"content": content, "category": category}
+
+
+def test_category_index_follows_changes(memory_config):
+    store = NoteStore(memory_config)
+    store.add(1, 10, note("first"))
+    store.add(1, 11, note("second"))
+    store.add(1, 10, note("other", category="b"))
+    store.add(2, 10, note("other guild"))
+
+    assert store.for_category(1, "a") == [(10, 1, note("first")), (11, 1, note("second"))]
+    assert store.get(1, 10, 2) == note("other", category="b")
+
+    store.remove_member(1, 10)
+    assert store.for_category(1, "a") == [(11, 1, note("second"))]
+    assert store.for_category(1, "b") == []
+    store.set_member(1, 10, {3: note("restored")})
+    assert [n for _, n, _ in store.for_category(1, "a")] == [3, 1]
+
+
+def test_notes_round_trip_through_config(memory_config):
+    async def run():
+        store = NoteStore(memory_config)
+        store.add(1, 10, note("first"))
+        store.add(1, 10, note("second", category="b"))
+        await store.flush()
+
+        loaded = NoteStore(memory_config)
+        await loaded.load()
+        assert loaded.get_all(1, 10) == store.get_all(1, 10)
+        assert loaded.for_category(1, "b") == [(10, 2, note("second", category="b"))]
+        assert loaded.add(1, 10, note("third")) == 3
+
+    asyncio.run(run())
+
+
+def test_cancelled_flush_keeps_unwritten_notes_dirty(memory_config):
+    async def run():
+        store = NoteStore(memory_config)
+        for member_id in range(5):
+            store.add(1, member_id, note("hello"))
+
+        writes = 0
+        held = asyncio.Event()
+
+        async def before_write(path):
+            nonlocal writes
+            writes += 1
+            if writes == 3:
+                held.set()
+                await asyncio.Event().wait()
+
+        memory_config.before_write = before_write
+        flush = asyncio.create_task(store.flush())
+        await held.wait()
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+        assert store.pending == 3
+        del memory_config.before_write
+        await store.flush()
+        assert store.pending == 0
+        assert len(memory_config.data["MEMBER"]["1"]) == 5
+
+    asyncio.run(run())
+
+
+def test_failed_flush_keeps_unwritten_notes_dirty(memory_config):
+    async def run():
+        store = NoteStore(memory_config)
+        store.add(1, 10, note("hello"))
+
+        async def before_write(path):
+            raise OSError("disk full")
+
+        memory_config.before_write = before_write
+        with pytest.raises(OSError):
+            await store.flush()
+        assert store.pending == 1
+
+    asyncio.run(run())
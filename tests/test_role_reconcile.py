@@ -0,0 +1,136 @@
+import asyncio
+import types
+
+import pytest
+
+pytest.importorskip("redbot")
+pytest.importorskip("discord")
+
+from donationlogging.milestones import Milestones
+from donationlogging.reconcile import RoleReconciler
+
+
+class Role:
+    def __init__(self, id):
+        self.id = id
+        self.members = []
+
+
+class Member:
+    def __init__(self, id, guild):
+        self.id = id
+        self.guild = guild
+        self.roles = []
+        self.edits = 0
+
+    async def add_roles(self, *roles, reason=None):
+        await self.guild.on_edit(self)
+        self.edits += 1
+        for role in roles:
+            self.roles.append(role)
+            role.members.append(self)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.guild.on_edit(self)
+        self.edits += 1
+        for role in roles:
+            self.roles.remove(role)
+            role.members.remove(self)
+
+
+class Guild:
+    def __init__(self, id, role_ids, member_ids):
+        self.id = id
+        self.roles = {r: Role(r) for r in role_ids}
+        self.members = {m: Member(m, self) for m in member_ids}
+
+    async def on_edit(self, member):
+        pass
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_channel(self, channel_id):
+        return None
+
+
+@pytest.fixture
+def setup(manager, memory_config):
+    memory_config.register_guild(autoadd=True, autoremove=True, reconcile=None)
+    cog = types.SimpleNamespace(config=memory_config)
+
+    async def make(balances):
+        mgr = await manager()
+        guild = Guild(1, (10, 20), balances)
+        bank = await mgr.get_dono_bank("a", guild.id)
+        bank.milestones = Milestones([(100, [10]), (200, [20])])
+        for user_id, amount in balances.items():
+            bank.get_user(user_id).add(amount)
+        return guild, bank, RoleReconciler(cog, delay=0)
+
+    return make
+
+
+def role_ids(member):
+    return sorted(role.id for role in member.roles)
+
+
+def test_reconcile_applies_milestones(setup):
+    async def run():
+        guild, bank, reconciler = await setup({1: 150, 2: 250, 3: 50})
+        await reconciler.start(guild, bank)
+        await reconciler._tasks[guild.id]
+
+        assert role_ids(guild.members[1]) == [10]
+        assert role_ids(guild.members[2]) == [10, 20]
+        assert role_ids(guild.members[3]) == []
+        assert reconciler.progress == {}
+
+    asyncio.run(run())
+
+
+def test_reconcile_uses_balances_from_when_a_member_is_applied(setup):
+    async def run():
+        guild, bank, reconciler = await setup({1: 150, 2: 250, 3: 150})
+
+        async def on_edit(member):
+            # balances change while the job is running, after the plan was made.
+            if member.id == 1:
+                bank.get_user(2).remove(200)
+                bank.get_user(3).remove(150)
+
+        guild.on_edit = on_edit
+        await reconciler.start(guild, bank)
+        await reconciler._tasks[guild.id]
+
+        assert role_ids(guild.members[2]) == [], "got the roles it had when the plan was made"
+        assert guild.members[3].edits == 0, "nothing to change anymore, shouldn't be touched"
+
+    asyncio.run(run())
+
+
+def test_cancelled_reconcile_saves_the_last_applied_member(setup, memory_config):
+    async def run():
+        guild, bank, reconciler = await setup({1: 150, 2: 150, 3: 150})
+        second = asyncio.Event()
+
+        async def on_edit(member):
+            if member.id == 2:
+                second.set()
+                await asyncio.Event().wait()
+
+        guild.on_edit = on_edit
+        await reconciler.start(guild, bank)
+        await asyncio.wait_for(second.wait(), 5)
+        reconciler.stop()
+        with pytest.raises(asyncio.CancelledError):
+            await reconciler._tasks[guild.id]
+
+        saved = memory_config.data["GUILD"]["1"]["reconcile"]
+        assert saved["cursor"] == 1
+        assert saved["done"] == 1
+
+    asyncio.run(run())